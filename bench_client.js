@@ -0,0 +1,125 @@
+#!/usr/bin/env node
+// Client benchmark for the generated index.html, run by benchmarks.py.
+//
+//   node bench_client.js path/to/index.html
+//
+// The page runs in two parts: a worker script that owns the data and does all
+// the searching and rendering, and a page script that only posts messages and
+// writes the DOM.  Each is evaluated in its own vm context with stubs.  Timed:
+// the page script's start-up, the longest single task it runs while handing
+// the data over (what could delay a keystroke), the worker's parse +
+// index build, a page-script keystroke, the worker's search over a fixed query
+// set, the typo-tolerant fuzzySearch() on misspelt words and linkify() over
+// the entries.  Prints one JSON object of timings in seconds.
+
+const fs = require('fs');
+const vm = require('vm');
+const { performance } = require('perf_hooks');
+
+const html = fs.readFileSync(process.argv[2], 'utf8');
+const block = id => html.match(new RegExp(`<script[^>]*id="${id}"[^>]*>([\\s\\S]*?)</script>`))[1];
+const scripts = [...html.matchAll(/<script>([\s\S]*?)<\/script>/g)].map(m => m[1]);
+const pageSource = scripts[scripts.length - 1];
+const workerSource = block('hobbes-worker');
+const dataText = block('hobbes-data');
+
+function stubElement(text = '') {
+  return {
+    innerHTML: '', value: '', href: '', textContent: text,
+    classList: { add() {}, remove() {}, toggle() {} },
+    addEventListener() {}, blur() {}, focus() {},
+    querySelectorAll() { return []; },
+  };
+}
+
+// Page script, with a Worker that just records what it is sent.
+const posted = [];
+class StubWorker {
+  postMessage(m) { posted.push(m); }
+  terminate() {}
+}
+const elements = { 'hobbes-worker': stubElement(workerSource), 'hobbes-data': stubElement(dataText) };
+const page = {
+  document: {
+    getElementById: id => (elements[id] = elements[id] || stubElement()),
+    querySelectorAll: () => [],
+    addEventListener() {},
+  },
+  window: { addEventListener() {}, scrollTo() {}, location: { hash: '' } },
+  Worker: StubWorker, Blob: class {}, URL: { createObjectURL: () => 'blob:' },
+  TextEncoder, clearTimeout, console,
+};
+let longestTaskS = 0;
+page.setTimeout = (fn, ms) => setTimeout(() => {
+  const t = performance.now();
+  fn();
+  longestTaskS = Math.max(longestTaskS, (performance.now() - t) / 1000);
+}, ms);
+
+async function main() {
+  vm.createContext(page);
+  let t0 = performance.now();
+  vm.runInContext(pageSource + '\n;globalThis.__bench = { showSearch };', page);
+  const mainLoadS = (performance.now() - t0) / 1000;
+  longestTaskS = mainLoadS;
+  while (!posted.some(m => m.type === 'init')) await new Promise(r => setTimeout(r));
+  const init = posted.find(m => m.type === 'init');
+
+  // Worker script, fed the buffer the page script posted.
+  const replies = [];
+  const worker = { self: { postMessage: m => replies.push(m) }, TextDecoder, console };
+  vm.createContext(worker);
+  vm.runInContext(workerSource + '\n;globalThis.__bench = { data: () => DATA, searchHtml, fuzzySearch, linkify };', worker);
+  t0 = performance.now();
+  worker.self.onmessage({ data: init });
+  const loadS = (performance.now() - t0) / 1000;
+  const { searchHtml, fuzzySearch, linkify } = worker.__bench;
+  const DATA = worker.__bench.data();
+
+  // Deterministic query mix: 1-6 character prefixes and infixes of every 97th term.
+  const queries = [];
+  for (let i = 0; i < DATA.entries.length && queries.length < 400; i += 97) {
+    const t = DATA.entries[i].term.toLowerCase();
+    queries.push(t.slice(0, 1 + (i % 6)));
+    queries.push(t.slice(1, 4));
+  }
+
+  // What a keystroke costs the page script: posting the query.
+  const { showSearch } = page.__bench;
+  let t = performance.now();
+  for (const q of queries) showSearch(q);
+  const keystrokeS = (performance.now() - t) / 1000;
+
+  t = performance.now();
+  for (const q of queries) searchHtml(q);
+  const searchS = (performance.now() - t) / 1000;
+
+  // Misspell the longest word of every 97th term: drop one letter, double another.
+  const typos = [];
+  for (let i = 0; i < DATA.entries.length && typos.length < 200; i += 97) {
+    const w = DATA.entries[i].term.toLowerCase().split(/\s+/).sort((a, b) => b.length - a.length)[0];
+    if (w.length < 5) continue;
+    const k = 1 + (i % (w.length - 2));
+    typos.push(w.slice(0, k) + w.slice(k + 1, k + 2) + w.slice(k + 1));
+  }
+  t = performance.now();
+  for (const q of typos) fuzzySearch(q);
+  const fuzzyS = (performance.now() - t) / 1000;
+
+  const sample = DATA.entries.slice(0, 2000);
+  t = performance.now();
+  for (const e of sample) linkify(e.definition, e.cross_refs);
+  const linkifyS = (performance.now() - t) / 1000;
+
+  process.stdout.write(JSON.stringify({
+    main_load: mainLoadS,
+    main_longest_task: longestTaskS,
+    load: loadS,
+    keystroke_per_query: keystrokeS / Math.max(queries.length, 1),
+    search_per_query: searchS / Math.max(queries.length, 1),
+    fuzzy_per_query: fuzzyS / Math.max(typos.length, 1),
+    linkify_per_entry: linkifyS / Math.max(sample.length, 1),
+  }) + '\n');
+}
+
+main();
@@ -0,0 +1,773 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the Hobbes Dictionary toolchain.
+
+    python benchmarks.py run [--sizes 1k,10k] [--only crossrefs,csv] [--out FILE]
+    python benchmarks.py compare BASELINE.json CURRENT.json [--threshold 0.15]
+    python benchmarks.py scaling [--size 20k] [--workers 1,2,4,8]
+    python benchmarks.py synth 100k out.csv
+    python benchmarks.py importtime [--runs 5]
+    python benchmarks.py normcheck [--csv hobbes_dictionary.csv]
+    python benchmarks.py memory [--size 1m] [--out FILE]
+    python benchmarks.py buildmem [--sizes 10k,30k,100k] [--out FILE]
+    python benchmarks.py crossmatch [--csv hobbes_dictionary.csv] [--sizes 1k,10k] [--examples 10]
+
+`run` times each benchmark against a synthetic corpus shaped like
+hobbes_dictionary.csv and writes a JSON results file; `compare` flags any
+benchmark whose median got slower than the baseline by more than the threshold
+and exits non-zero if there were regressions.  Baselines live in bench_baselines/.
+
+Client benchmarks build the real page and run its two scripts under node with
+a stubbed DOM: the page script's start-up and keystroke cost, and the worker's
+data parse/index build, search and `linkify`.
+
+`importtime` runs `python -X importtime` on what each CLI command imports and
+fails if a command's cold import cost is over IMPORT_BUDGET_MS, or if it pulls
+in one of HEAVY_MODULES.
+
+`normcheck` runs the page's `makeSlug` and `foldKey` under node over every term
+and cross-ref name in the CSV plus NORMCHECK_EXTRA, and fails if any result
+differs from store.normalise_terms (or its slugs from make_slug).
+
+`memory` writes a synthetic CSV and, in a fresh process per mode, loads it,
+cross-references it and writes it back, printing peak RSS after each phase:
+"dicts" is the old list of row dicts, "entries" store.Entries.  Both must
+write byte-identical CSVs.  The exact matcher is quadratic (see CAPS), so the
+cross-ref phase runs add_cross_refs with the linear stem matcher.
+
+`buildmem` builds the site from synthetic CSVs of growing size, each in a
+fresh process after one build has cached its related terms, and prints the
+build's peak RSS next to the peak from loading the rows alone.  Their
+difference is what the build itself holds, which should grow far more
+slowly than the page.
+
+`crossmatch` times the exact cross-ref matcher against the inflection-aware
+one (crossrefs.StemMatcher) on the real CSV and on synthetic corpora of each
+size, counts the refs each finds, checks the stem matcher finds every exact
+ref, and prints some of the links only it makes.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE_DIR = os.path.join(HERE, "bench_baselines")
+
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+DEFAULT_SIZES = ["1k", "10k"]
+
+# Cross-refs are quadratic (every term against every definition) and are
+# impractical above this without --no-caps.
+CAPS = {
+    "crossrefs": 10_000,
+    "extract_json_array": 100_000,
+    "client": 100_000,
+    "related": 100_000,
+    "concordance": 100_000,
+}
+
+# ── Synthetic corpus ─────────────────────────────────────────────────────────
+
+WORDS = """
+sense imagination memory experience understanding speech reason science
+passion appetite desire love aversion hate joy grief fear courage anger hope
+despair diffidence covetousness ambition magnanimity liberality honour worth
+dignity power manners religion nature right law liberty covenant contract
+justice injustice equity gratitude person author actor commonwealth sovereign
+sovereignty subject dominion counsel command punishment reward crime sin
+church prophet miracle kingdom spirit angel inspiration scripture darkness
+philosophy tradition faith grace conscience opinion belief curiosity glory
+vainglory war peace submission authority representative assembly monarchy
+aristocracy democracy tyranny oligarchy succession obligation merit gift
+property propriety fancy prudence sapience wit judgement madness folly
+absurdity felicity deliberation will fortitude temperance tongue name truth
+""".split()
+
+FILLER = """
+the of and that which is to be by in a as it or are for this they not but
+with his from all men him their so nothing other any thing things called
+whereby therefore also same those such when what can cannot shall may must
+""".split()
+
+ROMANS = [
+    "I", "II", "III", "IV", "V", "VI", "VII", "VIII", "IX", "X",
+    "XI", "XII", "XIII", "XIV", "XV", "XVI", "XVII", "XVIII", "XIX", "XX",
+    "XXI", "XXII", "XXIII", "XXIV", "XXV", "XXVI", "XXVII", "XXVIII", "XXIX", "XXX",
+    "XXXI", "XXXII", "XXXIII", "XXXIV", "XXXV", "XXXVI", "XXXVII", "XXXVIII", "XXXIX", "XL",
+    "XLI", "XLII", "XLIII", "XLIV", "XLV", "XLVI", "XLVII",
+]
+
+
+def parse_size(label):
+    label = label.lower()
+    if label in SIZES:
+        return SIZES[label]
+    if label[-1:] in ("k", "m"):
+        return int(float(label[:-1]) * (1_000 if label[-1] == "k" else 1_000_000))
+    return int(label)
+
+
+def synth_terms(n, rng):
+    """n unique Title Case terms built from Hobbes's vocabulary."""
+    seen = set()
+    terms = []
+    while len(terms) < n:
+        k = rng.choice((1, 2, 2, 3))
+        words = rng.choices(WORDS, k=k)
+        if k == 3 and rng.random() < 0.5:
+            words[1] = "of"
+        name = " ".join(w if w == "of" else w.title() for w in words)
+        if name in seen:
+            continue
+        seen.add(name)
+        terms.append(name)
+    return terms
+
+
+def synth_corpus(n, seed=0):
+    """
+    n entry dicts with the columns of hobbes_dictionary.csv.  cross_refs lists
+    the terms deliberately mentioned in each definition, which is close to (but
+    not exactly) what add_cross_refs would compute.
+    """
+    rng = random.Random(seed)
+    terms = synth_terms(n, rng)
+    chapters = ["Chapter Intro: The Introduction"] + [
+        f"Chapter {r}: Of {rng.choice(WORDS).title()}" for r in ROMANS
+    ]
+    entries = []
+    for term in terms:
+        body = rng.choices(FILLER + WORDS, k=rng.randint(12, 80))
+        # Mention a few other terms so cross-refs and linkify have work to do.
+        refs = {rng.choice(terms) for _ in range(rng.randint(0, 4))} - {term}
+        for ref in refs:
+            body.insert(rng.randrange(len(body) + 1), ref)
+        entries.append({
+            "term":        term,
+            "definition":  f"{term.upper()} is " + " ".join(body) + ".",
+            "chapter":     rng.choice(chapters),
+            "page_number": str(rng.randint(1, 400)),
+            "cross_refs":  "; ".join(sorted(refs)),
+            "context":     " ".join(rng.choices(FILLER + WORDS, k=rng.randint(6, 16))),
+        })
+    return entries
+
+
+SYLLABLES = """
+ab ac ad al am an ar as at be ca ce co de di do el en er es fa fi fo ga ge go
+ha he ho id il im in io is ka la le li lo lu ma me mi mo mu na ne ni no nu or
+os pa pe pi po pu ra re ri ro ru sa se si so su ta te ti to tu un ur us va ve
+""".split()
+
+
+def synth_topical_corpus(n, seed=0):
+    """
+    synth_corpus with topical vocabulary appended to each definition.  The
+    plain corpus draws every word uniformly from ~150, so nearly all of them
+    are in most definitions and TF-IDF has nothing to work with; here each
+    entry mostly uses one of n/40 topics of 40 words from a ~25k-word
+    invented vocabulary, so similarity search has real neighbours to find.
+    """
+    rng = random.Random(seed + 1)
+    vocab = sorted({"".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))) for _ in range(30_000)})
+    topics = [rng.sample(vocab, 40) for _ in range(max(8, n // 40))]
+    entries = synth_corpus(n, seed)
+    for e in entries:
+        main, other = rng.choice(topics), rng.choice(topics)
+        words = rng.choices(main, k=rng.randint(8, 25)) + rng.choices(other, k=3) + rng.choices(vocab, k=5)
+        e["definition"] += " " + " ".join(words)
+    return entries
+
+
+def synth_transcript(entries):
+    """Model-style reply wrapping the entries as a JSON array in prose and fences."""
+    payload = [
+        {"term": e["term"], "definition": e["definition"], "page_number": e["page_number"],
+         "context": e["context"], "chapter_num": e["chapter"].split()[1].rstrip(":"),
+         "chapter_title": e["chapter"].split(": ", 1)[1]}
+        for e in entries
+    ]
+    return ("Here are the definitions I found in this chapter:\n\n```json\n"
+            + json.dumps(payload, ensure_ascii=False, indent=2)
+            + "\n```\n\nNotes: page numbers follow the running headers [p. N].")
+
+
+# ── Benchmarks ───────────────────────────────────────────────────────────────
+
+def timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return times
+
+
+def bench_crossrefs(corpus, workdir, repeat):
+    from hobbes.crossrefs import add_cross_refs
+    rows = [dict(e) for e in corpus]
+    return timed(lambda: add_cross_refs(rows), repeat)
+
+
+def bench_crossrefs_stem(corpus, workdir, repeat):
+    """add_cross_refs with match="stem": one automaton pass per definition, so no cap."""
+    from hobbes.crossrefs import add_cross_refs
+    rows = [dict(e) for e in corpus]
+    return timed(lambda: add_cross_refs(rows, match="stem"), repeat)
+
+
+def bench_csv(corpus, workdir, repeat):
+    from hobbes.store import load_entries, write_entries
+    path = os.path.join(workdir, "bench.csv")
+    write_times = timed(lambda: write_entries(path, corpus), repeat)
+    load_times = timed(lambda: load_entries(path), repeat)
+    return {"csv_write": write_times, "csv_load": load_times}
+
+
+def bench_extract_json_array(corpus, workdir, repeat):
+    from hobbes.model_output import extract_json_array
+    text = synth_transcript(corpus)
+    return timed(lambda: extract_json_array(text), repeat)
+
+
+def bench_make_slug(corpus, workdir, repeat):
+    """make_slug one name at a time against all four keys in one normalise_terms pass."""
+    from hobbes.store import make_slug, normalise_terms, term_names
+    names = term_names(corpus)
+    return {"make_slug": timed(lambda: [make_slug(t) for t in names], repeat),
+            "normalise_terms": timed(lambda: normalise_terms(names), repeat)}
+
+
+def bench_build(corpus, workdir, repeat):
+    from hobbes import build_site
+    from hobbes.store import write_entries
+    csv_path = os.path.join(workdir, "build.csv")
+    write_entries(csv_path, corpus)
+    out_path = os.path.join(workdir, "index.html")
+    return timed(lambda: build_site.build(csv_path, out_path), repeat)
+
+
+def bench_client(corpus, workdir, repeat):
+    """Run the generated page script under node; returns {} if node is missing."""
+    node = shutil.which("node")
+    if not node:
+        print("    node not found; skipping client benchmarks")
+        return {}
+    from hobbes import build_site
+    from hobbes.store import write_entries
+    csv_path = os.path.join(workdir, "client.csv")
+    write_entries(csv_path, corpus)
+    out_path = os.path.join(workdir, "index.html")
+    build_site.build(csv_path, out_path)
+
+    samples = {}
+    for _ in range(repeat):
+        proc = subprocess.run([node, os.path.join(HERE, "bench_client.js"), out_path],
+                              capture_output=True, text=True, check=True)
+        for key, value in json.loads(proc.stdout).items():
+            samples.setdefault(f"client_{key}", []).append(value)
+    return samples
+
+
+def bench_related(corpus, workdir, repeat):
+    """Related-terms build (TF-IDF, LSA, ANN) over a topical corpus of the same size."""
+    from hobbes.related import build_related
+    rows = synth_topical_corpus(len(corpus))
+    return timed(lambda: build_related(rows), repeat)
+
+
+def bench_concordance(corpus, workdir, repeat):
+    """Concordance build over the definitions laid out as pages, and a page of KWIC lookups."""
+    from hobbes.concordance import Concordance, build_concordance
+    from hobbes.corpus import write_json
+    texts = [e["definition"] for e in corpus]
+    pages = [" ".join(texts[i:i + 8]) for i in range(0, len(texts), 8)]
+    cache = os.path.join(workdir, "pages.json")
+    write_json(cache, {"sha1": "", "pages": pages})
+    sources = [{"key": "synth", "pages": pages, "headers": list(range(1, len(pages) + 1)),
+                "chapters": [["I", 1, len(pages)]], "cache": cache, "sha1": ""}]
+    names = [e["term"] for e in corpus]
+    built = []
+    build_times = timed(lambda: built.append(build_concordance(sources, names)), repeat)
+    conc = Concordance(built[-1], ["\n".join(pages)])
+    slugs = conc.index["slugs"][::max(1, len(conc.index["slugs"]) // 200)]
+    lookup_times = [t / len(slugs) for t in timed(lambda: [conc.lookup(s, 2) for s in slugs], repeat)]
+    return {"concordance_build": build_times, "concordance_lookup": lookup_times}
+
+
+BENCHMARKS = {
+    "crossrefs":          bench_crossrefs,
+    "crossrefs_stem":     bench_crossrefs_stem,
+    "csv":                bench_csv,
+    "extract_json_array": bench_extract_json_array,
+    "make_slug":          bench_make_slug,
+    "build":              bench_build,
+    "client":             bench_client,
+    "related":            bench_related,
+    "concordance":        bench_concordance,
+}
+
+
+def git_rev():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                              capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def run(args):
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    sizes = args.sizes.split(",") if args.sizes else DEFAULT_SIZES
+    results = {}
+    workdir = tempfile.mkdtemp(prefix="hobbes-bench-")
+    try:
+        for label in sizes:
+            n = parse_size(label)
+            print(f"Generating {n:,}-entry corpus...")
+            corpus = synth_corpus(n)
+            for name in names:
+                cap = CAPS.get(name)
+                if cap and n > cap and not args.no_caps:
+                    print(f"  {name}@{label}: skipped (cap {cap:,}; --no-caps to force)")
+                    continue
+                out = BENCHMARKS[name](corpus, workdir, args.repeat)
+                if isinstance(out, list):
+                    out = {name: out}
+                for key, times in out.items():
+                    med = statistics.median(times)
+                    results[f"{key}@{label}"] = {
+                        "n": n,
+                        "median_s": med,
+                        "min_s": min(times),
+                        "repeat": len(times),
+                    }
+                    print(f"  {key + '@' + label:<32} median {med * 1000:10.2f} ms   min {min(times) * 1000:10.2f} ms")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    doc = {
+        "meta": {
+            "date":     datetime.datetime.now().isoformat(timespec="seconds"),
+            "git":      git_rev(),
+            "python":   platform.python_version(),
+            "platform": platform.platform(),
+            "cpus":     os.cpu_count(),
+        },
+        "results": results,
+    }
+    out_path = args.out or os.path.join(BASELINE_DIR, f"run-{datetime.date.today()}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(doc, f, indent=2)
+    print(f"Results written to {out_path}")
+
+
+def compare(args):
+    with open(args.baseline, encoding="utf-8") as f:
+        base = json.load(f)["results"]
+    with open(args.current, encoding="utf-8") as f:
+        cur = json.load(f)["results"]
+
+    regressions = 0
+    print(f"{'benchmark':<32} {'baseline ms':>12} {'current ms':>12} {'ratio':>7}")
+    print("-" * 66)
+    for key in sorted(set(base) & set(cur)):
+        b, c = base[key]["median_s"], cur[key]["median_s"]
+        ratio = c / b if b else float("inf")
+        flag = ""
+        if ratio > 1 + args.threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif ratio < 1 - args.threshold:
+            flag = "  faster"
+        print(f"{key:<32} {b * 1000:>12.2f} {c * 1000:>12.2f} {ratio:>6.2f}x{flag}")
+    for key in sorted(set(base) ^ set(cur)):
+        print(f"{key:<32} only in {'baseline' if key in base else 'current'}")
+
+    if regressions:
+        print(f"\n{regressions} regression(s) beyond {args.threshold:.0%}")
+        sys.exit(1)
+    print(f"\nNo regressions beyond {args.threshold:.0%}")
+
+
+def scaling(args):
+    """Time parallel cross-refs at 1..N workers and check they match the serial result."""
+    from hobbes.crossrefs import compute_cross_refs
+    n = parse_size(args.size)
+    if args.workers:
+        counts = [int(w) for w in args.workers.split(",")]
+    else:
+        counts = [1]
+        while counts[-1] * 2 <= (os.cpu_count() or 1):
+            counts.append(counts[-1] * 2)
+    print(f"Generating {n:,}-entry corpus...")
+    corpus = synth_corpus(n)
+
+    serial = compute_cross_refs(corpus, workers=1)
+    print(f"{'workers':>8} {'median s':>10} {'speedup':>8} {'identical':>10}")
+    base = None
+    results = {}
+    for w in counts:
+        out = []
+        times = timed(lambda: out.append(compute_cross_refs(corpus, workers=w)), args.repeat)
+        med = statistics.median(times)
+        base = base or med
+        same = all(o == serial for o in out)
+        print(f"{w:>8} {med:>10.3f} {base / med:>7.2f}x {str(same):>10}")
+        results[f"crossrefs_w{w}@{args.size}"] = {"n": n, "median_s": med, "min_s": min(times),
+                                                  "repeat": len(times), "identical": same}
+        if not same:
+            sys.exit(f"Parallel result with {w} workers differs from the serial path")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"meta": {"cpus": os.cpu_count(), "git": git_rev()}, "results": results}, f, indent=2)
+
+
+# Cold import cost allowed per command, in ms over a bare interpreter.  These
+# leave headroom for a slow laptop; a heavy module at top level blows them.
+IMPORT_BUDGET_MS = {
+    "merge": 40.0,
+    "build": 60.0,
+    "crossref": 40.0,
+}
+HEAVY_MODULES = ("anthropic", "fitz", "numpy", "pyarrow", "asyncio", "multiprocessing")
+
+
+def import_profile(code):
+    """{module: (self_us, cumulative_us)} for modules `code` imports beyond interpreter start-up."""
+    def run(src):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", src], cwd=HERE,
+                              capture_output=True, text=True, check=True)
+        out = {}
+        for line in proc.stderr.splitlines():
+            if not line.startswith("import time:") or "self [us]" in line:
+                continue
+            self_us, cum_us, name = line[len("import time:"):].split("|")
+            out[name.strip()] = (int(self_us), int(cum_us))
+        return out
+
+    baseline = run("pass")
+    return {m: t for m, t in run(code).items() if m not in baseline}
+
+
+def importtime(args):
+    """Check each budgeted command's cold import cost against IMPORT_BUDGET_MS."""
+    over = 0
+    print(f"{'command':<10} {'import ms':>10} {'budget':>8}  largest imports")
+    for command, budget in IMPORT_BUDGET_MS.items():
+        target = "'merge', 'intro'" if command == "merge" else repr(command)
+        code = f"from hobbes import cli; cli.load({target})"
+        best = None
+        for _ in range(args.runs):
+            prof = import_profile(code)
+            total = sum(s for s, _ in prof.values()) / 1000
+            if best is None or total < best[0]:
+                best = (total, prof)
+        total, prof = best
+        heavy = sorted({m.split(".")[0] for m in prof} & set(HEAVY_MODULES))
+        largest = sorted(prof.items(), key=lambda kv: -kv[1][0])[:4]
+        status = "ok" if total <= budget and not heavy else "OVER"
+        over += status != "ok"
+        print(f"{command:<10} {total:>10.1f} {budget:>8.0f}  "
+              + ", ".join(f"{m} {s / 1000:.1f}" for m, (s, _) in largest) + f"  [{status}]")
+        if heavy:
+            print(f"{'':<10} heavy modules imported: {', '.join(heavy)}")
+    if over:
+        sys.exit(f"\n{over} command(s) over their import budget")
+
+
+# Names the real dictionary lacks but the rules must agree on: accents, long s
+# and ligatures, underscores, stray punctuation, and the whitespace Python and
+# JS regexes classify differently.
+NORMCHECK_EXTRA = [
+    "Æquity", "Cœlum", "ſoveraign Power", "Dominion (Paternall)", "Law, Civil",
+    "  -Right-  of  Nature- ", "self_love", "Ça va", "naïveté", "Ὀδός", "ΟΔΟΣ",
+    "İstanbul", "ﬁnal", "x\x1cy", "x\x85y", "\ufeffword", "a\u2028b", "a\u00a0b",
+    "½ measure", "Ⅻ Tables", "--", "", "A — B", "quo\u0301te", "e\u20dd",
+]
+
+NORMCHECK_JS = r"""
+const fs = require('fs');
+const names = JSON.parse(fs.readFileSync(0, 'utf8'));
+console.log(JSON.stringify(names.map(n => [makeSlug(n), foldKey(n)])));
+"""
+
+
+def normcheck(args):
+    """Compare the page script's makeSlug/foldKey with store.normalise_terms."""
+    from hobbes.build_site import HTML
+    from hobbes.store import load_entries, make_slug, normalise_terms, term_names
+
+    node = shutil.which("node")
+    if not node:
+        sys.exit("node not found")
+    funcs = [re.search(rf"^function {name}\(.*?^}}", HTML, re.M | re.S).group(0)
+             for name in ("makeSlug", "foldKey")]
+    names = term_names(load_entries(args.csv)) + NORMCHECK_EXTRA
+    names = [n.replace("\n", " ") for n in dict.fromkeys(names)]
+    proc = subprocess.run([node, "-e", "\n".join(funcs) + NORMCHECK_JS], input=json.dumps(names),
+                          capture_output=True, text=True, check=True)
+    keys = normalise_terms(names)
+
+    bad = 0
+    for name, (slug, folded) in zip(names, json.loads(proc.stdout)):
+        k = keys[name]
+        for what, py, other in (("slug", k.slug, slug), ("folded", k.folded, folded),
+                                ("make_slug", k.slug, make_slug(name))):
+            if py != other:
+                bad += 1
+                print(f"  {what:<10} {name!r}: python {py!r}, other {other!r}")
+    print(f"{len(names)} names, {bad} mismatches")
+    if bad:
+        sys.exit(1)
+
+
+MEMORY_MODES = ("dicts", "entries")
+
+# Shared start of the child scripts: mark(phase, t0) records peak RSS so far.
+RSS_PRELUDE = r"""
+import json, resource, sys, time
+scale = 1 if sys.platform == "darwin" else 1024     # ru_maxrss is bytes on macOS, KiB on Linux
+phases = {}
+
+def mark(name, t0):
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    phases[name] = {"peak_rss_mb": round(peak / 2**20, 1), "seconds": round(time.perf_counter() - t0, 3)}
+
+mark("start", time.perf_counter())
+"""
+
+MEMORY_CHILD = RSS_PRELUDE + r"""
+import csv, hashlib
+from hobbes.crossrefs import add_cross_refs
+from hobbes.store import load_entries, write_entries
+
+mode, src, out = sys.argv[1:]
+t0 = time.perf_counter()
+if mode == "dicts":
+    with open(src, encoding="utf-8") as f:
+        rows = [dict(row) for row in csv.DictReader(f)]
+else:
+    rows = load_entries(src)
+mark("load", t0)
+
+t0 = time.perf_counter()
+rows = add_cross_refs(rows, match="stem")
+mark("crossrefs", t0)
+
+t0 = time.perf_counter()
+write_entries(out, rows)
+mark("write", t0)
+with open(out, "rb") as f:
+    digest = hashlib.file_digest(f, "sha1").hexdigest() if hasattr(hashlib, "file_digest") else \
+        hashlib.sha1(f.read()).hexdigest()
+print(json.dumps({"rows": len(rows), "phases": phases, "sha1": digest}))
+"""
+
+
+BUILD_CHILD = RSS_PRELUDE + r"""
+import os
+from hobbes import build_site
+from hobbes.store import load_entries
+
+src, out = sys.argv[1:]
+t0 = time.perf_counter()
+load_entries(src)
+mark("load", t0)
+t0 = time.perf_counter()
+build_site.build(src, out)
+mark("build", t0)
+print(json.dumps({"phases": phases, "page_mb": round(os.path.getsize(out) / 2**20, 1)}))
+"""
+
+
+def run_child(code, *argv):
+    proc = subprocess.run([sys.executable, "-c", code, *argv], cwd=HERE, capture_output=True, text=True)
+    if proc.returncode:
+        sys.exit(f"{' '.join(argv)} failed:\n{proc.stderr}")
+    return json.loads(proc.stdout.splitlines()[-1])
+
+
+def write_synth(n, path):
+    # In its own process: Linux carries a parent's peak RSS over to its children.
+    subprocess.run([sys.executable, os.path.abspath(__file__), "synth", str(n), path],
+                   cwd=HERE, check=True, stdout=subprocess.DEVNULL)
+
+
+def memory(args):
+    """Peak RSS of loading, cross-referencing and writing n rows, old row dicts vs store.Entries."""
+    n = parse_size(args.size)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "synth.csv")
+        print(f"Generating {n:,}-entry corpus...")
+        write_synth(n, src)
+        print(f"  {os.path.getsize(src) / 2**20:,.0f} MB CSV")
+
+        print(f"{'mode':<8} " + " ".join(f"{p + ' MB':>14}" for p in ("start", "load", "crossrefs", "write"))
+              + f" {'seconds':>8}")
+        digests = {}
+        for mode in MEMORY_MODES:
+            out = run_child(MEMORY_CHILD, mode, src, os.path.join(tmp, f"{mode}.csv"))
+            phases = out["phases"]
+            digests[mode] = out["sha1"]
+            print(f"{mode:<8} " + " ".join(f"{ph['peak_rss_mb']:>14,.1f}" for ph in phases.values())
+                  + f" {sum(ph['seconds'] for ph in phases.values()):>8.1f}")
+            for name, ph in phases.items():
+                results[f"memory_{mode}_{name}@{args.size}"] = {"n": n, **ph}
+
+    base, compact = (results[f"memory_{m}_write@{args.size}"]["peak_rss_mb"] for m in MEMORY_MODES)
+    same = len(set(digests.values())) == 1
+    print(f"Peak RSS {compact / base:.0%} of the row dicts'; output identical: {same}")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"meta": {"python": platform.python_version(), "git": git_rev()},
+                       "results": results}, f, indent=2)
+    if not same:
+        sys.exit("The two modes wrote different CSVs")
+
+
+def buildmem(args):
+    """Peak RSS of a site build by corpus size, beyond what loading the rows takes."""
+    sizes = args.sizes.split(",")
+    results = {}
+    print(f"{'size':>6} {'page MB':>9} {'load MB':>9} {'build MB':>9} {'build - load':>13} {'seconds':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for label in sizes:
+            n = parse_size(label)
+            d = os.path.join(tmp, label)
+            os.makedirs(d)
+            src, out = os.path.join(d, "hobbes_dictionary.csv"), os.path.join(d, "index.html")
+            write_synth(n, src)
+            run_child(BUILD_CHILD, src, out)         # computes and caches related terms
+            r = run_child(BUILD_CHILD, src, out)
+            load, build = r["phases"]["load"], r["phases"]["build"]
+            extra = build["peak_rss_mb"] - load["peak_rss_mb"]
+            print(f"{label:>6} {r['page_mb']:>9,.1f} {load['peak_rss_mb']:>9,.1f} {build['peak_rss_mb']:>9,.1f} "
+                  f"{extra:>13,.1f} {build['seconds']:>8.1f}")
+            results[f"buildmem@{label}"] = {"n": n, "page_mb": r["page_mb"], "load_peak_rss_mb": load["peak_rss_mb"],
+                                            "peak_rss_mb": build["peak_rss_mb"], "median_s": build["seconds"]}
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"meta": {"python": platform.python_version(), "git": git_rev()},
+                       "results": results}, f, indent=2)
+
+
+def crossmatch(args):
+    """Exact against stem cross-ref matching: time, refs found, and links only stem makes."""
+    from hobbes.crossrefs import compute_cross_refs
+    from hobbes.store import load_entries, split_refs
+
+    corpora = [("csv", load_entries(args.csv))]
+    corpora += [(label, synth_corpus(parse_size(label))) for label in args.sizes.split(",") if label]
+    print(f"{'corpus':>8} {'rows':>8} {'exact s':>9} {'stem s':>9} {'exact refs':>11} {'stem refs':>10} {'missed':>7}")
+    for label, rows in corpora:
+        found = {}
+        times = {}
+        for match in ("exact", "stem"):
+            if match == "exact" and len(rows) > CAPS["crossrefs"] and not args.no_caps:
+                continue
+            out = []
+            times[match] = statistics.median(
+                timed(lambda: out.append(compute_cross_refs(rows, match=match)), args.repeat))
+            found[match] = [set(split_refs(r)) for r in out[-1]]
+        total = {m: sum(len(f) for f in refs) for m, refs in found.items()}
+        missed = (sum(len(a - b) for a, b in zip(found["exact"], found["stem"]))
+                  if "exact" in found else None)
+        cell = lambda d, m, fmt: format(d[m], fmt) if m in d else "skipped"
+        print(f"{label:>8} {len(rows):>8,} {cell(times, 'exact', '.3f'):>9} {times['stem']:>9.3f} "
+              f"{cell(total, 'exact', ','):>11} {total['stem']:>10,} "
+              f"{'-' if missed is None else missed:>7}")
+        if label == "csv" and args.examples:
+            shown = 0
+            for e, a, b in zip(rows, found["exact"], found["stem"]):
+                if b - a and shown < args.examples:
+                    print(f"    {e['term']}: + {'; '.join(sorted(b - a))}")
+                    shown += 1
+        if missed:
+            sys.exit(f"The stem matcher missed {missed} exact refs on {label}")
+
+
+def synth(args):
+    from hobbes.store import write_entries
+    corpus = synth_corpus(parse_size(args.size), seed=args.seed)
+    write_entries(args.out, corpus)
+    print(f"Wrote {len(corpus):,} synthetic entries to {args.out}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("run", help="run benchmarks and write a results file")
+    p.add_argument("--sizes", help=f"comma-separated sizes ({', '.join(SIZES)} or a number)")
+    p.add_argument("--only", help=f"comma-separated benchmarks ({', '.join(BENCHMARKS)})")
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--out", help="results file (default bench_baselines/run-DATE.json)")
+    p.add_argument("--no-caps", action="store_true", help="ignore per-benchmark size caps")
+    p.set_defaults(func=run)
+
+    p = sub.add_parser("compare", help="flag regressions against a baseline")
+    p.add_argument("baseline")
+    p.add_argument("current")
+    p.add_argument("--threshold", type=float, default=0.15,
+                   help="allowed slowdown as a fraction (default 0.15)")
+    p.set_defaults(func=compare)
+
+    p = sub.add_parser("scaling", help="parallel cross-ref scaling from 1 to N workers")
+    p.add_argument("--size", default="20k")
+    p.add_argument("--workers", help="comma-separated worker counts, first is the speedup base (default 1,2,4..cpus)")
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--out", help="optional JSON results file, comparable with 'compare'")
+    p.set_defaults(func=scaling)
+
+    p = sub.add_parser("synth", help="write a synthetic corpus CSV")
+    p.add_argument("size")
+    p.add_argument("out")
+    p.add_argument("--seed", type=int, default=0)
+    p.set_defaults(func=synth)
+
+    p = sub.add_parser("importtime", help="check CLI commands' cold import cost against budgets")
+    p.add_argument("--runs", type=int, default=5, help="take the fastest of this many runs")
+    p.set_defaults(func=importtime)
+
+    p = sub.add_parser("normcheck", help="check the page's slugs and folded keys match Python's")
+    p.add_argument("--csv", default=os.path.join(HERE, "hobbes_dictionary.csv"))
+    p.set_defaults(func=normcheck)
+
+    p = sub.add_parser("buildmem", help="peak RSS of a site build at several corpus sizes")
+    p.add_argument("--sizes", default="10k,30k,100k", help="comma-separated sizes")
+    p.add_argument("--out", help="optional JSON results file")
+    p.set_defaults(func=buildmem)
+
+    p = sub.add_parser("crossmatch", help="exact against inflection-aware cross-ref matching")
+    p.add_argument("--csv", default=os.path.join(HERE, "hobbes_dictionary.csv"))
+    p.add_argument("--sizes", default="1k,10k", help="comma-separated synthetic sizes ('' for none)")
+    p.add_argument("--examples", type=int, default=10, help="links only stem finds to print")
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--no-caps", action="store_true", help="time the exact matcher above its cap too")
+    p.set_defaults(func=crossmatch)
+
+    p = sub.add_parser("memory", help="peak RSS of the row containers on a large corpus")
+    p.add_argument("--size", default="1m")
+    p.add_argument("--out", help="optional JSON results file")
+    p.set_defaults(func=memory)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+"""
+Hobbes Dictionary toolchain.
+
+Run everything through one entry point, `python -m hobbes COMMAND`; see
+cli.py.  Importing the package imports nothing else, so each command pays only
+for the modules it uses.
+"""
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Alignment of definition quotes to the pages of the source PDFs.
+
+    python -m hobbes align [--work ID]
+
+page_number in the CSV is whatever the model read off a running header.  This
+finds each definition in the extracted page text and records where it actually
+is, written next to the CSV as hobbes_align.json, one slot per CSV row (null
+where no match was good enough):
+
+    source      the chapter map's key for the PDF ("on_man", ...)
+    page        1-indexed PDF page the quote starts on
+    header      that page's running-header number, what the site shows as p. N
+    start       character offset of the quote's first word in that page's text
+    end_page    PDF page of its last word (a quote can run over a page break)
+    end         offset just past its last word, in end_page's text
+    score       fraction of the quote's word trigrams found in order
+
+Each PDF's pages are tokenised into one word stream, remembering every word's
+page and offsets.  Words are compared by store.spelling_key: folded
+(store.fold_key), with a word broken by a line-end hyphen rejoined, and
+early-modern variants levelled (u/v, i/j/y, doubled letters, final -e, -que
+for -c), so "Soveraigne" and "sovereign", or "publique" and "public", meet.  An index maps every
+trigram of keys to its positions.  A quote is located by voting: each of its
+trigrams votes for the diagonals (stream position minus quote position) it
+occurs on; the best diagonal, allowing DRIFT words of slack for dropped or
+inserted words, gives the span.  The chapter's own pages are searched first,
+then the whole PDF.  Trigrams more common than MAX_POSTINGS are ignored in the
+whole-PDF search.
+
+The file records digests of the rows (chapters and definitions) and of the
+page text it was computed from, so build_site can tell when it no longer
+matches the CSV and leave the page links out rather than point at the wrong
+page.
+Aligning the whole dictionary takes well under a second once the page text is
+cached, so extract and every merge rerun it after writing the CSV.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from collections import Counter
+
+from . import instrument
+from .corpus import Corpus, header_page_numbers, resolve_pages
+from .instrument import stage
+from .store import CHAPTER_RE, TOKEN_RE, Keys, load_entries
+
+ALIGN_FILE = "hobbes_align.json"
+FIELDS = ("source", "page", "header", "start", "end_page", "end", "score")
+
+
+N = 3
+DRIFT = 4
+MIN_SCORE = 0.3
+MAX_POSTINGS = 200
+PAGE_SLACK = 1
+
+
+def tokens(text):
+    """[(raw token, start, end)] for the words of text."""
+    return [(m.group(0), m.start(), m.end()) for m in TOKEN_RE.finditer(text)]
+
+
+class PageIndex:
+    """One PDF's words in reading order, with their places and a trigram index."""
+
+    def __init__(self, pages, keys):
+        with stage("align.index", pages=len(pages)) as rec:
+            self.page, self.start, self.end, words = [], [], [], []
+            self.page_first = []
+            for p, text in enumerate(pages):
+                self.page_first.append(len(words))
+                for w, s, e in tokens(text):
+                    words.append(w)
+                    self.page.append(p)
+                    self.start.append(s)
+                    self.end.append(e)
+            self.page_first.append(len(words))
+            self.keys = keys.lookup(words)
+            self.grams = {}
+            for i in range(len(self.keys) - N + 1):
+                self.grams.setdefault(tuple(self.keys[i:i + N]), []).append(i)
+            rec["words"] = len(words)
+            rec["grams"] = len(self.grams)
+
+    def locate(self, qkeys, lo=0, hi=None):
+        """(first, last, score) word positions of qkeys within [lo, hi), or None."""
+        hi = len(self.keys) if hi is None else hi
+        if len(qkeys) < N:
+            return self.locate_short(qkeys, lo, hi)
+        capped = lo == 0 and hi == len(self.keys)
+        qgrams = [tuple(qkeys[i:i + N]) for i in range(len(qkeys) - N + 1)]
+        hits = []
+        for qi, g in enumerate(qgrams):
+            positions = self.grams.get(g, ())
+            if capped and len(positions) > MAX_POSTINGS:
+                continue
+            hits.extend((p - qi, qi, p) for p in positions if lo <= p < hi)
+        if not hits:
+            return None
+
+        diagonals = Counter(d for d, _, _ in hits)
+        best = max(diagonals, key=lambda d: (sum(diagonals.get(d + k, 0) for k in range(-DRIFT, DRIFT + 1)), -d))
+        near = [(qi, p) for d, qi, p in hits if abs(d - best) <= DRIFT]
+        score = len({qi for qi, _ in near}) / len(qgrams)
+        if score < MIN_SCORE:
+            return None
+        return min(p for _, p in near), max(p for _, p in near) + N - 1, score
+
+    def locate_short(self, qkeys, lo, hi):
+        if not qkeys:
+            return None
+        n = len(qkeys)
+        for i in range(lo, min(hi, len(self.keys)) - n + 1):
+            if self.keys[i:i + n] == qkeys:
+                return i, i + n - 1, 1.0
+        return None
+
+    def span(self, first_page, last_page):
+        """[lo, hi) word positions of 1-indexed pages first..last, clamped."""
+        lo = max(first_page - 1, 0)
+        hi = min(last_page, len(self.page_first) - 1)
+        return self.page_first[lo], self.page_first[max(lo, hi)]
+
+
+def rows_digest(entries):
+    """Fingerprint of the rows an alignment was computed for."""
+    h = hashlib.sha1(f"{N},{DRIFT},{MIN_SCORE},{MAX_POSTINGS}".encode())
+    for e in entries:
+        h.update(e["chapter"].encode("utf-8"))
+        h.update(b"\0")
+        h.update(e["definition"].encode("utf-8"))
+        h.update(b"\n")
+    return h.hexdigest()
+
+
+def pages_digest(page_texts):
+    """Fingerprint of the page text ({source: pages}) an alignment was computed against."""
+    h = hashlib.sha1()
+    for source in sorted(page_texts):
+        h.update(source.encode("utf-8"))
+        for page in page_texts[source] or ():
+            h.update(page.encode("utf-8"))
+            h.update(b"\f")
+    return h.hexdigest()
+
+
+def work_page_texts(work, chapters):
+    """{source key: page texts or None} for every source the chapter map uses."""
+    texts = {}
+    for ch in chapters:
+        if ch["source"] not in texts:
+            try:
+                texts[ch["source"]] = work.page_texts(ch["pdf"])
+            except FileNotFoundError:
+                texts[ch["source"]] = None
+    return texts
+
+
+def align_rows(work, entries):
+    """Alignment dict (JSON-ready, columnar as in the module docstring) for a work's rows."""
+    chapters = {ch["num"]: ch for ch in work.chapters()}
+    texts = work_page_texts(work, chapters.values())
+    # PDF paths relative to the alignment file, so the site can link to them.
+    out = {"rows_digest": rows_digest(entries), "pages_digest": pages_digest(texts),
+           "sources": {ch["source"]: os.path.relpath(ch["pdf"], os.path.dirname(work.align_path))
+                       for ch in chapters.values()}}
+    columns = {f: [] for f in FIELDS}
+
+    with stage("align", rows=len(entries)) as rec:
+        keys = Keys()
+        indexes, headers, spans = {}, {}, {}
+        found = 0
+        for e in entries:
+            m = CHAPTER_RE.match(e["chapter"])
+            ch = chapters.get(m.group(1)) if m else None
+            pages = texts.get(ch["source"]) if ch else None
+            hit = None
+            if pages is not None:
+                src = ch["source"]
+                if src not in indexes:
+                    indexes[src] = PageIndex(pages, keys)
+                    headers[src] = header_page_numbers(pages)
+                index = indexes[src]
+                if ch["num"] not in spans:
+                    first, last = resolve_pages(ch, headers[src])
+                    spans[ch["num"]] = index.span(first - PAGE_SLACK, last + PAGE_SLACK)
+                qkeys = keys.lookup([w for w, _, _ in tokens(e["definition"])])
+                hit = index.locate(qkeys, *spans[ch["num"]]) or index.locate(qkeys)
+            if hit is None:
+                for f in FIELDS:
+                    columns[f].append(None)
+                continue
+            first, last, score = hit
+            found += 1
+            page = index.page[first]
+            for f, v in zip(FIELDS, (src, page + 1, headers[src][page], index.start[first],
+                                     index.page[last] + 1, index.end[last], round(score, 3))):
+                columns[f].append(v)
+        rec["aligned"] = found
+    out.update(columns)
+    return out
+
+
+def write_alignment(alignment, path):
+    with stage("align.write", path=path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(alignment, f, ensure_ascii=False, separators=(",", ":"))
+
+
+def load_alignment(path, entries=None, page_texts=None):
+    """
+    Read an alignment file.  Return None if it is missing, or was computed
+    for rows other than entries or against page text other than page_texts
+    ({source: pages}), when those are given.
+    """
+    try:
+        with stage("align.read", path=path):
+            with open(path, encoding="utf-8") as f:
+                alignment = json.load(f)
+    except FileNotFoundError:
+        return None
+    if entries is not None and alignment.get("rows_digest") != rows_digest(entries):
+        return None
+    if page_texts is not None and alignment.get("pages_digest") != pages_digest(page_texts):
+        return None
+    return alignment
+
+
+def realign(work, entries):
+    """Align a work's freshly written rows and save the result; used after every merge."""
+    alignment = align_rows(work, entries)
+    write_alignment(alignment, work.align_path)
+    found = sum(p is not None for p in alignment["page"])
+    print(f"Aligned {found} of {len(entries)} definitions to their PDF pages")
+    return alignment
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Locate every definition in the source PDFs' text")
+    parser.add_argument("--work", default=None, help="work id in corpus.json (default leviathan)")
+    args = parser.parse_args(argv)
+
+    work = Corpus().work(args.work)
+    instrument.start_run("align", instrument.trace_path(work.entries_path))
+    entries = load_entries(work.entries_path)
+    alignment = realign(work, entries)
+    moved = sum(1 for e, h in zip(entries, alignment["header"])
+                if h is not None and e["page_number"] != str(h))
+    if moved:
+        print(f"  {moved} rows' page_number differs from the page their quote is on")
+    instrument.summary()
+
+
+if __name__ == "__main__":
+    main()
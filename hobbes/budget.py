@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Token and dollar budgets for extraction runs.
+
+Before anything is sent, every chapter gets a plan:
+
+    input_tokens   prompt size, estimated from its characters (CHARS_PER_TOKEN)
+    definitions    expected definitions: the chapter's rows in the existing CSV
+                   when there are any, else a count of the defining formulas
+                   and ALL CAPS terms Hobbes uses (SIGNAL_RE)
+    max_tokens     room for that many definitions at OUTPUT_TOKENS_PER_DEF,
+                   with HEADROOM, between MAX_TOKENS_FLOOR and MAX_TOKENS_CAP
+    worst_usd      cost if the reply used all of max_tokens
+
+`schedule` orders the plans: chapters named with --priority first, in the
+order given, then the rest cheapest first, which completes the most chapters
+a budget can pay for.  `Budget` holds the run's limits (total tokens, dollars,
+either or both).  A chapter is only started if its worst case fits in what is
+left after actual spending and the worst cases of chapters in flight.  Each
+model response is charged as it arrives and comes out of its chapter's
+reservation while any is left; what is left is released when the chapter
+finishes.  Every call, retries included, must first be `cover`ed: the
+chapter's reservation is topped up to that call's worst case (a reply cut off
+at max_tokens is retried with twice the room), and if the budget cannot
+cover it the chapter raises OverBudget before sending anything and is
+deferred.  `run_scheduled` drives a thread pool under those rules: when
+nothing else fits it stops starting chapters, lets the ones in flight finish,
+and returns the rest as deferred, so their checkpoints are simply missing
+next time.
+"""
+
+import math
+import re
+import threading
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from .instrument import estimate_cost, stage
+
+CHARS_PER_TOKEN = 3.5
+OUTPUT_TOKENS_PER_DEF = 110
+HEADROOM = 1.5
+MAX_TOKENS_FLOOR = 2048
+MAX_TOKENS_CAP = 32000
+MIN_DEFINITIONS = 3
+
+# Formulas Hobbes defines with, and terms set in capitals at first use.
+SIGNAL_RE = re.compile(
+    r"\b(?:is|are) (?:called|named|nothing (?:else )?but|properly)\b"
+    r"|\b(?:I|we|which we|men) (?:call|mean|understand)\b"
+    r"|\bsignifi(?:eth|es)\b"
+    r"|\b[A-Z]{4,}(?:[ -][A-Z]{3,})*\b"
+)
+
+
+def estimate_tokens(text):
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def count_signals(text):
+    return len(SIGNAL_RE.findall(text))
+
+
+def estimate_definitions(text, prior=None):
+    """Expected definitions in a chapter's text; prior is its row count from the last run."""
+    return max(prior or 0, count_signals(text), MIN_DEFINITIONS)
+
+
+def choose_max_tokens(definitions):
+    tokens = math.ceil(definitions * OUTPUT_TOKENS_PER_DEF * HEADROOM)
+    return max(MAX_TOKENS_FLOOR, min(MAX_TOKENS_CAP, tokens))
+
+
+def plan_chapter(num, prompt, text, model, prior=None):
+    """Plan dict for one chapter (see the module docstring); prompt includes the system prompt."""
+    input_tokens = estimate_tokens(prompt)
+    definitions = estimate_definitions(text, prior)
+    max_tokens = choose_max_tokens(definitions)
+    return {"num": num, "model": model, "input_tokens": input_tokens,
+            "definitions": definitions, "max_tokens": max_tokens,
+            "worst_usd": estimate_cost(model, input_tokens, max_tokens)}
+
+
+def schedule(plans, priority=()):
+    """Plans in run order: priority chapters as listed, then cheapest first."""
+    rank = {num: i for i, num in enumerate(priority)}
+    return sorted(plans, key=lambda p: (rank.get(p["num"], len(rank)), p["worst_usd"],
+                                        p["input_tokens"]))
+
+
+class OverBudget(Exception):
+    """A chapter's next call does not fit in what is left of the budget."""
+
+
+class Budget:
+    """Run-level token and dollar limits; None means unlimited."""
+
+    def __init__(self, max_tokens=None, max_usd=None):
+        self.max_tokens = max_tokens
+        self.max_usd = max_usd
+        self.spent_tokens = 0
+        self.spent_usd = 0.0
+        self.reserved_tokens = 0
+        self.reserved_usd = 0.0
+        self._held = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, plan):
+        """Hold a plan's worst case if it fits in what is left; False if it does not."""
+        tokens = plan.get("worst_tokens") or plan["input_tokens"] + plan["max_tokens"]
+        with self._lock:
+            if self.max_tokens is not None and \
+                    self.spent_tokens + self.reserved_tokens + tokens > self.max_tokens:
+                return False
+            if self.max_usd is not None and \
+                    self.spent_usd + self.reserved_usd + plan["worst_usd"] > self.max_usd:
+                return False
+            self.reserved_tokens += tokens
+            self.reserved_usd += plan["worst_usd"]
+            self._held[plan["num"]] = [tokens, plan["worst_usd"]]
+            return True
+
+    def cover(self, num, tokens, usd):
+        """
+        Top chapter num's reservation up to one call's worst case, tokens and
+        usd, before the call is made; False, holding nothing more, if what is
+        left of the budget cannot cover it.
+        """
+        with self._lock:
+            held = self._held.setdefault(num, [0, 0.0])
+            more_tokens, more_usd = max(0, tokens - held[0]), max(0.0, usd - held[1])
+            if self.max_tokens is not None and \
+                    self.spent_tokens + self.reserved_tokens + more_tokens > self.max_tokens:
+                return False
+            if self.max_usd is not None and \
+                    self.spent_usd + self.reserved_usd + more_usd > self.max_usd:
+                return False
+            held[0] += more_tokens
+            held[1] += more_usd
+            self.reserved_tokens += more_tokens
+            self.reserved_usd += more_usd
+            return True
+
+    def release(self, plan):
+        with self._lock:
+            tokens, usd = self._held.pop(plan["num"], (0, 0.0))
+            self.reserved_tokens -= tokens
+            self.reserved_usd -= usd
+
+    def charge(self, input_tokens, output_tokens, cost_usd, num=None):
+        """Record one model response's actual usage, against chapter num's reservation."""
+        tokens = input_tokens + output_tokens
+        with self._lock:
+            self.spent_tokens += tokens
+            self.spent_usd += cost_usd
+            held = self._held.get(num)
+            if held is not None:
+                t, u = min(held[0], tokens), min(held[1], cost_usd)
+                held[0] -= t
+                held[1] -= u
+                self.reserved_tokens -= t
+                self.reserved_usd -= u
+
+    def describe(self):
+        limits = []
+        if self.max_tokens is not None:
+            limits.append(f"{self.spent_tokens:,}/{self.max_tokens:,} tokens")
+        if self.max_usd is not None:
+            limits.append(f"${self.spent_usd:.4f}/${self.max_usd:.2f}")
+        return ", ".join(limits) or f"{self.spent_tokens:,} tokens, ${self.spent_usd:.4f} (no limit)"
+
+
+def run_scheduled(pool, plans, fn, budget, concurrency):
+    """
+    Run fn(plan) on pool for plans in order, at most `concurrency` at a time and
+    only while each plan's worst case fits the budget.  Yields (plan, future)
+    as each finishes; returns the plans never started (StopIteration.value).
+    """
+    pending = list(plans)
+    running = {}
+    while pending or running:
+        while pending and len(running) < concurrency:
+            plan = next((p for p in pending if budget.reserve(p)), None)
+            if plan is None:
+                break
+            pending.remove(plan)
+            running[pool.submit(fn, plan)] = plan
+        if not running:
+            break
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for fut in done:
+            plan = running.pop(fut)
+            budget.release(plan)
+            yield plan, fut
+    if pending:
+        with stage("budget.deferred") as rec:
+            rec["chapters"] = len(pending)
+    return pending
@@ -0,0 +1,1245 @@
+#!/usr/bin/env python3
+"""
+Build the Hobbes Dictionary website from hobbes_dictionary.csv -> index.html
+
+The page carries its data as a JSON <script> block and a Web Worker that
+indexes and renders search results and pages.  It is streamed to disk one
+entry or index chunk at a time (iter_json), so no string the size of the
+data is ever built.
+"""
+
+import argparse, json, os
+from urllib.parse import quote
+
+from . import instrument
+from .graph import GRAPH_FILE, build_graph, load_graph, to_csr
+from .instrument import stage
+from .related import RELATED_FILE, build_related, load_related, write_related
+from .search_index import build_search_index
+from .store import load_entries, load_term_keys, normalise_terms, split_refs, term_names
+
+# Related terms shown per page, after dropping those already linked by name.
+PAGE_RELATED = 6
+
+# Characters gathered before each write while streaming the page.
+WRITE_CHUNK = 1 << 16
+# Lists and dicts longer than this are encoded a slice or an item at a time.
+SPLIT_ITEMS = 256
+
+
+HTML = r"""<!DOCTYPE html>
+<html lang="en">
+<head>
+  <meta charset="UTF-8">
+  <meta name="viewport" content="width=device-width, initial-scale=1.0">
+  <title>Hobbes Dictionary — Leviathan</title>
+  <style>
+    :root {
+      --parchment:    #faf8f3;
+      --parchment-dk: #f0ebe0;
+      --navy:         #1e2d4a;
+      --navy-lt:      #2a4068;
+      --brown:        #7a3e20;
+      --brown-lt:     #a05a38;
+      --text:         #2a1f1a;
+      --text-lt:      #5a4a40;
+      --border:       #d4c4a8;
+      --border-dk:    #b8a888;
+      --gold:         #c8a84a;
+    }
+    * { box-sizing: border-box; margin: 0; padding: 0; }
+    body {
+      font-family: Georgia, 'Times New Roman', serif;
+      background: var(--parchment);
+      color: var(--text);
+      min-height: 100vh;
+    }
+
+    /* ── Header ── */
+    header {
+      background: var(--navy);
+      color: white;
+      position: sticky; top: 0; z-index: 100;
+      box-shadow: 0 2px 8px rgba(0,0,0,.35);
+    }
+    .header-inner {
+      max-width: 960px; margin: 0 auto;
+      padding: 0 1.5rem;
+      display: flex; align-items: center; height: 54px; gap: 1rem;
+    }
+    .site-title {
+      font-size: 1rem; font-weight: normal;
+      letter-spacing: .06em; color: var(--gold);
+      white-space: nowrap; text-decoration: none; flex-shrink: 0;
+    }
+    .site-title:hover { color: #fff; }
+    .header-sep { color: #3a5070; flex-shrink: 0; }
+    .breadcrumb {
+      display: flex; align-items: center; gap: .4rem;
+      font-size: .8rem; color: #8899aa; flex-wrap: wrap; flex: 1;
+      overflow: hidden;
+    }
+    .breadcrumb a { color: #aabbcc; text-decoration: none; white-space: nowrap; }
+    .breadcrumb a:hover { color: #fff; text-decoration: underline; }
+    .breadcrumb .sep { color: #4a6080; }
+    .breadcrumb span { white-space: nowrap; overflow: hidden; text-overflow: ellipsis; }
+
+    /* ── Search ── */
+    .search-wrap {
+      position: relative; flex-shrink: 0;
+    }
+    .search-input {
+      background: rgba(255,255,255,.12);
+      border: 1px solid rgba(255,255,255,.2);
+      border-radius: 4px;
+      color: white; font-size: .82rem; font-family: inherit;
+      padding: .35rem .7rem .35rem 1.9rem;
+      width: 200px; outline: none;
+      transition: all .2s;
+    }
+    .search-input::placeholder { color: rgba(255,255,255,.4); }
+    .search-input:focus {
+      background: rgba(255,255,255,.18);
+      border-color: rgba(255,255,255,.4);
+      width: 240px;
+    }
+    .search-icon {
+      position: absolute; left: .55rem; top: 50%; transform: translateY(-50%);
+      color: rgba(255,255,255,.4); font-size: .8rem; pointer-events: none;
+    }
+    .search-dropdown {
+      display: none;
+      position: absolute; top: calc(100% + 4px); right: 0;
+      background: white; border: 1px solid var(--border-dk);
+      border-radius: 4px; box-shadow: 0 6px 20px rgba(0,0,0,.18);
+      min-width: 300px; max-width: 400px;
+      max-height: 360px; overflow-y: auto;
+      z-index: 200;
+    }
+    .search-dropdown.open { display: block; }
+    .search-result {
+      display: block; padding: .55rem .85rem;
+      text-decoration: none; border-bottom: 1px solid #eee;
+      cursor: pointer; transition: background .1s;
+    }
+    .search-result:last-child { border-bottom: none; }
+    .search-result:hover, .search-result.focused { background: var(--parchment-dk); }
+    .sr-term { font-size: .88rem; color: var(--navy); }
+    .sr-term mark { background: none; color: var(--brown); font-weight: bold; }
+    .sr-chapter { font-size: .72rem; color: var(--text-lt); font-style: italic; margin-top: .1rem; }
+    .search-no-results {
+      padding: .7rem .85rem; font-size: .82rem; color: var(--text-lt); font-style: italic;
+    }
+
+    /* ── Layout ── */
+    main { max-width: 960px; margin: 0 auto; padding: 2rem 1.5rem; }
+    .page { display: none; }
+    .page.active { display: block; }
+
+    /* ── Typography ── */
+    .page-title {
+      font-size: 1.75rem; color: var(--navy); font-weight: normal;
+      margin-bottom: .4rem;
+    }
+    .page-subtitle {
+      color: var(--text-lt); font-size: .9rem; font-style: italic;
+      margin-bottom: 2rem;
+    }
+    .back-btn {
+      display: inline-flex; align-items: center; gap: .35rem;
+      color: var(--text-lt); font-size: .82rem; text-decoration: none;
+      margin-bottom: 1.5rem; transition: color .15s;
+    }
+    .back-btn:hover { color: var(--navy); }
+
+    /* ── Book cards ── */
+    .book-grid {
+      display: grid;
+      grid-template-columns: repeat(auto-fill, minmax(200px, 1fr));
+      gap: 1rem; margin-top: 1rem;
+    }
+    .book-card {
+      background: white; border: 1px solid var(--border);
+      border-top: 4px solid var(--navy);
+      padding: 1.2rem; text-decoration: none; display: block;
+      transition: all .2s;
+    }
+    .book-card:not(.disabled):hover {
+      border-top-color: var(--brown);
+      box-shadow: 0 4px 14px rgba(0,0,0,.12);
+      transform: translateY(-2px);
+    }
+    .book-card.disabled { opacity: .42; cursor: default; }
+    .book-card h3 { font-size: 1rem; color: var(--navy); margin-bottom: .3rem; }
+    .book-card .book-sub { font-size: .8rem; color: var(--text-lt); font-style: italic; }
+    .book-card .book-count { font-size: .75rem; color: var(--navy-lt); margin-top: .6rem; }
+
+    /* ── Chapter grid ── */
+    .chapter-grid {
+      display: grid;
+      grid-template-columns: repeat(auto-fill, minmax(290px, 1fr));
+      gap: .6rem;
+    }
+    .chapter-card {
+      background: white; border: 1px solid var(--border);
+      border-left: 3px solid var(--navy);
+      padding: .85rem 1rem; text-decoration: none;
+      display: flex; align-items: baseline; gap: .65rem;
+      transition: all .15s;
+    }
+    .chapter-card:hover { border-left-color: var(--brown); background: var(--parchment-dk); }
+    .chapter-num { font-size: .72rem; color: var(--text-lt); min-width: 2.8rem; font-style: italic; }
+    .chapter-title { flex: 1; font-size: .88rem; color: var(--navy); }
+    .chapter-count {
+      font-size: .72rem; color: var(--text-lt);
+      background: var(--parchment-dk); padding: .1rem .45rem;
+      border-radius: 10px; white-space: nowrap;
+    }
+
+    /* ── Definition list ── */
+    .def-list { list-style: none; }
+    .def-item {
+      background: white; border: 1px solid var(--border);
+      border-left: 3px solid transparent;
+      margin-bottom: .45rem; padding: .7rem 1rem;
+      text-decoration: none; display: block;
+      transition: all .15s;
+    }
+    .def-item:hover { border-left-color: var(--brown); background: var(--parchment-dk); }
+    .def-term { font-size: .95rem; color: var(--navy); font-weight: bold; }
+    .def-preview {
+      font-size: .78rem; color: var(--text-lt); margin-top: .2rem;
+      font-style: italic; overflow: hidden; text-overflow: ellipsis; white-space: nowrap;
+    }
+
+    /* ── Term detail ── */
+    .def-detail { max-width: 700px; }
+    .term-heading {
+      font-size: 2rem; color: var(--navy); font-weight: normal;
+      border-bottom: 2px solid var(--border); padding-bottom: .5rem;
+      margin-bottom: 1.25rem;
+    }
+    .def-block { margin-bottom: 2rem; }
+    .def-block + .def-block {
+      border-top: 1px solid var(--border); padding-top: 1.75rem;
+    }
+    .def-chapter-label {
+      font-size: .78rem; color: var(--text-lt); margin-bottom: .9rem;
+      display: flex; gap: 1.2rem; flex-wrap: wrap;
+    }
+    .def-chapter-label a { color: var(--navy-lt); text-decoration: none; }
+    .def-chapter-label a:hover { text-decoration: underline; }
+    .def-body {
+      font-size: 1.05rem; line-height: 1.8; color: var(--text);
+      margin-bottom: .75rem;
+    }
+    .def-body a.term-link {
+      color: var(--brown); text-decoration: underline;
+      text-decoration-style: dotted; text-decoration-color: #c09a80;
+    }
+    .def-body a.term-link:hover {
+      text-decoration-style: solid; color: var(--brown-lt);
+    }
+    /* Compact context — just a small footnote line */
+    .def-context {
+      font-size: .75rem; color: var(--text-lt); font-style: italic;
+      padding-left: .75rem; border-left: 2px solid var(--border);
+      line-height: 1.4;
+    }
+
+    /* ── See Also ── */
+    .see-also { margin-top: 1.75rem; padding-top: 1.1rem; border-top: 1px solid var(--border); }
+    .see-also h3 {
+      font-size: .72rem; text-transform: uppercase; letter-spacing: .1em;
+      color: var(--text-lt); margin-bottom: .6rem; font-weight: normal;
+    }
+    .see-also-links { display: flex; flex-wrap: wrap; gap: .4rem; }
+    .see-also-link {
+      display: inline-block; padding: .25rem .6rem;
+      background: white; border: 1px solid var(--border-dk);
+      color: var(--navy); text-decoration: none; font-size: .78rem;
+      border-radius: 2px; transition: all .15s;
+    }
+    .see-also-link:hover { background: var(--navy); color: white; border-color: var(--navy); }
+
+    /* ── Misc ── */
+    @media (max-width: 680px) {
+      main { padding: 1rem; }
+      .chapter-grid { grid-template-columns: 1fr; }
+      .term-heading { font-size: 1.5rem; }
+      .search-input { width: 130px; }
+      .search-input:focus { width: 160px; }
+      .search-dropdown { min-width: 240px; }
+    }
+  </style>
+</head>
+<body>
+
+<header>
+  <div class="header-inner">
+    <a class="site-title" href="#/">Hobbes Dictionary</a>
+    <span class="header-sep">|</span>
+    <nav class="breadcrumb" id="breadcrumb"></nav>
+    <div class="search-wrap">
+      <span class="search-icon">&#9906;</span>
+      <input class="search-input" id="search-input" type="text"
+             placeholder="Search terms&hellip;" autocomplete="off" spellcheck="false">
+      <div class="search-dropdown" id="search-dropdown"></div>
+    </div>
+  </div>
+</header>
+
+<main>
+  <div id="page-home"    class="page"></div>
+  <div id="page-book"    class="page"></div>
+  <div id="page-chapter" class="page"></div>
+  <div id="page-term"    class="page"></div>
+</main>
+
+<script type="application/json" id="hobbes-data">DATAPLACEHOLDER</script>
+
+<script type="text/js-worker" id="hobbes-worker">
+// ── Worker ───────────────────────────────────────────────────────────────────
+// Owns the data and every index.  The page script hands it the JSON above as
+// a transferred buffer, then asks it for search results and whole pages by
+// message; it answers with HTML for the page script to drop into the DOM.
+//
+//   → {type:'init', buf, length}   ← {type:'ready'}
+//   → {type:'search', seq, q}      ← {type:'search', seq, html}   html null: nothing to search
+//   → {type:'page', hash}          ← {type:'page', hash, page, html, crumbs, top}
+let DATA;
+
+const CHAPTER_ORDER = [
+  'Intro',
+  'I','II','III','IV','V','VI','VII','VIII','IX','X',
+  'XI','XII','XIII','XIV','XV','XVI',
+  'XVII','XVIII','XIX','XX','XXI','XXII','XXIII','XXIV','XXV',
+  'XXVI','XXVII','XXVIII','XXIX','XXX','XXXI',
+  'XXXII','XXXIII','XXXIV','XXXV','XXXVI','XXXVII','XXXVIII','XXXIX','XL','XLI','XLII','XLIII',
+  'XLIV','XLV','XLVI','XLVII',
+  '1061'
+];
+const BOOK_RANGES = {
+  'I':   ['Intro','I','II','III','IV','V','VI','VII','VIII','IX','X','XI','XII','XIII','XIV','XV','XVI'],
+  'II':  ['XVII','XVIII','XIX','XX','XXI','XXII','XXIII','XXIV','XXV','XXVI','XXVII','XXVIII','XXIX','XXX','XXXI'],
+  'III': ['XXXII','XXXIII','XXXIV','XXXV','XXXVI','XXXVII','XXXVIII','XXXIX','XL','XLI','XLII','XLIII'],
+  'IV':  ['XLIV','XLV','XLVI','XLVII'],
+  '1061': ['1061'],
+};
+const BOOK_TITLES = { 'I':'Of Man', 'II':'Of Commonwealth', 'III':'Of a Christian Commonwealth', 'IV':'Of the Kingdom of Darkness', '1061':'Of the Class' };
+
+function chapterIdx(ch) {
+  const m = ch.match(/Chapter ([IVXLCDM]+|Intro|\d+):/);
+  return m ? CHAPTER_ORDER.indexOf(m[1]) : 999;
+}
+function chapterRoman(ch) {
+  const m = ch.match(/Chapter ([IVXLCDM]+|Intro|\d+):/); return m ? m[1] : '';
+}
+function chapterTitle(ch) {
+  const m = ch.match(/Chapter (?:[IVXLCDM]+|Intro|\d+): (.+)/); return m ? m[1] : ch;
+}
+function bookOfChapter(roman) {
+  for (const [b, chs] of Object.entries(BOOK_RANGES)) {
+    if (chs.includes(roman)) return b;
+  }
+  return 'I';
+}
+// Slugs and folded keys come precomputed from store.normalise_terms; these
+// two only handle what the build cannot know (typed URLs, search queries) and
+// must agree with it -- `python benchmarks.py normcheck` compares them.
+// Python's \w and \s are Unicode-aware, hence the explicit classes.
+function makeSlug(t) {
+  return t.toLowerCase().replace(/[^\p{L}\p{N}_\s\x1c-\x1f\x85-]|\ufeff/gu,'')
+    .replace(/[\s\x1c-\x1f\x85]+/g,'-').replace(/-+/g,'-').replace(/^-|-$/g,'');
+}
+function foldKey(t) {
+  return t.toLowerCase().normalize('NFKD')
+    .replace(/[\u0300-\u036f\u1ab0-\u1aff\u1dc0-\u1dff\u20d0-\u20ff\ufe20-\ufe2f]/g,'')
+    .replace(/æ/g,'ae').replace(/œ/g,'oe');
+}
+function esc(s) {
+  return String(s).replace(/&/g,'&amp;').replace(/</g,'&lt;').replace(/>/g,'&gt;').replace(/"/g,'&quot;');
+}
+function escRe(s) { return s.replace(/[.*+?^${}()|[\]\\]/g,'\\$&'); }
+
+// ── Indexes ──────────────────────────────────────────────────────────────────
+const slugIndex  = {};   // slug → [entries]
+const chapters   = {};   // chapter string → [entries]
+let sortedChapters, graphNode, searchTerms, searchKeys, searchWords, wordTerms, gramWords, gramCounts, termMarks;
+
+// Typo-tolerant index built by search_index.py: trigram → vocabulary word ids,
+// word id → term ids.  Id lists arrive delta-encoded.
+function deltaDecode(deltas) {
+  const ids = new Int32Array(deltas.length);
+  let acc = 0;
+  for (let i = 0; i < deltas.length; i++) ids[i] = (acc += deltas[i]);
+  return ids;
+}
+
+function init(buf, length) {
+  DATA = JSON.parse(new TextDecoder().decode(new Uint8Array(buf, 0, length)));
+  for (const e of DATA.entries) {
+    if (!slugIndex[e.slug]) slugIndex[e.slug] = [];
+    slugIndex[e.slug].push(e);
+    if (!chapters[e.chapter]) chapters[e.chapter] = [];
+    chapters[e.chapter].push(e);
+  }
+  sortedChapters = Object.keys(chapters).sort((a,b) => chapterIdx(a) - chapterIdx(b));
+  graphNode = new Map(DATA.graph.slugs.map((slug, i) => [slug, i]));
+
+  // Flat list of unique terms for search in sort-key order, with their folded keys
+  searchTerms = DATA.search.terms.map(([slug, term, chapter]) => ({slug, term, chapter}));
+  searchKeys  = DATA.search.keys;
+  searchWords = DATA.search.words;
+  wordTerms   = DATA.search.word_terms.map(deltaDecode);
+  gramWords   = new Map(Object.entries(DATA.search.grams).map(([g, d]) => [g, deltaDecode(d)]));
+  gramCounts  = new Uint8Array(searchWords.length);
+  termMarks   = new Uint8Array(searchTerms.length);
+}
+
+// Cross-ref graph from graph.py: CSR adjacency over node ids, already ordered
+// (See Also by name, Referenced By most central first), plus the Related list
+// from related.py, most similar first.
+function graphLinks(csr, slug) {
+  const i = graphNode.get(slug);
+  if (i === undefined) return [];
+  const out = [];
+  for (let k = csr.indptr[i]; k < csr.indptr[i + 1]; k++) {
+    const j = csr.indices[k];
+    out.push({slug: DATA.graph.slugs[j], term: DATA.graph.terms[j]});
+  }
+  return out;
+}
+
+// ── Search ───────────────────────────────────────────────────────────────────
+function searchHtml(query) {
+  const q = foldKey(query.trim());
+  if (!q) return null;
+
+  // Rank: starts-with > contains > typo-tolerant match
+  const [starts, contains] = exactSearch(q);
+  const results = [];
+  const exact = new Set();
+  for (const i of starts)   { results.push({...searchTerms[i], i, rank: 0, dist: 0}); exact.add(i); }
+  for (const i of contains) { results.push({...searchTerms[i], i, rank: 1, dist: 0}); exact.add(i); }
+  if (results.length < SEARCH_LIMIT && q.length >= FUZZY_MIN_LEN) {
+    for (const [i, dist] of fuzzySearch(q)) {
+      if (!exact.has(i)) results.push({...searchTerms[i], i, rank: 2, dist});
+    }
+  }
+  // Term ids are in sort-key order, so they break ties alphabetically.
+  results.sort((a,b) => a.rank - b.rank || a.dist - b.dist || a.i - b.i);
+  const top = results.slice(0, SEARCH_LIMIT);
+
+  if (!top.length) return `<div class="search-no-results">No terms found</div>`;
+  return top.map((r, i) => {
+    const hl = esc(r.term).replace(
+      new RegExp('(' + escRe(esc(q)) + ')', 'gi'),
+      '<mark>$1</mark>'
+    );
+    const chRoman = chapterRoman(r.chapter);
+    const bk = bookOfChapter(chRoman);
+    return `<a class="search-result" href="#/term/${encodeURIComponent(r.slug)}" data-i="${i}">
+      <div class="sr-term">${hl}</div>
+      <div class="sr-chapter">Book ${bk} &middot; Ch. ${chRoman}: ${esc(chapterTitle(r.chapter))}</div>
+    </a>`;
+  }).join('');
+}
+
+// ── Fuzzy search (mirrors search_index.Searcher) ─────────────────────────────
+const SEARCH_LIMIT = 12;
+const FUZZY_MIN_LEN = 4;
+const WORD_RE = /[\p{L}\p{N}]+/gu;
+
+function wordGrams(word) {
+  const p = '$' + word + '$', grams = new Set();
+  for (let i = 0; i + 3 <= p.length; i++) grams.add(p.slice(i, i + 3));
+  return grams;
+}
+
+function boundedLev(a, b, bound) {
+  if (Math.abs(a.length - b.length) > bound) return bound + 1;
+  let prev = Array.from({length: b.length + 1}, (_, j) => j);
+  for (let i = 1; i <= a.length; i++) {
+    const cur = [i];
+    let rowMin = i;
+    for (let j = 1; j <= b.length; j++) {
+      cur[j] = Math.min(prev[j] + 1, cur[j-1] + 1, prev[j-1] + (a[i-1] === b[j-1] ? 0 : 1));
+      if (cur[j] < rowMin) rowMin = cur[j];
+    }
+    if (rowMin > bound) return bound + 1;
+    prev = cur;
+  }
+  return prev[b.length];
+}
+
+// Distance to the whole word, or to a prefix of it near the query's length
+function wordDistance(qw, word, bound) {
+  let best = boundedLev(qw, word, bound);
+  const hi = Math.min(word.length, qw.length + bound + 1);
+  for (let len = Math.max(1, qw.length - bound); len < hi && best > 0; len++)
+    best = Math.min(best, boundedLev(qw, word.slice(0, len), bound));
+  return best;
+}
+
+// Vocabulary words within the edit bound of qw: [[wordId, dist]]
+function fuzzyWords(qw) {
+  const bound = qw.length <= 6 ? 1 : 2;
+  const grams = wordGrams(qw);
+  const touched = [];
+  for (const g of grams) {
+    const ids = gramWords.get(g);
+    if (!ids) continue;
+    for (let k = 0; k < ids.length; k++) if (!gramCounts[ids[k]]++) touched.push(ids[k]);
+  }
+  // Each edit destroys at most three trigrams; a half-typed word loses its "x$" gram.
+  const need = Math.max(1, grams.size - 3 * bound - 1);
+  const out = [];
+  for (const w of touched) {
+    if (gramCounts[w] >= need) {
+      const d = wordDistance(qw, searchWords[w], bound);
+      if (d <= bound) out.push([w, d]);
+    }
+    gramCounts[w] = 0;
+  }
+  return out;
+}
+
+// Vocabulary words containing qw: every trigram of qw, confirmed; short ones by scan
+function containingWords(qw) {
+  const out = [];
+  if (qw.length < 3) {
+    for (let w = 0; w < searchWords.length; w++) if (searchWords[w].includes(qw)) out.push(w);
+    return out;
+  }
+  const grams = new Set();
+  for (let i = 0; i + 3 <= qw.length; i++) grams.add(qw.slice(i, i + 3));
+  const touched = [];
+  for (const g of grams) {
+    const ids = gramWords.get(g);
+    if (!ids) continue;
+    for (let k = 0; k < ids.length; k++) if (!gramCounts[ids[k]]++) touched.push(ids[k]);
+  }
+  for (const w of touched) {
+    if (gramCounts[w] === grams.size && searchWords[w].includes(qw)) out.push(w);
+    gramCounts[w] = 0;
+  }
+  return out;
+}
+
+// Exact matches, [startsWith ids, contains ids], each in id order and at most
+// SEARCH_LIMIT long.  A key containing q has a word containing q's longest
+// word, so only those words' terms are tested, in id order, stopping once
+// SEARCH_LIMIT keys start with q: nothing later can outrank them.
+function exactSearch(q) {
+  const qws = q.match(WORD_RE);
+  let ids = null;                     // null: no word in q, test every key
+  if (qws) {
+    const words = containingWords(qws.reduce((a, b) => b.length > a.length ? b : a));
+    if (words.length === 1) ids = wordTerms[words[0]];
+    else {
+      let hi = -1;
+      for (const w of words) for (const i of wordTerms[w]) { termMarks[i] = 1; if (i > hi) hi = i; }
+      ids = [];
+      for (let i = 0; i <= hi; i++) if (termMarks[i]) { termMarks[i] = 0; ids.push(i); }
+    }
+  }
+  const starts = [], contains = [];
+  const n = ids ? ids.length : searchKeys.length;
+  for (let k = 0; k < n && starts.length < SEARCH_LIMIT; k++) {
+    const i = ids ? ids[k] : k;
+    const tl = searchKeys[i];
+    if (tl.startsWith(q)) starts.push(i);
+    else if (contains.length < SEARCH_LIMIT && tl.includes(q)) contains.push(i);
+  }
+  return [starts, contains];
+}
+
+// Terms matching every query word: Map termId → total distance
+function fuzzySearch(q) {
+  let best = null;
+  for (const qw of q.match(WORD_RE) || []) {
+    const dist = new Map();
+    for (const [w, d] of fuzzyWords(qw)) {
+      for (const i of wordTerms[w]) if (!(dist.get(i) <= d)) dist.set(i, d);
+    }
+    if (best) {
+      for (const [i, d] of best) dist.has(i) ? best.set(i, d + dist.get(i)) : best.delete(i);
+    } else best = dist;
+    if (!best.size) break;
+  }
+  return best || new Map();
+}
+
+// ── Routing ───────────────────────────────────────────────────────────────────
+function renderPage(hash) {
+  const parts = (hash || '/').split('/').filter(Boolean);
+  if (!parts.length || parts[0] === '') return homePage();
+  if (parts[0] === 'book')    return bookPage(parts[1] || 'I');
+  if (parts[0] === 'chapter') return chapterPage(decodeURIComponent(parts[1] || ''));
+  if (parts[0] === 'term')    return termPage(decodeURIComponent(parts.slice(1).join('/')));
+  return homePage();
+}
+
+// ── Pages ─────────────────────────────────────────────────────────────────────
+// Each returns {page, html, crumbs, top}: the page div to fill, its contents,
+// the breadcrumb items and whether to scroll back to the top.
+function homePage() {
+  const books = ['I','II','III','IV','1061'].map(b => {
+    const range = BOOK_RANGES[b];
+    const count = range.reduce((n, r) => {
+      const ch = sortedChapters.find(c => chapterRoman(c) === r);
+      return n + (ch ? chapters[ch].length : 0);
+    }, 0);
+    const enabled = count > 0;
+    return `<a class="book-card${enabled ? '' : ' disabled'}" ${enabled ? `href="#/book/${b}"` : ''}>
+      <h3>Book ${b}</h3>
+      <p class="book-sub">${BOOK_TITLES[b]}</p>
+      <p class="book-count">${count ? `${count} definitions` : 'Not yet loaded'}</p>
+    </a>`;
+  }).join('');
+
+  return {page: 'home', crumbs: [], html: `
+    <h1 class="page-title">Hobbes Dictionary</h1>
+    <p class="page-subtitle">Definitions from <em>Leviathan</em> (1651) &mdash; Select a book</p>
+    <div class="book-grid">${books}</div>`};
+}
+
+function bookPage(book) {
+  const title = BOOK_TITLES[book] || '';
+  const range = BOOK_RANGES[book] || [];
+  const chs = sortedChapters.filter(c => range.includes(chapterRoman(c)));
+  const total = chs.reduce((n, c) => n + chapters[c].length, 0);
+  const crumbs = [{label:`Book ${book}: ${title}`, href:`/book/${book}`}];
+
+  // If only one chapter, skip the chapter list and show definitions directly
+  if (chs.length === 1) {
+    const ents = chapters[chs[0]];
+    return {page: 'book', crumbs, html: `
+      <a class="back-btn" href="#/">← Books</a>
+      <h1 class="page-title">Book ${book}: ${esc(title)}</h1>
+      <p class="page-subtitle">${total} definitions</p>
+      <ul class="def-list">
+        ${ents.map(e => `
+          <li><a class="def-item" href="#/term/${encodeURIComponent(e.slug)}">
+            <div class="def-term">${esc(e.term)}</div>
+            <div class="def-preview">${esc(e.definition.slice(0,130))}${e.definition.length>130?'&hellip;':''}</div>
+          </a></li>`).join('')}
+      </ul>`};
+  }
+
+  return {page: 'book', crumbs, html: `
+    <a class="back-btn" href="#/">← Books</a>
+    <h1 class="page-title">Book ${book}: ${esc(title)}</h1>
+    <p class="page-subtitle">${total} definitions across ${chs.length} chapters</p>
+    <div class="chapter-grid">
+      ${chs.map(ch => `
+        <a class="chapter-card" href="#/chapter/${chapterRoman(ch)}">
+          <span class="chapter-num">Ch.&nbsp;${chapterRoman(ch)}</span>
+          <span class="chapter-title">${esc(chapterTitle(ch))}</span>
+          <span class="chapter-count">${chapters[ch].length}</span>
+        </a>`).join('')}
+    </div>`};
+}
+
+function chapterPage(roman) {
+  const chStr = sortedChapters.find(c => chapterRoman(c) === roman);
+  if (!chStr) return homePage();
+  const book = bookOfChapter(roman);
+  const title = chapterTitle(chStr);
+  const ents  = chapters[chStr];
+
+  return {page: 'chapter', crumbs: [
+    {label:`Book ${book}`, href:`/book/${book}`},
+    {label:`Ch. ${roman}: ${title}`, href:`/chapter/${roman}`}
+  ], html: `
+    <a class="back-btn" href="#/book/${book}">← Book ${book}: ${esc(BOOK_TITLES[book])}</a>
+    <h1 class="page-title">Chapter ${roman}</h1>
+    <p class="page-subtitle">${esc(title)} &middot; ${ents.length} definitions</p>
+    <ul class="def-list">
+      ${ents.map(e => `
+        <li><a class="def-item" href="#/term/${encodeURIComponent(e.slug)}">
+          <div class="def-term">${esc(e.term)}</div>
+          <div class="def-preview">${esc(e.definition.slice(0,130))}${e.definition.length>130?'&hellip;':''}</div>
+        </a></li>`).join('')}
+    </ul>`};
+}
+
+function termPage(slug) {
+  // A hand-typed #/term/Civil Law still finds civil-law.
+  if (!slugIndex[slug] && slugIndex[makeSlug(slug)]) slug = makeSlug(slug);
+  const ents = slugIndex[slug];
+  if (!ents) return homePage();
+  const first  = ents[0];
+  const roman  = chapterRoman(first.chapter);
+  const book   = bookOfChapter(roman);
+  const title  = chapterTitle(first.chapter);
+  const seeAlsoRefs = graphLinks(DATA.graph.out, slug);
+  const referencedBy = graphLinks(DATA.graph.in, slug);
+  const relatedRefs = graphLinks(DATA.graph.related, slug);
+
+  const singleChapterBook = (BOOK_RANGES[book] || []).length === 1;
+  const crumbs = singleChapterBook
+    ? [{label:`Book ${book}`, href:`/book/${book}`}, {label:first.term, href:`/term/${slug}`}]
+    : [{label:`Book ${book}`, href:`/book/${book}`}, {label:`Ch. ${roman}`, href:`/chapter/${roman}`}, {label:first.term, href:`/term/${slug}`}];
+
+  const blocksHtml = ents.map(e => {
+    const chRoman = chapterRoman(e.chapter);
+    // Compact context: strip redundant prefixes, trim
+    const ctx = compactContext(e.context);
+    return `
+      <div class="def-block">
+        <div class="def-chapter-label">
+          <span><a href="#/chapter/${chRoman}">Chapter ${chRoman}: ${esc(chapterTitle(e.chapter))}</a></span>
+          <span>${pageRef(e)}</span>
+        </div>
+        <div class="def-body">${linkify(e.definition, e.cross_refs)}</div>
+        ${ctx ? `<div class="def-context">${esc(ctx)}</div>` : ''}
+      </div>`;
+  }).join('');
+
+  const linkList = (heading, refs) => refs.length ? `
+    <div class="see-also">
+      <h3>${heading}</h3>
+      <div class="see-also-links">
+        ${refs.map(r => `<a class="see-also-link" href="#/term/${encodeURIComponent(r.slug)}">${esc(r.term)}</a>`).join('')}
+      </div>
+    </div>` : '';
+  const seeAlso = linkList('See Also', seeAlsoRefs) + linkList('Referenced By', referencedBy)
+                + linkList('Related', relatedRefs);
+
+  const multiNote = ents.length > 1
+    ? `<p class="page-subtitle">Defined in ${ents.length} chapters</p>` : '';
+
+  return {page: 'term', crumbs, top: true, html: `
+    <a class="back-btn" href="${singleChapterBook ? `#/book/${book}` : `#/chapter/${roman}`}">← ${singleChapterBook ? `Book ${book}: ${esc(BOOK_TITLES[book]||'')}` : esc(title)}</a>
+    <div class="def-detail">
+      <h1 class="term-heading">${esc(first.term)}</h1>
+      ${multiNote}
+      ${blocksHtml}
+      ${seeAlso}
+    </div>`};
+}
+
+// "p. N", linked to the PDF page the quote was found on when align.py found it.
+// e.loc is [source, PDF page, running-header page, start, end].
+function pageRef(e) {
+  if (!e.loc) return `p.&nbsp;${esc(e.page_number)}`;
+  const [src, page, header, start, end] = e.loc;
+  return `<a href="${DATA.sources[src]}#page=${page}" target="_blank" rel="noopener"
+    title="PDF page ${page}, characters ${start}–${end}">p.&nbsp;${esc(header ?? e.page_number)}</a>`;
+}
+
+// ── Compact context ───────────────────────────────────────────────────────────
+function compactContext(ctx) {
+  if (!ctx) return '';
+  // Strip verbose prefixes, keep the substance
+  return ctx
+    .replace(/^marginal label:\s*['"]?/i, '')
+    .replace(/['"]?\s*[;\-—]\s*/, ' — ')
+    .replace(/;\s*/g, ' · ')
+    .replace(/^['"]|['"]$/g, '')
+    .trim();
+}
+
+// ── Linkify definition text ───────────────────────────────────────────────────
+function linkify(text, refs) {
+  if (!refs || !refs.length) return esc(text);
+  const sorted = [...refs].sort((a,b) => b.length - a.length);
+  const spans = [];
+  for (const ref of sorted) {
+    const rx = new RegExp('\\b' + escRe(ref) + '\\b', 'gi');
+    let m;
+    while ((m = rx.exec(text)) !== null) {
+      const s = m.index, e = s + m[0].length;
+      if (!spans.some(x => s < x.end && e > x.start))
+        spans.push({start:s, end:e, matched:m[0], ref});
+    }
+  }
+  if (!spans.length) return esc(text);
+  spans.sort((a,b) => a.start - b.start);
+  let out = '', last = 0;
+  for (const {start, end, matched, ref} of spans) {
+    out += esc(text.slice(last, start));
+    const sl = DATA.ref_slugs[ref];
+    out += sl
+      ? `<a class="term-link" href="#/term/${encodeURIComponent(sl)}">${esc(matched)}</a>`
+      : esc(matched);
+    last = end;
+  }
+  return out + esc(text.slice(last));
+}
+
+// ── Messages ──────────────────────────────────────────────────────────────────
+// Requests are answered in arrival order; the page script drops replies that a
+// newer request has overtaken.  Requests sent before the data are held until it
+// arrives.  A request that throws is answered with {type: 'failed'}, so one bad
+// request costs only its own reply.
+const early = [];
+
+function answer(m) {
+  if (m.type === 'search') return {type: 'search', seq: m.seq, html: searchHtml(m.q)};
+  if (m.type === 'page') return {type: 'page', hash: m.hash, ...renderPage(m.hash)};
+  return null;
+}
+
+self.onmessage = ({data: m}) => {
+  if (m.type === 'init') {
+    init(m.buf, m.length);
+    self.postMessage({type: 'ready'});
+    early.splice(0).forEach(m => self.onmessage({data: m}));
+  } else if (!DATA) {
+    early.push(m);
+  } else {
+    let reply;
+    try {
+      reply = answer(m);
+    } catch (err) {
+      reply = {type: 'failed', request: m, message: String(err && err.message || err)};
+    }
+    if (reply) self.postMessage(reply);
+  }
+};
+</script>
+
+<script>
+// ── Worker ───────────────────────────────────────────────────────────────────
+// Everything but the DOM happens in the worker above: this script only posts
+// requests and writes the HTML that comes back, so typing never waits on a
+// search or a page render, however large the dictionary.  The data goes over
+// as one transferred buffer, UTF-8 encoded a slice per task so that no step
+// of it holds up input for long, and is parsed only there.  Where workers are
+// unavailable (or blob: URLs are blocked), or the worker fails before it has
+// loaded the data, the same code runs on this thread behind the same messages.
+// Once it is ready, an error is only ever one request's (see 'failed').
+const WORKER_SRC = document.getElementById('hobbes-worker').textContent;
+
+function inlineWorker() {
+  const scope = {postMessage: m => setTimeout(() => worker.onmessage({data: m}))};
+  new Function('self', WORKER_SRC)(scope);
+  return {postMessage: m => setTimeout(() => scope.onmessage({data: m})), terminate() {}};
+}
+
+function startWorker() {
+  try {
+    const url = URL.createObjectURL(new Blob([WORKER_SRC], {type: 'text/javascript'}));
+    const w = new Worker(url);
+    w.onerror = () => {
+      if (workerReady) return;
+      w.terminate(); connect(inlineWorker()); render();
+    };
+    return w;
+  } catch (err) {
+    return inlineWorker();
+  }
+}
+
+const ENCODE_CHARS = 1 << 19;
+
+function encodeSliced(text, done) {
+  const encoder = new TextEncoder();
+  const bytes = new Uint8Array(text.length * 3);
+  let read = 0, written = 0;
+  (function step() {
+    let end = Math.min(read + ENCODE_CHARS, text.length);
+    const c = text.charCodeAt(end - 1);
+    if (end < text.length && c >= 0xd800 && c < 0xdc00) end--;   // keep surrogate pairs whole
+    written += encoder.encodeInto(text.slice(read, end), bytes.subarray(written)).written;
+    read = end;
+    if (read < text.length) setTimeout(step);
+    else done(bytes.buffer, written);
+  })();
+}
+
+function connect(w) {
+  worker = w;
+  workerReady = false;
+  worker.onmessage = onWorkerMessage;
+  requested.clear();
+  encodeSliced(document.getElementById('hobbes-data').textContent,
+               (buf, length) => w.postMessage({type: 'init', buf, length}, [buf]));
+}
+
+let worker;
+let workerReady = false;
+let searchSeq = 0;
+
+function onWorkerMessage({data: m}) {
+  if (m.type === 'ready') {
+    workerReady = true;
+  } else if (m.type === 'failed') {
+    const q = m.request;
+    console.error('hobbes worker:', q.type, m.message);
+    if (q.type === 'search' && q.seq === searchSeq) closeSearch();
+    if (q.type === 'page') {
+      requested.delete(q.hash);
+      if (q.hash === waitingFor) waitingFor = null;
+    }
+  } else if (m.type === 'search') {
+    if (m.seq !== searchSeq) return;   // a later keystroke (or closeSearch) overtook it
+    if (m.html === null) { closeSearch(); return; }
+    focusedIdx = -1;
+    searchDropdown.innerHTML = m.html;
+    searchDropdown.classList.add('open');
+  } else if (m.type === 'page') {
+    requested.delete(m.hash);
+    const r = keep(m.hash, m);
+    if (m.hash === waitingFor) { waitingFor = null; show(r); }
+  }
+}
+
+// ── Prefetch ─────────────────────────────────────────────────────────────────
+// Hovering a link to another page (for PREFETCH_DELAY_MS) or focusing it, by
+// tab or by arrowing through search results, asks the worker for that page
+// ahead of the click.  Replies are parsed into <template>s and kept in
+// `rendered`, least recently used first and at most PREFETCH_MAX of them, so
+// following the link only clones nodes into place.  Pages navigated to are
+// kept too, so going Back is as quick.  The data never changes under a page,
+// so nothing kept goes stale.
+const PREFETCH_MAX = 24;
+const PREFETCH_DELAY_MS = 60;
+const rendered  = new Map();   // hash → {page, tpl, crumbs, top}
+const requested = new Set();   // hashes asked for, reply not yet back
+let waitingFor = null;         // hash navigated to before its page arrived
+let hoverTimer = 0;
+
+function linkHash(el) {
+  const a = el && el.closest && el.closest('a[href^="#/"]');
+  return a ? a.getAttribute('href').slice(1) : null;
+}
+
+function prefetch(hash) {
+  if (!hash || rendered.has(hash) || requested.has(hash)) return;
+  requested.add(hash);
+  worker.postMessage({type: 'page', hash});
+}
+
+function keep(hash, m) {
+  const tpl = document.createElement('template');
+  tpl.innerHTML = m.html;
+  const r = {page: m.page, tpl, crumbs: m.crumbs, top: m.top};
+  rendered.delete(hash);
+  rendered.set(hash, r);
+  while (rendered.size > PREFETCH_MAX) rendered.delete(rendered.keys().next().value);
+  return r;
+}
+
+function show(r) {
+  document.querySelectorAll('.page').forEach(p => p.classList.remove('active'));
+  const p = document.getElementById('page-' + r.page);
+  p.replaceChildren(r.tpl.content.cloneNode(true));
+  p.classList.add('active');
+  setBreadcrumb(r.crumbs);
+  if (r.top) window.scrollTo(0, 0);
+}
+
+document.addEventListener('pointerover', e => {
+  clearTimeout(hoverTimer);
+  const hash = linkHash(e.target);
+  if (hash) hoverTimer = setTimeout(() => prefetch(hash), PREFETCH_DELAY_MS);
+});
+document.addEventListener('focusin', e => prefetch(linkHash(e.target)));
+
+// ── Search ───────────────────────────────────────────────────────────────────
+const searchInput    = document.getElementById('search-input');
+const searchDropdown = document.getElementById('search-dropdown');
+let focusedIdx = -1;
+
+function showSearch(query) {
+  if (!query.trim()) { closeSearch(); return; }
+  worker.postMessage({type: 'search', seq: ++searchSeq, q: query});
+}
+
+function closeSearch() {
+  searchSeq++;
+  searchDropdown.classList.remove('open');
+  focusedIdx = -1;
+}
+
+// Debounce keystrokes so fast typing only searches once it pauses
+const SEARCH_DEBOUNCE_MS = 60;
+let searchTimer = 0;
+searchInput.addEventListener('input', () => {
+  clearTimeout(searchTimer);
+  searchTimer = setTimeout(() => showSearch(searchInput.value), SEARCH_DEBOUNCE_MS);
+});
+searchInput.addEventListener('focus', () => { if (searchInput.value) showSearch(searchInput.value); });
+
+searchInput.addEventListener('keydown', e => {
+  const items = searchDropdown.querySelectorAll('.search-result');
+  if (e.key === 'ArrowDown') {
+    e.preventDefault();
+    focusedIdx = Math.min(focusedIdx + 1, items.length - 1);
+    items.forEach((el, i) => el.classList.toggle('focused', i === focusedIdx));
+    prefetch(linkHash(items[focusedIdx]));
+  } else if (e.key === 'ArrowUp') {
+    e.preventDefault();
+    focusedIdx = Math.max(focusedIdx - 1, -1);
+    items.forEach((el, i) => el.classList.toggle('focused', i === focusedIdx));
+    prefetch(linkHash(items[focusedIdx]));
+  } else if (e.key === 'Enter') {
+    if (focusedIdx >= 0 && items[focusedIdx]) {
+      window.location.href = items[focusedIdx].href;
+      searchInput.value = ''; closeSearch();
+    }
+  } else if (e.key === 'Escape') {
+    closeSearch(); searchInput.blur();
+  }
+});
+
+document.addEventListener('click', e => {
+  if (!e.target.closest('.search-wrap')) closeSearch();
+});
+
+searchDropdown.addEventListener('click', () => {
+  searchInput.value = ''; closeSearch();
+});
+
+// ── Routing ───────────────────────────────────────────────────────────────────
+window.addEventListener('hashchange', render);
+window.addEventListener('DOMContentLoaded', render);
+
+function render() {
+  closeSearch();
+  const hash = window.location.hash.slice(1) || '/';
+  const r = rendered.get(hash);
+  if (r) {
+    rendered.delete(hash);
+    rendered.set(hash, r);
+    waitingFor = null;
+    show(r);
+    return;
+  }
+  waitingFor = hash;
+  prefetch(hash);
+}
+
+// ── Breadcrumb ────────────────────────────────────────────────────────────────
+function esc(s) {
+  return String(s).replace(/&/g,'&amp;').replace(/</g,'&lt;').replace(/>/g,'&gt;').replace(/"/g,'&quot;');
+}
+function setBreadcrumb(items) {
+  const nav = document.getElementById('breadcrumb');
+  if (!items.length) { nav.innerHTML = ''; return; }
+  nav.innerHTML = items.map((item, i) =>
+    i < items.length - 1
+      ? `<a href="#${item.href}">${esc(item.label)}</a><span class="sep">›</span>`
+      : `<span>${esc(item.label)}</span>`
+  ).join('');
+}
+
+connect(startWorker());
+</script>
+</body>
+</html>
+"""
+
+# The template either side of its data block.
+HTML_HEAD, HTML_TAIL = HTML.split('DATAPLACEHOLDER')
+
+
+def site_entry(row, keys, loc=None):
+    """One dictionary row in the shape the page script expects."""
+    e = {
+        'term':        row['term'],
+        'slug':        keys[row['term']].slug,
+        'definition':  row['definition'],
+        'chapter':     row['chapter'],
+        'page_number': row['page_number'],
+        'cross_refs':  split_refs(row['cross_refs']),
+        'context':     row['context'],
+    }
+    if loc is not None:
+        e['loc'] = loc
+    return e
+
+
+def site_entries(rows, keys=None):
+    """Dictionary rows in the shape the page script expects; keys as from store.load_term_keys."""
+    if keys is None:
+        keys = normalise_terms(term_names(rows))
+    return [site_entry(row, keys) for row in rows]
+
+
+def load_or_build_graph(csv_path, rows, graph_path=None, keys=None):
+    """The graph the last merge wrote (next to csv_path by default), rebuilt if missing or stale."""
+    if graph_path is None:
+        graph_path = os.path.join(os.path.dirname(os.path.abspath(csv_path)), GRAPH_FILE)
+    return load_graph(graph_path, rows) or build_graph(rows, keys)
+
+
+def load_or_build_related(csv_path, rows, related_path=None):
+    """Related terms cached next to csv_path by default; recomputed and saved when stale."""
+    if related_path is None:
+        related_path = os.path.join(os.path.dirname(os.path.abspath(csv_path)), RELATED_FILE)
+    related = load_related(related_path, rows)
+    if related is None:
+        related = build_related(rows, vectors_path=os.path.splitext(related_path)[0] + '.npy')
+        write_related(related, related_path)
+    return related
+
+
+def page_locations(alignment, align_path, out_path):
+    """
+    (PDF URLs, locs): locs has each row's loc for the page script, indexing
+    into the URLs, or None where align.py did not locate the row.
+    """
+    base = os.path.dirname(os.path.abspath(align_path))
+    site = os.path.dirname(os.path.abspath(out_path))
+    sources, urls, locs = {}, [], []
+    for i, src in enumerate(alignment['source']):
+        if src is None:
+            locs.append(None)
+            continue
+        if src not in sources:
+            sources[src] = len(urls)
+            urls.append(quote(os.path.relpath(os.path.join(base, alignment['sources'][src]), site)))
+        locs.append([sources[src], alignment['page'][i], alignment['header'][i],
+                     alignment['start'][i], alignment['end'][i]])
+    return urls, locs
+
+
+def iter_json(encoder, value):
+    """
+    encoder's encoding of value as a series of chunks, like iterencode, but
+    with everything below SPLIT_ITEMS items left to the C encoder.
+    """
+    if isinstance(value, dict) and len(value) > SPLIT_ITEMS:
+        yield '{'
+        for i, (k, v) in enumerate(value.items()):
+            yield (', ' if i else '') + encoder.encode(k if isinstance(k, str) else str(k)) + ': '
+            yield from iter_json(encoder, v)
+        yield '}'
+    elif isinstance(value, list) and len(value) > SPLIT_ITEMS:
+        yield '['
+        for i in range(0, len(value), SPLIT_ITEMS):
+            yield (', ' if i else '') + encoder.encode(value[i:i + SPLIT_ITEMS])[1:-1]
+        yield ']'
+    else:
+        yield encoder.encode(value)
+
+
+def script_safe(chunks):
+    """JSON chunks as they may appear in a <script> element, which the first "</script" would end."""
+    # "</" can only occur inside a string, and no chunk ends inside one.
+    for chunk in chunks:
+        yield chunk.replace('</', '<\\/')
+
+
+def write_page(f, rows, keys, locs, data):
+    """
+    Stream the page to f: HTML_HEAD, {"entries": [...], **data} with an entry
+    dict made per row as it is written, then HTML_TAIL.  Returns the
+    characters written.
+    """
+    encoder = json.JSONEncoder(ensure_ascii=False)
+    buf, size, total = [], 0, 0
+
+    def emit(chunks):
+        nonlocal size, total
+        for chunk in chunks:
+            buf.append(chunk)
+            size += len(chunk)
+            if size >= WRITE_CHUNK:
+                f.write(''.join(buf))
+                total += size
+                buf.clear()
+                size = 0
+
+    emit([HTML_HEAD, '{"entries": ['])
+    for i, row in enumerate(rows):
+        if i:
+            emit([', '])
+        emit(script_safe([encoder.encode(site_entry(row, keys, locs[i] if locs else None))]))
+    emit([']'])
+    for key, value in data.items():
+        emit([', ', encoder.encode(key), ': '])
+        emit(script_safe(iter_json(encoder, value)))
+    emit(['}', HTML_TAIL])
+    f.write(''.join(buf))
+    return total + size
+
+
+def page_related(graph, related):
+    """Related neighbours per graph node, minus terms See Also/Referenced By already show."""
+    def nbrs(csr, i):
+        return csr['indices'][csr['indptr'][i]:csr['indptr'][i + 1]]
+
+    adjacency = []
+    for i in range(len(graph['slugs'])):
+        linked = set(nbrs(graph['out'], i)) | set(nbrs(graph['in'], i))
+        adjacency.append([j for j in nbrs(related['related'], i) if j not in linked][:PAGE_RELATED])
+    return to_csr(adjacency)
+
+
+def build(csv_path, out_path, graph_path=None, related_path=None, align_path=None):
+    """
+    Render csv_path into a self-contained index.html at out_path.  Page
+    references link into the PDFs when align_path (next to the CSV by
+    default) holds a current alignment; build never runs the alignment.
+    Returns (rows, keys, related) for the caller's summary.
+    """
+    rows = load_entries(csv_path)
+    keys = load_term_keys(csv_path, rows)
+    graph = load_or_build_graph(csv_path, rows, graph_path, keys)
+    related = load_or_build_related(csv_path, rows, related_path)
+    # The page only needs names, the two adjacency lists and the related list.
+    page_graph = {k: graph[k] for k in ('slugs', 'terms', 'out', 'in')}
+    page_graph['related'] = page_related(graph, related)
+    from .align import ALIGN_FILE, load_alignment   # and the corpus layer; not needed to import build
+
+    if align_path is None:
+        align_path = os.path.join(os.path.dirname(os.path.abspath(csv_path)), ALIGN_FILE)
+    alignment = load_alignment(align_path, rows)
+    sources, locs = page_locations(alignment, align_path, out_path) if alignment else ([], None)
+
+    with stage("search.index") as rec:
+        first = {}
+        for e in rows:
+            slug = keys[e['term']].slug
+            if slug not in first:
+                first[slug] = (slug, e['term'], e['chapter'])
+        search = build_search_index(list(first.values()), keys)
+        rec["terms"] = len(first)
+        rec["grams"] = len(search["grams"])
+
+    # Cross-ref name -> slug, for the names that resolve to a term, so linkify
+    # never has to slugify.
+    ref_slugs = {}
+    for e in rows:
+        for ref in split_refs(e['cross_refs']):
+            if keys[ref].slug in first:
+                ref_slugs[ref] = keys[ref].slug
+
+    data = {'search': search, 'graph': page_graph, 'ref_slugs': ref_slugs, 'sources': sources}
+    with stage("html.write", path=out_path, rows=len(rows)) as rec:
+        with open(out_path, 'w', encoding='utf-8') as f:
+            rec["chars"] = write_page(f, rows, keys, locs, data)
+
+    return rows, keys, related
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the static dictionary site")
+    parser.add_argument("--work", default=None, help="work id in corpus.json (default leviathan)")
+    args = parser.parse_args(argv)
+
+    from .corpus import Corpus
+
+    work = Corpus().work(args.work)
+    instrument.start_run("build_site", instrument.trace_path(work.entries_path))
+    out_path = work.site_path
+    rows, keys, related = build(work.entries_path, out_path, work.graph_path, work.related_path,
+                                work.align_path)
+
+    print(f"Built {out_path}")
+    print(f"  {len(rows)} entries · {len(set(keys[e['term']].slug for e in rows))} unique terms · {len(set(e['chapter'] for e in rows))} chapters")
+    if related["method"] == "lsa":
+        print(f"  related terms: LSA with NumPy ({related['dims']} dims)")
+    else:
+        print("  related terms: TF-IDF fallback, compared sparsely without NumPy")
+    instrument.summary()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Per-chapter checkpoints for extraction runs.
+
+Each finished chapter is written to its own JSON file in a work directory
+(`chapter-XIV.json`), so a run that dies part way keeps everything it already
+paid for.  A checkpoint records a `key`, a hash of the model, prompts and page
+range it was produced with, and `text_sha1`, the digest of the page text it
+was extracted from (see pagediff.py); extract.py skips a chapter whose
+checkpoint still matches both.  Files are written to a temporary name,
+fsynced and renamed into place, so a crash mid-write never leaves a truncated
+checkpoint.
+
+`retry` wraps the model call: failures are retried with capped exponential
+backoff and full jitter before the chapter is given up on for this run.
+"""
+
+import hashlib
+import json
+import os
+import random
+import time
+
+from .instrument import stage
+
+ATTEMPTS = 5
+BACKOFF_BASE_S = 2.0
+BACKOFF_CAP_S = 60.0
+
+
+def chapter_key(*parts):
+    """Fingerprint of everything that determines a chapter's extraction output."""
+    h = hashlib.sha1()
+    for p in parts:
+        h.update(str(p).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def checkpoint_path(work_dir, chapter_num):
+    return os.path.join(work_dir, f"chapter-{chapter_num}.json")
+
+
+def read_checkpoint(work_dir, chapter_num):
+    """A checkpoint's whole record (key, metadata, definitions), or None if missing or unreadable."""
+    try:
+        with open(checkpoint_path(work_dir, chapter_num), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def save_checkpoint(work_dir, chapter_num, key, definitions, **meta):
+    path = checkpoint_path(work_dir, chapter_num)
+    tmp = path + ".tmp"
+    with stage("checkpoint.write", chapter=chapter_num, definitions=len(definitions)):
+        os.makedirs(work_dir, exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"chapter_num": chapter_num, "key": key, "saved_at": time.time(),
+                       **meta, "definitions": definitions}, f, ensure_ascii=False, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+
+def backoff_delay(attempt, rng=random):
+    """Full-jitter delay before retry number `attempt` (1-based)."""
+    return rng.uniform(0, min(BACKOFF_CAP_S, BACKOFF_BASE_S * 2 ** (attempt - 1)))
+
+
+def retry(fn, retry_on, attempts=ATTEMPTS, label="", sleep=time.sleep):
+    """
+    Call fn() until it succeeds or `attempts` calls have raised one of the
+    `retry_on` exception types; the last exception propagates.  Anything else
+    (KeyboardInterrupt included) propagates immediately.
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            return fn()
+        except retry_on as e:
+            if attempt == attempts:
+                raise
+            delay = backoff_delay(attempt)
+            print(f"  {label}attempt {attempt}/{attempts} failed ({type(e).__name__}: {e}); "
+                  f"retrying in {delay:.1f}s")
+            with stage("retry.sleep", attempt=attempt, error=type(e).__name__):
+                sleep(delay)
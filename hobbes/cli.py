@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Single entry point for the toolchain:
+
+    python -m hobbes extract  [--work ID] [--concurrency N] [--redo XIV ...]
+                              [--max-usd D] [--max-tokens N] [--priority XIV ...] [--plan]
+                              [--api-url URL] [--record DIR]
+    python -m hobbes merge    intro|class|enza
+    python -m hobbes crossref [--work ID] [--workers N] [--match exact|stem]
+    python -m hobbes validate [--work ID] [--no-quotes]
+    python -m hobbes align    [--work ID]
+    python -m hobbes build    [--work ID]
+    python -m hobbes export   [--work ID] [--format parquet|arrow] [--out DIR] [--force]
+    python -m hobbes concordance [--work ID] build|lookup TERM [--page N]
+    python -m hobbes serve    [--csv PATH] [--port 8765]
+    python -m hobbes standin  serve|load [--latency SPEC] [--rate-limit P] [--concurrency 1,4,8] ...
+    python -m hobbes corpus   list|build|search|term ...
+    python -m hobbes trace    TRACE.jsonl [RUN]
+
+Each command lives in its own module and is imported only when that command
+runs, so `merge` and `build` never load anthropic, PyMuPDF or asyncio (nor
+`export` pyarrow until it runs).  Keep
+it that way: a module a cheap command imports must not import a heavy
+dependency at top level.  `python benchmarks.py importtime` measures the cold
+import cost of each command with -X importtime and fails when one is over
+its budget.
+"""
+
+import argparse
+import importlib
+import sys
+
+# command -> (module, help)
+COMMANDS = {
+    "extract":  ("extract",     "extract definitions from the PDFs with the model"),
+    "merge":    (None,          "merge hand-written entries into the CSV"),
+    "crossref": ("crossrefs",   "recompute cross-refs and the graph for a work's CSV"),
+    "validate": ("validate",    "check a work's CSV rows against its chapter map and page text"),
+    "align":    ("align",       "locate each definition's quote in the PDFs' page text"),
+    "build":    ("build_site",  "build the static site"),
+    "export":   ("export",      "write the entries and graph as Arrow/Parquet for analysis"),
+    "concordance": ("concordance", "index and look up every occurrence of the terms in the text"),
+    "serve":    ("serve",       "serve the local JSON API"),
+    "standin":  ("standin",     "stand-in Messages API for extraction, and a load test against it"),
+    "corpus":   ("corpus",      "list, index and search the registered works"),
+    "trace":    ("instrument",  "summarise a trace file"),
+}
+
+MERGES = {
+    "intro": "merge_intro",
+    "class": "merge_class",
+    "enza":  "merge_enza",
+}
+
+
+def load(command, merge=None):
+    """Import and return the module that implements a command."""
+    module = MERGES[merge] if command == "merge" else COMMANDS[command][0]
+    return importlib.import_module(f"{__package__}.{module}")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    width = max(map(len, COMMANDS)) + 2
+    parser = argparse.ArgumentParser(
+        prog="hobbes", description="Hobbes Dictionary toolchain",
+        epilog="commands:\n" + "\n".join(f"  {c:<{width}}{h}" for c, (_, h) in COMMANDS.items()),
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=COMMANDS, metavar="COMMAND")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="arguments for the command")
+    args = parser.parse_args(argv[:1])
+    rest = argv[1:]
+    # Commands build their own parsers from sys.argv[0]; make usage read "hobbes build".
+    sys.argv[0] = f"hobbes {args.command}"
+
+    if args.command == "merge":
+        if not rest or rest[0] not in MERGES:
+            parser.error(f"merge needs one of: {', '.join(MERGES)}")
+        return load("merge", rest[0]).main()
+    return load(args.command).main(rest)
+
+
+if __name__ == "__main__":
+    main()
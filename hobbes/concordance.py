@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Concordance: every occurrence of every dictionary term in the full text, with
+keyword-in-context (KWIC) snippets.
+
+    python -m hobbes concordance build [--work ID]
+    python -m hobbes concordance lookup TERM [--work ID] [--page 1] [--per-page 20] [--width 60]
+
+The dictionary keeps one defining passage per term; this finds all the
+others, over the same cached PDF page text that extract_chapter_text reads.
+Each source's pages are tokenised once, with align.py's tokeniser and
+spelling keys, so a hyphen-broken "Sove-\\nraigne" and "sovereign" are the
+same word, as are "publique" and "public".  Term names are tokenised the same
+way into key sequences and put in a trie, and one pass over the word stream
+walks the trie from every position, so a multi-word term ("Law of Nature")
+costs no more to find than a single word.  Terms are grouped by slug, as in
+graph.py and the site.
+
+The index (the work's concordance file, hobbes_concordance.json for
+Leviathan) stores, per slug, where each occurrence starts and how long it is,
+in characters.  Offsets count through a source's pages joined by newlines,
+after every source before it, so one sorted list per slug covers the whole
+work.  The list is delta-encoded, like the search index's id lists
+(search_index.py).  Per source it also keeps where each page starts, the
+running-header page numbers, the chapter page spans and the page cache file
+with its PDF's SHA-1.  A lookup decodes one slug's list, slices out the
+requested page of hits, and cuts snippets for those hits from the cached
+text, so the cost does not depend on how many hits there are in total.
+
+`load_concordance` returns None when the index is missing, was built for
+other term names, or any PDF's text has changed since, so callers can
+rebuild it.  serve.py answers /concordance/<slug>?page=N from it.
+"""
+
+import argparse
+import bisect
+import hashlib
+import os
+
+from . import instrument
+from .align import tokens
+from .corpus import Corpus, header_page_numbers, page_cache_path, read_json, resolve_pages, write_json
+from .instrument import stage
+from .search_index import delta_decode, delta_encode
+from .store import BREAK_RE, TOKEN_RE, Keys, make_slug, normalise_terms
+
+CONCORDANCE_FILE = "hobbes_concordance.json"
+VERSION = 1
+PER_PAGE = 20
+MAX_PER_PAGE = 200
+WIDTH = 60          # characters of context either side of a hit
+END = -1            # trie key holding the slug ids that end at a node
+
+
+def names_digest(names):
+    h = hashlib.sha1(str(VERSION).encode())
+    for n in sorted(set(names)):
+        h.update(n.encode("utf-8"))
+        h.update(b"\n")
+    return h.hexdigest()
+
+
+def term_trie(names, keys):
+    """(slugs, display terms, trie) for the distinct names; each slug listed once."""
+    slug_of = {n: k.slug for n, k in normalise_terms(names).items()}
+    slugs, terms, ids = [], [], {}
+    trie = {}
+    for name in dict.fromkeys(names):
+        slug = slug_of[name]
+        if slug not in ids:
+            ids[slug] = len(slugs)
+            slugs.append(slug)
+            terms.append(name)
+        seq = keys.lookup([w for w, _, _ in tokens(name)])
+        if not seq:
+            continue
+        node = trie
+        for k in seq:
+            node = node.setdefault(k, {})
+        ends = node.setdefault(END, [])
+        if ids[slug] not in ends:
+            ends.append(ids[slug])
+    return slugs, terms, trie
+
+
+def build_concordance(sources, names):
+    """
+    Index dict (JSON-ready, as in the module docstring).  sources is a list of
+    {"key", "pages", "headers", "chapters": [[num, first, last], ...], "cache",
+    "sha1"}, in reading order; names are the dictionary's term names.
+    """
+    keys = Keys()
+    with stage("concordance.build", terms=len(set(names))) as rec:
+        slugs, terms, trie = term_trie(names, keys)
+        hits = [[] for _ in slugs]
+        out_sources = []
+        base = 0
+        words = 0
+        for src in sources:
+            page_starts, offset = [], 0
+            stream, starts, ends = [], [], []
+            for text in src["pages"]:
+                page_starts.append(offset)
+                found = list(TOKEN_RE.finditer(text))
+                at = base + offset
+                stream.extend([m.group() for m in found])
+                starts.extend([m.start() + at for m in found])
+                ends.extend([m.end() + at for m in found])
+                offset += len(text) + 1
+            stream = keys.lookup(stream)
+            n = len(stream)
+            for i in range(n):
+                node = trie.get(stream[i])
+                j = i
+                while node is not None:
+                    for t in node.get(END, ()):
+                        # Two names of one slug matching here: keep the longer.
+                        if hits[t] and hits[t][-1][0] == starts[i]:
+                            hits[t].pop()
+                        hits[t].append((starts[i], ends[j] - starts[i]))
+                    j += 1
+                    if j == n:
+                        break
+                    node = node.get(stream[j])
+            words += n
+            out_sources.append({"key": src["key"], "cache": src["cache"], "sha1": src["sha1"],
+                                "base": base, "page_starts": delta_encode(page_starts),
+                                "headers": src["headers"], "chapters": src["chapters"]})
+            base += offset
+        rec["words"] = words
+        rec["hits"] = sum(len(h) for h in hits)
+
+    return {
+        "version":      VERSION,
+        "names_digest": names_digest(names),
+        "words":        words,
+        "sources":      out_sources,
+        "slugs":        slugs,
+        "terms":        terms,
+        # Found in reading order, so already sorted.
+        "starts":       [delta_encode([s for s, _ in h]) for h in hits],
+        "lengths":      [[n for _, n in h] for h in hits],
+    }
+
+
+def kwic(text, start, end, width=WIDTH):
+    """(left, match, right) around text[start:end], whitespace collapsed, cut at whole words."""
+    lo, hi = max(0, start - width), min(len(text), end + width)
+    left, right = text[lo:start], text[end:hi]
+    if lo > 0 and not text[lo - 1].isspace():
+        parts = left.split(None, 1)
+        left = parts[1] if len(parts) > 1 else ""
+    if hi < len(text) and not text[hi].isspace():
+        parts = right.rsplit(None, 1)
+        right = parts[0] if len(parts) > 1 else ""
+    return tuple(" ".join(BREAK_RE.sub("", part).split()) for part in (left, text[start:end], right))
+
+
+class Concordance:
+    """A loaded index with the page text its snippets are cut from."""
+
+    def __init__(self, index, texts):
+        self.index = index
+        self.texts = texts                  # one joined text per source
+        self.ids = {slug: i for i, slug in enumerate(index["slugs"])}
+        self.bases = [s["base"] for s in index["sources"]]
+        self.page_starts = [delta_decode(s["page_starts"]) for s in index["sources"]]
+        self.chapter_pages = [sorted((first, last, num) for num, first, last in s["chapters"])
+                              for s in index["sources"]]
+        self._starts = {}
+
+    def starts(self, i):
+        if i not in self._starts:
+            self._starts[i] = delta_decode(self.index["starts"][i])
+        return self._starts[i]
+
+    def count(self, slug):
+        i = self.ids.get(slug)
+        return None if i is None else len(self.index["starts"][i])
+
+    def chapter(self, s, pdf_page):
+        for first, last, num in self.chapter_pages[s]:
+            if first <= pdf_page <= last:
+                return num
+        return None
+
+    def hit(self, start, length, width):
+        s = bisect.bisect_right(self.bases, start) - 1
+        src = self.index["sources"][s]
+        local = start - self.bases[s]
+        p = bisect.bisect_right(self.page_starts[s], local) - 1
+        left, match, right = kwic(self.texts[s], local, local + length, width)
+        return {"source": src["key"], "pdf_page": p + 1, "header": src["headers"][p],
+                "chapter": self.chapter(s, p + 1), "left": left, "match": match, "right": right}
+
+    def lookup(self, slug, page=1, per_page=PER_PAGE, width=WIDTH):
+        """One page of a slug's hits in reading order, or None for an unknown slug."""
+        i = self.ids.get(slug)
+        if i is None:
+            return None
+        starts = self.starts(i)
+        lengths = self.index["lengths"][i]
+        lo = (page - 1) * per_page
+        return {"slug": slug, "term": self.index["terms"][i], "total": len(starts),
+                "page": page, "per_page": per_page,
+                "pages": (len(starts) + per_page - 1) // per_page,
+                "hits": [self.hit(starts[j], lengths[j], width)
+                         for j in range(lo, min(lo + per_page, len(starts)))]}
+
+
+def load_concordance(path, names=None):
+    """
+    A Concordance from an index file, or None if it is missing, was built for
+    names other than `names` (when given), or a source's text has changed.
+    """
+    index = read_json(path)
+    if not index or index.get("version") != VERSION:
+        return None
+    if names is not None and index["names_digest"] != names_digest(names):
+        return None
+    root = os.path.dirname(os.path.abspath(path))
+    texts = []
+    with stage("concordance.load", path=path):
+        for src in index["sources"]:
+            cache = read_json(os.path.join(root, src["cache"]))
+            if not cache or cache["sha1"] != src["sha1"]:
+                return None
+            texts.append("\n".join(cache["pages"]))
+    return Concordance(index, texts)
+
+
+def work_sources(work, index_path):
+    """build_concordance's sources for a work, from its page cache; PDFs not found are skipped."""
+    sources = {}
+    for ch in work.chapters():
+        key = ch["source"]
+        if key not in sources:
+            try:
+                pages = work.page_texts(ch["pdf"])
+            except FileNotFoundError:
+                print(f"  {ch['pdf']} not found; its text is left out")
+                sources[key] = None
+                continue
+            cache = page_cache_path(ch["pdf"], work.pages_dir)
+            sources[key] = {"key": key, "pages": pages, "headers": header_page_numbers(pages),
+                            "chapters": [], "sha1": read_json(cache)["sha1"],
+                            "cache": os.path.relpath(cache, os.path.dirname(os.path.abspath(index_path)))}
+        src = sources[key]
+        if src is None:
+            continue
+        try:
+            first, last = resolve_pages(ch, src["headers"])
+        except ValueError as e:
+            print(f"  {e}; its pages get no chapter")
+            continue
+        src["chapters"].append([ch["num"], first, last])
+    return [s for s in sources.values() if s is not None]
+
+
+def build_for_work(work):
+    names = [e["term"] for e in work.entries()]
+    index = build_concordance(work_sources(work, work.concordance_path), names)
+    with stage("concordance.write", path=work.concordance_path):
+        write_json(work.concordance_path, index)
+    return index
+
+
+def print_page(result, width):
+    print(f"{result['term']}: {result['total']} occurrences, page {result['page']} of {max(result['pages'], 1)}")
+    for h in result["hits"]:
+        where = f"{h['chapter'] or '?':>6} p.{h['header'] or '?':<4}"
+        print(f"{where} {h['left']:>{width}} [{h['match']}] {h['right']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Every occurrence of the dictionary's terms in the full text")
+    parser.add_argument("--work", default=None, help="work id in corpus.json (default leviathan)")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("build", help="index the work's page text")
+    p = sub.add_parser("lookup", help="KWIC lines for a term")
+    p.add_argument("term", help="term name or slug")
+    p.add_argument("--page", type=int, default=1)
+    p.add_argument("--per-page", type=int, default=PER_PAGE)
+    p.add_argument("--width", type=int, default=WIDTH)
+    args = parser.parse_args(argv)
+
+    work = Corpus().work(args.work)
+    instrument.start_run(f"concordance.{args.cmd}", instrument.trace_path(work.entries_path))
+    if args.cmd == "build":
+        index = build_for_work(work)
+        found = sum(1 for s in index["starts"] if s)
+        print(f"Indexed {index['words']:,} words: {found} of {len(index['slugs'])} terms occur, "
+              f"{sum(len(s) for s in index['starts']):,} occurrences in all")
+    else:
+        conc = load_concordance(work.concordance_path)
+        if conc is None:
+            raise SystemExit(f"{work.concordance_path} is missing or stale; run `python -m hobbes concordance build`")
+        result = conc.lookup(make_slug(args.term), args.page, args.per_page, args.width)
+        if result is None:
+            raise SystemExit(f"{args.term!r} is not a dictionary term")
+        print_page(result, args.width)
+    instrument.summary()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Corpus of source works (Leviathan, De Cive, Elements of Law, other editions).
+
+    python -m hobbes corpus list
+    python -m hobbes corpus build [--work ID ...]
+    python -m hobbes corpus search QUERY [--work ID ...] [--limit 12]
+    python -m hobbes corpus term SLUG
+
+corpus.json registers each work under an id.  Every work keeps its own files,
+by default under corpus/<id>/:
+
+    chapter_map       chapters.json for that work (see extract.py)
+    entries           the work's dictionary CSV
+    graph             its cross-ref graph (graph.py)
+    related           its related-terms lists (related.py), plus the LSA
+                      vectors as a .npy file of the same name when NumPy is
+                      installed
+    align             where each definition sits in the PDFs (align.py)
+    site              its generated index.html
+    export/           Arrow/Parquet export of the entries and graph (export.py)
+    concordance       every occurrence of its terms in the text (concordance.py)
+    pages/            page-text cache, one JSON file per source PDF
+    extract_work/     per-chapter extraction checkpoints (checkpoint.py)
+    term_index.json   search index over the work's terms (search_index.py)
+    rejects.jsonl     rows the last validation kept out of the CSV (validate.py)
+
+Any of the first eight may be given explicitly in the registry; Leviathan's
+point at the original top-level files.  Paths are relative to corpus.json.
+
+Derived files are keyed on what they were built from: a page cache on the
+PDF's size, mtime and SHA-1, a term index on the CSV's size and mtime.  So
+building or searching one work reads only that work's files, and adding a
+work never invalidates another's caches.
+
+The cross-corpus index, corpus/index.json, links the same term across works:
+it holds each work's slug list with the digest it was taken from, and `build`
+refreshes only the works whose term index changed.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+
+from .instrument import stage
+from .search_index import Searcher, build_search_index
+from .store import load_entries, make_slug, normalise_terms
+
+BASE = "/Users/Chester2/Documents/Documents/projects/HobbesDictionary"
+REGISTRY = f"{BASE}/corpus.json"
+DEFAULT_WORK = "leviathan"
+CROSS_INDEX = "corpus/index.json"
+
+# Running headers: "Chap. 6. 39", "Part i. 66", "Part 2. 85" -> 39, 66, 85
+HEADER_RE = re.compile(r"^\s*(?:Chap\.\s*\d+\.|Part\s+[ivxIVX\d]+\.)\s*(\d+)\s*$", re.M)
+HEADER_LINES = 6
+
+
+def file_stamp(path):
+    """(size, mtime_ns) of a file, the cheap first check on every cache."""
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def file_sha1(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def read_json(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def page_cache_path(pdf_path, cache_dir):
+    return os.path.join(cache_dir, os.path.basename(pdf_path) + ".json")
+
+
+def load_page_texts(pdf_path, cache_dir):
+    """
+    Text of every page of a PDF, from cache_dir when the cached copy was taken
+    from this exact file, or when the PDF is gone and only the cache is left.
+    PyMuPDF is only imported on a miss.  Raises FileNotFoundError when there
+    is neither.
+    """
+    cache = page_cache_path(pdf_path, cache_dir)
+    cached = read_json(cache)
+    if not os.path.exists(pdf_path):
+        if cached:
+            return cached["pages"]
+        raise FileNotFoundError(f"No such PDF and no page-text cache: {pdf_path}")
+    stamp = file_stamp(pdf_path)
+    if cached and cached["stamp"] == stamp:
+        return cached["pages"]
+
+    sha1 = file_sha1(pdf_path)
+    if cached and cached["sha1"] == sha1:
+        # Touched but unchanged: refresh the stamp, keep the text.
+        cached["stamp"] = stamp
+        write_json(cache, cached)
+        return cached["pages"]
+
+    import fitz  # PyMuPDF
+
+    with stage("pdf.pages", path=pdf_path) as rec:
+        with fitz.open(pdf_path) as doc:
+            pages = [page.get_text() for page in doc]
+        rec["pages"] = len(pages)
+    write_json(cache, {"pdf": os.path.basename(pdf_path), "stamp": stamp, "sha1": sha1,
+                       "pages": pages})
+    return pages
+
+
+def header_page_numbers(pages):
+    """Running-header page number of each PDF page, carried forward when a page has none."""
+    with stage("pdf.headers", pages=len(pages)):
+        numbers, current = [], None
+        for text in pages:
+            top = "\n".join(text.splitlines()[:HEADER_LINES])
+            m = HEADER_RE.search(top)
+            if m:
+                current = int(m.group(1))
+            numbers.append(current)
+    return numbers
+
+
+def resolve_pages(chapter, headers):
+    """(start, end) 1-indexed inclusive PDF pages for a chapter map entry."""
+    if "pdf_pages" in chapter:
+        return tuple(chapter["pdf_pages"])
+    lo, hi = chapter["header_pages"]
+    pages = [i + 1 for i, n in enumerate(headers) if n is not None and lo <= n <= hi]
+    if not pages:
+        raise ValueError(f"Chapter {chapter['num']}: no PDF page has a running header "
+                         f"in {lo}-{hi} ({chapter['pdf']})")
+    return pages[0], pages[-1]
+
+
+class Work:
+    """One source work and the paths of everything derived from it."""
+
+    def __init__(self, root, work_id, spec):
+        self.id = work_id
+        self.title = spec.get("title", work_id)
+        self.dir = os.path.join(root, spec.get("dir", f"corpus/{work_id}"))
+        path = lambda key, default: os.path.join(root, spec[key]) if key in spec else os.path.join(self.dir, default)
+        self.chapter_map = path("chapter_map", "chapters.json")
+        self.entries_path = path("entries", "dictionary.csv")
+        self.graph_path = path("graph", "graph.json")
+        self.related_path = path("related", "related.json")
+        self.align_path = path("align", "align.json")
+        self.site_path = path("site", "index.html")
+        self.export_dir = path("export", "export")
+        self.concordance_path = path("concordance", "concordance.json")
+        self.pages_dir = os.path.join(self.dir, "pages")
+        self.work_dir = os.path.join(self.dir, "extract_work")
+        self.term_index_path = os.path.join(self.dir, "term_index.json")
+        self.rejects_path = os.path.join(self.dir, "rejects.jsonl")
+
+    def chapters(self):
+        """Chapter dicts in reading order, each with `pdf` resolved to a path."""
+        with open(self.chapter_map, encoding="utf-8") as f:
+            data = json.load(f)
+        root = os.path.dirname(os.path.abspath(self.chapter_map))
+        for ch in data["chapters"]:
+            ch["pdf"] = os.path.join(root, data["sources"][ch["source"]])
+        return data["chapters"]
+
+    def page_texts(self, pdf_path):
+        return load_page_texts(pdf_path, self.pages_dir)
+
+    def entries(self):
+        return load_entries(self.entries_path)
+
+    def term_index(self):
+        """The work's search index, rebuilt only when its CSV has changed."""
+        stamp = file_stamp(self.entries_path)
+        cached = read_json(self.term_index_path)
+        if cached and cached["stamp"] == stamp:
+            return cached
+        with stage("corpus.term_index", work=self.id) as rec:
+            entries = self.entries()
+            keys = normalise_terms(e["term"] for e in entries)
+            first = {}
+            for e in entries:
+                slug = keys[e["term"]].slug
+                first.setdefault(slug, (slug, e["term"], e["chapter"]))
+            index = {"stamp": stamp, "work": self.id, "slugs": sorted(first),
+                     "search": build_search_index(list(first.values()), keys)}
+            rec["terms"] = len(first)
+        write_json(self.term_index_path, index)
+        return index
+
+    def searcher(self):
+        return Searcher(self.term_index()["search"])
+
+
+class Corpus:
+    def __init__(self, registry=REGISTRY):
+        self.root = os.path.dirname(os.path.abspath(registry))
+        with open(registry, encoding="utf-8") as f:
+            spec = json.load(f)
+        self.works = {wid: Work(self.root, wid, w) for wid, w in spec["works"].items()}
+        self.cross_index_path = os.path.join(self.root, CROSS_INDEX)
+
+    def work(self, work_id=None):
+        work_id = work_id or DEFAULT_WORK
+        if work_id not in self.works:
+            raise KeyError(f"unknown work {work_id!r}; registered: {', '.join(self.works)}")
+        return self.works[work_id]
+
+    def select(self, work_ids=None):
+        return [self.work(w) for w in work_ids] if work_ids else list(self.works.values())
+
+    def build_cross_index(self, work_ids=None):
+        """
+        Refresh the cross-corpus index for the given works (default all),
+        keeping the stored slug lists of every other work as they are.
+        Returns the ids that were refreshed.
+        """
+        index = read_json(self.cross_index_path) or {"works": {}}
+        index["works"] = {w: v for w, v in index["works"].items() if w in self.works}
+        refreshed = []
+        with stage("corpus.cross_index") as rec:
+            for work in self.select(work_ids):
+                term_index = work.term_index()
+                have = index["works"].get(work.id)
+                if have and have["stamp"] == term_index["stamp"]:
+                    continue
+                index["works"][work.id] = {"stamp": term_index["stamp"], "slugs": term_index["slugs"]}
+                refreshed.append(work.id)
+            rec["refreshed"] = len(refreshed)
+        if refreshed or not os.path.exists(self.cross_index_path):
+            write_json(self.cross_index_path, index)
+        return refreshed
+
+    def works_with_term(self, slug):
+        """Ids of the works that define `slug`, from the cross-corpus index."""
+        index = read_json(self.cross_index_path) or {"works": {}}
+        return [w for w, v in sorted(index["works"].items()) if slug in set(v["slugs"])]
+
+    def search(self, query, work_ids=None, limit=12):
+        """Search each selected work's own index; merged, best first."""
+        hits = []
+        for work in self.select(work_ids):
+            for rank, d, term, slug, chapter in work.searcher().search(query, limit):
+                hits.append({"work": work.id, "term": term, "slug": slug, "chapter": chapter,
+                             "rank": rank, "distance": d})
+        hits.sort(key=lambda h: (h["rank"], h["distance"], h["term"].lower(), h["work"]))
+        return hits[:limit]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Source works and their indexes")
+    parser.add_argument("--registry", default=REGISTRY)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("list", help="registered works and their files")
+    p = sub.add_parser("build", help="refresh term indexes and the cross-corpus index")
+    p.add_argument("--work", action="append", help="limit to this work (repeatable)")
+    p = sub.add_parser("search", help="search term names")
+    p.add_argument("query")
+    p.add_argument("--work", action="append", help="limit to this work (repeatable)")
+    p.add_argument("--limit", type=int, default=12)
+    p = sub.add_parser("term", help="works that define a term")
+    p.add_argument("slug")
+    args = parser.parse_args(argv)
+
+    corpus = Corpus(args.registry)
+    if args.cmd == "list":
+        for work in corpus.works.values():
+            print(f"{work.id:<14} {work.title}")
+            files = (("chapters", work.chapter_map), ("entries", work.entries_path),
+                     ("graph", work.graph_path), ("related", work.related_path),
+                     ("align", work.align_path), ("site", work.site_path),
+                     ("export", work.export_dir), ("concordance", work.concordance_path),
+                     ("dir", work.dir))
+            width = max(len(label) for label, _ in files) + 1
+            for label, path in files:
+                mark = "" if os.path.exists(path) else "  (missing)"
+                print(f"    {label:<{width}} {os.path.relpath(path, corpus.root)}{mark}")
+    elif args.cmd == "build":
+        refreshed = corpus.build_cross_index(args.work)
+        print(f"Refreshed: {', '.join(refreshed) or 'nothing (all current)'}")
+    elif args.cmd == "search":
+        for h in corpus.search(args.query, args.work, args.limit):
+            print(f"{h['work']:<14} {h['term']:<40} {h['chapter']}")
+    elif args.cmd == "term":
+        print("\n".join(corpus.works_with_term(make_slug(args.slug))) or "no work defines it")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Cross-reference computation shared by the extraction and merge scripts.
+
+For each definition, find which other defined terms appear in its text and
+write them back as a sorted "; "-joined cross_refs string.  TermMatcher
+matches whole words, case-insensitively, with each pattern compiled once;
+StemMatcher (match="stem") also links inflected and early-modern forms
+("Lawes" to Law) by running each definition's word keys through one
+Aho-Corasick automaton over the terms.  workers > 1 splits the definitions
+across a process pool with identical output.
+
+    python -m hobbes crossref [--work ID] [--workers N] [--match exact|stem]
+"""
+
+import os
+import re
+from collections import Counter
+
+from .store import JOINED_TOKEN_RE, LEVEL, Entries, Keys, load_entries, spelling_key, write_entries
+
+# Below this many definitions, pool start-up costs more than it saves.
+PARALLEL_MIN_ROWS = 2_000
+
+HYPHEN_RE = re.compile(r"[-\u00ad]")
+INFLECTIONS = ("ing", "eth", "ed")
+MIN_STEM = 3
+# A final -s is a plural only if MIN_STEM letters are left, and never on these
+# endings (glass, thus, this) or on words that merely look plural.
+KEEP_S = ("ss", "us", "is")
+SINGULARS = {"news", "means", "series", "species"}
+# Irregular forms, as levelled keys with the inflection already stripped.
+LEMMAS = {"men": "man", "women": "woman", "children": "child", "shew": "show", "oneli": "onli"}
+# The only doubled letters levelled: old spellings that double a final
+# consonant.  Doubled letters are otherwise kept, so "god" and "good" differ.
+DOUBLES = [
+    (re.compile(r"(?<=[aeiou])([dgnprt])\1e$"), r"\1"),     # warre, sinne, sonne
+    (re.compile(r"(?<=\w\w[aeiu])ll$"), "l"),                # naturall, civill, powerfull
+]
+# Early-modern endings and spellings that a plain key leaves apart.
+VARIANTS = [
+    (re.compile(r"aign"), "eign"),          # soveraign(e), raigne
+    (re.compile(r"our$"), "or"),            # honour, labour
+    (re.compile(r"ick$"), "ic"),            # publick, politick
+]
+
+
+def part_key(w):
+    """spelling_key of one part of a word, doubling levelled only by DOUBLES."""
+    for rx, repl in DOUBLES:
+        w = rx.sub(repl, w)
+    return spelling_key(w, keep_doubles=True)
+
+
+def inflection_key(folded):
+    """
+    store.spelling_key with inflections stripped as well: "Lawes", "laws" and
+    "law" meet, as do "covenanted", "covenants" and "covenant", "Gods" and
+    "God", "Soveraign" and "sovereign".  A plural -s comes off first (see
+    KEEP_S), then one of INFLECTIONS, never leaving fewer than MIN_STEM
+    letters; then LEMMAS, DOUBLES and spelling_key's other rules.  A
+    hyphenated word is keyed part by part and the parts joined, so
+    "vaine-glory", "Vain-Glory" and "vainglory" meet; VARIANTS apply to the
+    whole.
+    """
+    *head, w = HYPHEN_RE.split(folded)
+    if (len(w) > MIN_STEM and w.endswith("s") and not w.endswith(KEEP_S)
+            and w not in SINGULARS):
+        w = w[:-1]
+    w = w.translate(LEVEL)
+    for suffix in INFLECTIONS:
+        if w.endswith(suffix) and len(w) - len(suffix) >= MIN_STEM:
+            w = w[:-len(suffix)]
+            break
+    w = "".join([part_key(part) for part in head] + [part_key(LEMMAS.get(w, w))])
+    for rx, repl in VARIANTS:
+        w = rx.sub(repl, w)
+    return w
+
+
+class TermMatcher:
+    """Whole-word, case-insensitive matcher over a fixed list of terms."""
+
+    def __init__(self, terms):
+        # A term defined in several chapters is listed once per definition and
+        # so appears once per definition in cross_refs; keep that multiplicity
+        # but only compile each pattern once.
+        self.patterns = [
+            (term, term.lower(), count, re.compile(r"\b" + re.escape(term.lower()) + r"\b"))
+            for term, count in Counter(terms).items()
+        ]
+
+    def refs(self, own_term, text):
+        """Sorted "; "-joined terms found in text, excluding own_term itself."""
+        return "; ".join(self.find(own_term, text))
+
+    def find(self, own_term, text):
+        """Sorted list of the terms found in text, excluding own_term itself."""
+        own = own_term.lower()
+        text = text.lower()
+        found = []
+        for term, term_lower, count, rx in self.patterns:
+            if term_lower == own or term_lower not in text:
+                continue
+            if rx.search(text):
+                found.extend([term] * count)
+        found.sort()
+        return found
+
+
+class StemMatcher:
+    """Inflection-aware matcher: one automaton over the terms' word-key sequences."""
+
+    def __init__(self, terms):
+        self.words = JOINED_TOKEN_RE.findall
+        self.keys = Keys(inflection_key)
+        counts = Counter(terms)
+        self.terms = list(counts)
+        self.counts = [counts[t] for t in self.terms]
+        self.seqs = [tuple(self.keys.lookup(self.words(t))) for t in self.terms]
+
+        # Trie of the key sequences, then failure links breadth-first; each
+        # state's outputs include those of the states its failure chain reaches.
+        self.goto, self.out = [{}], [[]]
+        for t, seq in enumerate(self.seqs):
+            if not seq:
+                continue
+            state = 0
+            for k in seq:
+                if k not in self.goto[state]:
+                    self.goto[state][k] = len(self.goto)
+                    self.goto.append({})
+                    self.out.append([])
+                state = self.goto[state][k]
+            self.out[state].append(t)
+        self.fail = [0] * len(self.goto)
+        queue = list(self.goto[0].values())     # depth 1 fails to the root
+        for state in queue:
+            for k, nxt in self.goto[state].items():
+                f = self.fail[state]
+                while f and k not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(k, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+                queue.append(nxt)
+
+    def refs(self, own_term, text):
+        return "; ".join(self.find(own_term, text))
+
+    def find(self, own_term, text):
+        """Sorted list of the terms found in text, excluding any with own_term's keys."""
+        own = tuple(self.keys.lookup(self.words(own_term)))
+        goto, fail, out = self.goto, self.fail, self.out
+        hits = set()
+        state = 0
+        for k in self.keys.lookup(self.words(text)):
+            while state and k not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(k, 0)
+            if out[state]:
+                hits.update(out[state])
+        found = []
+        for t in hits:
+            if self.seqs[t] != own:
+                found.extend([self.terms[t]] * self.counts[t])
+        found.sort()
+        return found
+
+
+MATCHERS = {"exact": TermMatcher, "stem": StemMatcher}
+
+_worker_matcher = None
+
+
+def _init_worker(terms, match="exact"):
+    global _worker_matcher
+    _worker_matcher = MATCHERS[match](terms)
+
+
+def _match_chunk(chunk):
+    return [_worker_matcher.refs(term, text) for term, text in chunk]
+
+
+def compute_cross_refs(all_definitions, workers=1, chunk_size=None, match="exact"):
+    """Return the cross_refs string for each definition, in order."""
+    terms = [d["term"] for d in all_definitions]
+    jobs = [(d["term"], d.get("definition", "")) for d in all_definitions]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or len(jobs) < PARALLEL_MIN_ROWS:
+        matcher = MATCHERS[match](terms)
+        return [matcher.refs(term, text) for term, text in jobs]
+
+    # A few chunks per worker keeps the pool busy when definition lengths vary.
+    chunk_size = chunk_size or max(1, len(jobs) // (workers * 4))
+    chunks = [jobs[i:i + chunk_size] for i in range(0, len(jobs), chunk_size)]
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(terms, match)) as pool:
+        return [refs for chunk in pool.map(_match_chunk, chunks) for refs in chunk]
+
+
+def add_cross_refs(all_definitions, workers=1, match="exact"):
+    """
+    Post-process: for each definition's text, find which other defined terms appear in it.
+    Uses whole-word matching, case-insensitive, or with match="stem" inflection-aware
+    (StemMatcher).  workers=None uses every core.
+    """
+    if isinstance(all_definitions, Entries) and (
+            workers == 1 or len(all_definitions) < PARALLEL_MIN_ROWS):
+        matcher = MATCHERS[match](all_definitions.get(i, "term") for i in range(len(all_definitions)))
+        for i in range(len(all_definitions)):
+            all_definitions.set_refs(i, matcher.find(all_definitions.get(i, "term"),
+                                                     all_definitions.get(i, "definition")))
+        return all_definitions
+    for defn, refs in zip(all_definitions, compute_cross_refs(all_definitions, workers, match=match)):
+        defn["cross_refs"] = refs
+    return all_definitions
+
+
+def main(argv=None):
+    import argparse
+
+    from . import instrument
+    from .corpus import Corpus
+    from .graph import build_graph, write_graph
+    from .instrument import stage
+
+    parser = argparse.ArgumentParser(description="Recompute cross-refs and the graph for a work's CSV")
+    parser.add_argument("--work", default=None, help="work id in corpus.json (default leviathan)")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: every core)")
+    parser.add_argument("--match", choices=sorted(MATCHERS), default="exact",
+                        help="exact term strings, or stem to link inflected and early-modern forms too")
+    args = parser.parse_args(argv)
+
+    work = Corpus().work(args.work)
+    instrument.start_run("crossref", instrument.trace_path(work.entries_path))
+    entries = load_entries(work.entries_path)
+    with stage("crossrefs", rows=len(entries)):
+        entries = add_cross_refs(entries, workers=args.workers, match=args.match)
+    write_entries(work.entries_path, entries)
+    write_graph(build_graph(entries), work.graph_path)
+    print(f"Recomputed cross-refs for {len(entries)} entries in {work.entries_path}")
+    instrument.summary()
+
+
+if __name__ == "__main__":
+    main()
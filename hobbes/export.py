@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Columnar export of a work's dictionary and cross-ref graph, for analysis.
+
+    python -m hobbes export [--work ID] [--format parquet|arrow] [--out DIR] [--force]
+
+Notebooks can read this instead of reparsing the CSV and re-splitting
+cross_refs.  The export directory (the work's export dir, corpus/<id>/export
+by default) holds:
+
+    entries/book=<B>/part-0.parquet
+                    one partition per book of Leviathan (BOOK_RANGES, the
+                    page script's grouping), rows in CSV order:
+        term_id       int32, the term's id in terms
+        term          string
+        definition    string
+        chapter       dictionary<int32, string>
+        page_number   string, as in the CSV
+        cross_refs    list<int32> of term ids
+        context       string
+    terms.parquet   id, name and slug of every term and cross-ref name; for
+                    names that are graph nodes (graph.py) also node,
+                    out_degree, in_degree and pagerank, null otherwise
+    edges.parquet   source, target: term ids of the graph's "See Also" edges,
+                    each node standing for its first term
+    manifest.json   format, term count and a digest per book
+
+`book` is the hive partition key, so a dataset reader sees it as a
+dictionary<int32, string> column and a filter on it opens only that book's
+files.  `read_entries` does that, memory-mapping the files; a chapter filter
+is answered from the chapter column's dictionary and Parquet's statistics
+without decoding any definition text.  With --format arrow the files are
+uncompressed Arrow IPC (.arrow) instead, which map straight into memory.
+
+The export is incremental.  Term ids never change once given: the previous
+terms table is read back and new names are appended to it, so a book's
+partition stays valid while its rows do.  A partition is rewritten only when
+the digest of its rows differs from the manifest's; partitions of books that
+are gone are removed.  terms and edges are rewritten when anything changed.
+Each file is written under a temporary name and renamed into place, and the
+manifest goes last.
+
+pyarrow is optional for everything else and only imported here.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+
+from . import instrument
+from .corpus import Corpus
+from .graph import build_graph, load_graph
+from .instrument import stage
+from .store import CHAPTER_RE, FIELDNAMES, load_term_keys, split_refs, term_names
+
+# Bump when the layout or any column changes, so every partition is rewritten.
+EXPORT_VERSION = 1
+MANIFEST = "manifest.json"
+EXTENSIONS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+# Must match BOOK_RANGES in build_site's page script.
+BOOK_RANGES = {
+    "I":    ["Intro", "I", "II", "III", "IV", "V", "VI", "VII", "VIII", "IX", "X", "XI", "XII",
+             "XIII", "XIV", "XV", "XVI"],
+    "II":   ["XVII", "XVIII", "XIX", "XX", "XXI", "XXII", "XXIII", "XXIV", "XXV", "XXVI",
+             "XXVII", "XXVIII", "XXIX", "XXX", "XXXI"],
+    "III":  ["XXXII", "XXXIII", "XXXIV", "XXXV", "XXXVI", "XXXVII", "XXXVIII", "XXXIX", "XL",
+             "XLI", "XLII", "XLIII"],
+    "IV":   ["XLIV", "XLV", "XLVI", "XLVII"],
+    "1061": ["1061"],
+}
+BOOK_OF = {ch: book for book, chs in BOOK_RANGES.items() for ch in chs}
+
+
+def import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        sys.exit("export needs pyarrow: pip install pyarrow")
+    return pyarrow
+
+
+def book_of(chapter):
+    """Book of a CSV chapter string; like the page's bookOfChapter, "I" when unknown."""
+    m = CHAPTER_RE.match(chapter)
+    return BOOK_OF.get(m.group(1), "I") if m else "I"
+
+
+def rows_digest(rows):
+    h = hashlib.sha1(str(EXPORT_VERSION).encode())
+    for e in rows:
+        for field in FIELDNAMES:
+            h.update(e[field].encode("utf-8"))
+            h.update(b"\0")
+        h.update(b"\n")
+    return h.hexdigest()
+
+
+def read_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    return manifest if manifest.get("version") == EXPORT_VERSION else None
+
+
+def read_table(path, fmt, columns=None):
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        return pq.read_table(path, columns=columns, memory_map=True)
+    import pyarrow.feather as feather
+    return feather.read_table(path, columns=columns, memory_map=True)
+
+
+def write_table(table, path, fmt):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        pq.write_table(table, tmp)
+    else:
+        import pyarrow.feather as feather
+        feather.write_feather(table, tmp, compression="uncompressed")
+    os.replace(tmp, path)
+
+
+def partition_path(out_dir, book, fmt):
+    return os.path.join(out_dir, "entries", f"book={book}", "part-0" + EXTENSIONS[fmt])
+
+
+def entries_table(pa, rows, ids):
+    """One book's rows as an Arrow table in the entries layout."""
+    return pa.table({
+        "term_id":     pa.array([ids[e["term"]] for e in rows], pa.int32()),
+        "term":        pa.array([e["term"] for e in rows], pa.string()),
+        "definition":  pa.array([e["definition"] for e in rows], pa.string()),
+        "chapter":     pa.array([e["chapter"] for e in rows], pa.string()).dictionary_encode(),
+        "page_number": pa.array([e["page_number"] for e in rows], pa.string()),
+        "cross_refs":  pa.array([[ids[r] for r in split_refs(e["cross_refs"])] for e in rows],
+                                pa.list_(pa.int32())),
+        "context":     pa.array([e["context"] for e in rows], pa.string()),
+    })
+
+
+def terms_table(pa, names, keys, graph):
+    """Every term id's name and slug, with its graph node's figures where it has one."""
+    node_of = {slug: u for u, slug in enumerate(graph["slugs"])}
+    nodes = [node_of.get(keys[n].slug) if n in keys else None for n in names]
+    pick = lambda column: [None if u is None else graph[column][u] for u in nodes]
+    return pa.table({
+        "id":         pa.array(range(len(names)), pa.int32()),
+        "name":       pa.array(names, pa.string()),
+        "slug":       pa.array([keys[n].slug if n in keys else None for n in names], pa.string()),
+        "node":       pa.array(nodes, pa.int32()),
+        "out_degree": pa.array(pick("out_degree"), pa.int32()),
+        "in_degree":  pa.array(pick("in_degree"), pa.int32()),
+        "pagerank":   pa.array(pick("pagerank"), pa.float64()),
+    })
+
+
+def edges_table(pa, graph, ids):
+    """The graph's out edges as (source, target) term ids."""
+    source, target = [], []
+    indptr, indices = graph["out"]["indptr"], graph["out"]["indices"]
+    for u, term in enumerate(graph["terms"]):
+        for v in indices[indptr[u]:indptr[u + 1]]:
+            source.append(ids[term])
+            target.append(ids[graph["terms"][v]])
+    return pa.table({"source": pa.array(source, pa.int32()),
+                     "target": pa.array(target, pa.int32())})
+
+
+def export(work, out_dir, fmt="parquet", force=False):
+    """
+    Bring out_dir up to date with the work's CSV and graph.  Returns
+    {"written": [...], "kept": [...], "removed": [...]} of book names.
+    """
+    pa = import_pyarrow()
+    rows = work.entries()
+    keys = load_term_keys(work.entries_path, rows)
+    graph = load_graph(work.graph_path, rows) or build_graph(rows, keys)
+
+    terms_path = os.path.join(out_dir, "terms" + EXTENSIONS[fmt])
+    edges_path = os.path.join(out_dir, "edges" + EXTENSIONS[fmt])
+    old = None if force else read_manifest(out_dir)
+    names = []
+    if old is not None and old.get("format") == fmt and os.path.exists(terms_path):
+        names = read_table(terms_path, fmt, columns=["name"]).column("name").to_pylist()
+    if old is not None and len(names) != old.get("terms"):
+        # Another format, or terms that do not match the manifest: start again.
+        names, old = [], None
+    if old is None:
+        shutil.rmtree(os.path.join(out_dir, "entries"), ignore_errors=True)
+        for ext in EXTENSIONS.values():
+            for table in ("terms", "edges"):
+                if os.path.exists(os.path.join(out_dir, table + ext)):
+                    os.remove(os.path.join(out_dir, table + ext))
+    ids = {n: i for i, n in enumerate(names)}
+    for n in term_names(rows):
+        if n not in ids:
+            ids[n] = len(names)
+            names.append(n)
+
+    books = {}
+    for e in rows:
+        books.setdefault(book_of(e["chapter"]), []).append(e)
+
+    have = old["books"] if old is not None else {}
+    result = {"written": [], "kept": [], "removed": []}
+    digests = {}
+    with stage("export", rows=len(rows), format=fmt) as rec:
+        for book, book_rows in books.items():
+            digest = digests[book] = rows_digest(book_rows)
+            path = partition_path(out_dir, book, fmt)
+            if have.get(book) == digest and os.path.exists(path):
+                result["kept"].append(book)
+                continue
+            with stage("export.partition", book=book, rows=len(book_rows)):
+                write_table(entries_table(pa, book_rows, ids), path, fmt)
+            result["written"].append(book)
+        for book in have:
+            if book not in books:
+                shutil.rmtree(os.path.dirname(partition_path(out_dir, book, fmt)), ignore_errors=True)
+                result["removed"].append(book)
+
+        changed = result["written"] or result["removed"] or old is None \
+            or old.get("terms") != len(names) or old.get("graph") != graph["source_digest"]
+        if changed or not os.path.exists(terms_path) or not os.path.exists(edges_path):
+            write_table(terms_table(pa, names, keys, graph), terms_path, fmt)
+            write_table(edges_table(pa, graph, ids), edges_path, fmt)
+        rec.update(written=len(result["written"]), kept=len(result["kept"]),
+                   removed=len(result["removed"]), terms=len(names))
+
+    manifest = {"version": EXPORT_VERSION, "format": fmt, "terms": len(names),
+                "graph": graph["source_digest"], "books": digests}
+    tmp = os.path.join(out_dir, MANIFEST + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, os.path.join(out_dir, MANIFEST))
+    return result
+
+
+def read_entries(out_dir, chapter=None, book=None, columns=None):
+    """
+    The exported entries as a pyarrow Table, memory-mapped, optionally only
+    one chapter's (the CSV's chapter string) or one book's rows.
+    """
+    pa = import_pyarrow()
+    import pyarrow.dataset as ds
+    from pyarrow.fs import LocalFileSystem
+
+    manifest = read_manifest(out_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"no export in {out_dir}; run `python -m hobbes export`")
+    dataset = ds.dataset(os.path.join(out_dir, "entries"),
+                         format="parquet" if manifest["format"] == "parquet" else "ipc",
+                         partitioning=ds.HivePartitioning.discover(infer_dictionary=True),
+                         filesystem=LocalFileSystem(use_mmap=True))
+    where = None
+    for field, value in (("chapter", chapter), ("book", book)):
+        if value is not None:
+            test = ds.field(field) == pa.scalar(value)
+            where = test if where is None else where & test
+    return dataset.to_table(columns=columns, filter=where)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export a work's dictionary and graph as Arrow/Parquet")
+    parser.add_argument("--work", default=None, help="work id in corpus.json (default leviathan)")
+    parser.add_argument("--format", choices=sorted(EXTENSIONS), default="parquet")
+    parser.add_argument("--out", default=None, help="export directory (default the work's)")
+    parser.add_argument("--force", action="store_true", help="rewrite every partition")
+    args = parser.parse_args(argv)
+
+    work = Corpus().work(args.work)
+    instrument.start_run("export", instrument.trace_path(work.entries_path))
+    out_dir = args.out or work.export_dir
+    result = export(work, out_dir, args.format, args.force)
+    print(f"Exported to {out_dir}: {len(result['written'])} books written "
+          f"({', '.join(result['written']) or 'none'}), {len(result['kept'])} unchanged"
+          + (f", {len(result['removed'])} removed" if result["removed"] else ""))
+    instrument.summary()
+
+
+if __name__ == "__main__":
+    main()
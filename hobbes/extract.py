@@ -0,0 +1,502 @@
+#!/usr/bin/env python3
+"""
+Hobbes Dictionary Extractor
+Extracts definitions from every chapter of a work (default Leviathan) using
+Claude Sonnet and writes the dictionary CSV: term, definition, chapter,
+page_number, cross_refs, context.
+
+The chapter map named in corpus.json says which PDF pages make up each
+chapter.  Chapters are planned against the budget (budget.py), extracted by a
+pool of threads, and checkpointed one by one (checkpoint.py), so a rerun
+resumes where the last one stopped.  Chapters whose page text changed are
+spliced into the existing CSV (pagediff.py); rows pass validate.py before
+they are written, and a run that changes no row writes nothing.
+
+    python -m hobbes extract [--work leviathan] [--concurrency 4]
+                             [--redo XIV ...] [--priority VI ...]
+                             [--max-usd 2.50] [--max-tokens N] [--plan]
+                             [--route] [--api-url URL] [--record DIR]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import anthropic
+
+from . import instrument, pagediff, routing
+from .align import realign
+from .budget import MAX_TOKENS_CAP, Budget, OverBudget, plan_chapter, run_scheduled, schedule
+from .checkpoint import chapter_key, read_checkpoint, retry, save_checkpoint
+from .corpus import Corpus, header_page_numbers, resolve_pages
+from .crossrefs import add_cross_refs
+from .graph import build_graph, write_graph
+from .instrument import stage
+from .model_output import model_rows, parse_definitions
+from .standin import save_recording
+from .store import FIELDNAMES, Entries, iter_entries, load_entries, write_entries
+from .validate import Validator
+
+MODEL = "claude-sonnet-4-6"
+CONCURRENCY = 4
+
+PARTS = {1: "Of Man", 2: "Of Commonwealth", 3: "Of a Christian Commonwealth",
+         4: "Of the Kingdom of Darkness"}
+
+
+class Truncated(Exception):
+    """The reply stopped at max_tokens, so its JSON array is incomplete."""
+
+
+# Transient failures worth another attempt: network errors and timeouts, 429s,
+# 5xx/overloaded responses, replies cut off at max_tokens, and replies that did
+# not parse as JSON.  Anything else (bad request, auth) fails the run immediately.
+RETRYABLE = (
+    anthropic.APIConnectionError,
+    anthropic.RateLimitError,
+    anthropic.InternalServerError,
+    Truncated,
+    json.JSONDecodeError,
+)
+
+SYSTEM_PROMPT = """You are a meticulous scholar of Thomas Hobbes' Leviathan (1651 original edition).
+Your task: identify EVERY term that Hobbes explicitly or implicitly defines in the chapter text.
+Be exhaustive — Hobbes treats definitions as the foundation of science, so err on the side of inclusion.
+
+SIGNALS THAT A TERM IS BEING DEFINED:
+1. ALL CAPS terms at their first major appearance (e.g., SENSE, IMAGINATION, ENDEAVOUR)
+2. Explicit formulas: "is called", "is nothing but", "I call", "By X I mean/understand", "properly is", "properly signifieth", "is properly", "we call", "which we call"
+3. Marginal annotations in the text (appear as short labels at the start of paragraphs or inline — these name the concept being defined in that paragraph)
+4. Latin terms followed by English explanations
+5. SEQUENCES of definitions — Hobbes often defines many related terms in rapid succession. Capture every item, including:
+   - The passion sequences in Chapter VI (appetite, desire, love, aversion, hate, joy, grief, pleasure, pain, fear, courage, anger, hope, despair, trust, diffidence, indignation, benevolence, covetousness, ambition, pusillanimity, magnanimity, valour, liberality, and many more)
+   - The honour/dishonour sequences in Chapter X (every act that is defined as honouring or dishonouring)
+   - The power types in Chapter X (natural power, instrumental power, etc.)
+   - The virtue/vice and intellectual virtue sequences in Chapter VIII
+   - The law of nature sequences in Chapters XIV and XV (every numbered or named law)
+   - Any other sequence where Hobbes enumerates and defines multiple related concepts
+6. Conceptual distinctions where Hobbes differentiates two closely related terms (e.g. counsel vs command, sign vs token)
+7. Terms that receive a full paragraph of explanation even without an explicit "is called" formula
+
+PAGE NUMBERS: The running headers look like "Chap. 6. 39" (chapter, then page number) or "Part i. 66".
+Extract the page number as the last number in such a header nearest to where the definition appears.
+If only bracket numbers like [23] are available, use those.
+
+Return a JSON array of objects. Each object must have exactly these keys:
+- "term": Title Case name of the defined concept (e.g. "Sense", "Right of Nature")
+- "definition": Direct quote of Hobbes's definition (the actual sentence(s) he uses; keep it faithful to the text)
+- "page_number": string, the editor's running-header page number nearest this definition
+- "context": brief scholarly note — e.g. "first of a sequence of passion definitions", "contrasted with Counsel", "foundation for the argument on natural law", "marginal label: Power"
+
+Return ONLY the JSON array, no other text."""
+
+EXTRACTION_PROMPT = """Chapter {chapter_num}: {chapter_title}
+
+The text below comes from the 1651 edition of Hobbes's Leviathan, Part {part} ({part_title}).
+Running headers show the page number, e.g. "Chap. 6. 39" means page 39.
+Bracket numbers like [23] are original 1651 page numbers.
+
+Extract every defined term exhaustively. Pay special attention to any list or sequence where Hobbes defines multiple items in succession.
+
+TEXT:
+{text}
+
+Return a JSON array only."""
+
+
+def extract_chapter_text(pages, start_page, end_page):
+    """Join the text of PDF pages start..end (1-indexed), annotating each PDF page."""
+    with stage("pdf.extract", pages=end_page - start_page + 1) as rec:
+        pages_text = []
+        for page_num in range(start_page - 1, end_page):  # Convert to 0-indexed
+            text = pages[page_num]
+            pages_text.append(f"[PDF page {page_num + 1}]\n{text}")
+        text = "\n".join(pages_text)
+        rec["chars"] = len(text)
+    return text
+
+
+def render_prompt(chapter_num, chapter_title, part, text):
+    with stage("prompt.render", chapter=chapter_num) as rec:
+        prompt = EXTRACTION_PROMPT.format(
+            chapter_num=chapter_num,
+            chapter_title=chapter_title,
+            part=part,
+            part_title=PARTS[part],
+            text=text
+        )
+        rec["chars"] = len(prompt)
+    return prompt
+
+
+def call_sonnet(client, chapter_num, chapter_title, part, text, max_tokens=8192, on_usage=None,
+                model=MODEL, on_reply=None):
+    """
+    Send chapter text to Claude (Sonnet unless model says otherwise) for
+    definition extraction.  on_usage, if given, is called with a dict of the
+    model, input_tokens, output_tokens, cost_usd and seconds of every reply,
+    including one that is then rejected as truncated; on_reply likewise with
+    the model, max_tokens, stop_reason, usage and raw text.
+    """
+    prompt = render_prompt(chapter_num, chapter_title, part, text)
+
+    print(f"  Calling {model} for Chapter {chapter_num}: {chapter_title} (max_tokens {max_tokens})...")
+    with stage("model.call", chapter=chapter_num, model=model, max_tokens=max_tokens) as rec:
+        # Stream so time-to-first-token can be measured separately from total latency.
+        t0 = time.perf_counter()
+        chunks = []
+        with client.messages.stream(
+            model=model,
+            max_tokens=max_tokens,
+            system=SYSTEM_PROMPT,
+            messages=[{"role": "user", "content": prompt}]
+        ) as stream:
+            for chunk in stream.text_stream:
+                if not chunks:
+                    rec["ttft_s"] = round(time.perf_counter() - t0, 6)
+                chunks.append(chunk)
+            response = stream.get_final_message()
+
+        input_tokens = response.usage.input_tokens
+        output_tokens = response.usage.output_tokens
+        cost = instrument.estimate_cost(model, input_tokens, output_tokens)
+        rec.update(input_tokens=input_tokens, output_tokens=output_tokens, cost_usd=cost,
+                   stop_reason=response.stop_reason)
+        if on_usage is not None:
+            on_usage({"model": model, "input_tokens": input_tokens, "output_tokens": output_tokens,
+                      "cost_usd": cost, "seconds": round(time.perf_counter() - t0, 3)})
+        if on_reply is not None:
+            on_reply({"model": model, "max_tokens": max_tokens, "stop_reason": response.stop_reason,
+                      "usage": {"input_tokens": input_tokens, "output_tokens": output_tokens},
+                      "text": "".join(chunks)})
+        if response.stop_reason == "max_tokens":
+            raise Truncated(f"reply stopped at max_tokens={max_tokens}")
+
+    with stage("json.parse", chapter=chapter_num) as rec:
+        raw = "".join(chunks)
+        try:
+            definitions = parse_definitions(raw)
+        except json.JSONDecodeError as e:
+            print(f"  WARNING: JSON parse error for Chapter {chapter_num}: {e}")
+            print(f"  Raw response (first 800 chars): {raw[:800]}")
+            rec["error"] = "json"
+            raise
+        rec["definitions"] = len(definitions)
+
+    print(f"  -> {len(definitions)} definitions | {input_tokens}in / {output_tokens}out tokens | ~${cost:.4f}")
+
+    return definitions
+
+
+def checkpoint_key(chapter, routed=False):
+    """Keyed on the map entry, not resolved pages, so skipping needs no PDF."""
+    pages = chapter.get("pdf_pages") or ("header", *chapter["header_pages"])
+    policy = ("routed", routing.SMALL_MODEL, routing.SPARSE_DEFS, routing.SPARSE_DENSITY,
+              routing.MIN_YIELD, routing.MIN_QUOTED) if routed else ()
+    return chapter_key(MODEL, SYSTEM_PROMPT, EXTRACTION_PROMPT, chapter["source"],
+                       chapter["num"], chapter["title"], *pages, *policy)
+
+
+def tag_chapter(definitions, chapter_num, chapter_title):
+    for defn in definitions:
+        defn["chapter_num"] = chapter_num
+        defn["chapter_title"] = chapter_title
+        defn["chapter"] = f"Chapter {chapter_num}: {chapter_title}"
+    return definitions
+
+
+def extract_one(client, chapter, text, pages, key, work_dir, plan, budget, record_dir=None,
+                text_sha1=None):
+    """
+    Worker: extract one chapter with retries and checkpoint the result.  A
+    truncated reply doubles the plan's max_tokens (up to MAX_TOKENS_CAP) for
+    the next attempt.  A chapter routed to the small model is escalated to
+    MODEL if that model's calls fail or its answer does not pass
+    routing.assess.  Each call, retries included, must fit the budget
+    (Budget.cover) or OverBudget is raised before it is sent.  Every call is
+    appended to plan["calls"], and with record_dir every reply is saved there
+    for the stand-in (the last wins).
+    text_sha1, the digest of the chapter's page text, goes in the checkpoint.
+    """
+    num, title = chapter["num"], chapter["title"]
+    plan["calls"] = []
+
+    def charge(call):
+        plan["calls"].append(call)
+        budget.charge(call["input_tokens"], call["output_tokens"], call["cost_usd"], num=num)
+
+    def record(reply):
+        save_recording(record_dir, num, reply)
+
+    def attempt(model):
+        worst = instrument.estimate_cost(model, plan["input_tokens"], plan["max_tokens"])
+        if not budget.cover(num, plan["input_tokens"] + plan["max_tokens"], worst):
+            raise OverBudget(f"Chapter {num}: a call with max_tokens {plan['max_tokens']} "
+                             f"does not fit the budget ({budget.describe()})")
+        try:
+            return call_sonnet(client, num, title, chapter["book"], text,
+                               max_tokens=plan["max_tokens"], on_usage=charge, model=model,
+                               on_reply=record if record_dir else None)
+        except Truncated:
+            plan["max_tokens"] = min(MAX_TOKENS_CAP, plan["max_tokens"] * 2)
+            raise
+
+    t0 = time.perf_counter()
+    with stage("chapter", chapter=num, route=plan.get("route")) as rec:
+        try:
+            definitions = None
+            if plan["model"] != MODEL:
+                try:
+                    definitions = retry(lambda: attempt(plan["model"]), RETRYABLE,
+                                        attempts=routing.SMALL_ATTEMPTS, label=f"Chapter {num}: ")
+                    ok, why = routing.assess(definitions, plan, text)
+                except RETRYABLE as e:
+                    ok, why = False, type(e).__name__
+                if not ok:
+                    print(f"  Chapter {num}: escalating to {MODEL} ({why})")
+                    plan["escalated"] = why
+                    plan["max_tokens"] = routing.escalation_tokens(plan, definitions)
+                    definitions = None
+            if definitions is None:
+                definitions = retry(lambda: attempt(MODEL), RETRYABLE, label=f"Chapter {num}: ")
+            tag_chapter(definitions, num, title)
+            model = plan["calls"][-1]["model"]
+            save_checkpoint(work_dir, num, key, definitions, chapter_title=title,
+                            source=chapter["source"], pages=list(pages), model=model, text_sha1=text_sha1)
+        finally:
+            # A chapter that fails or runs out of budget has still paid for its calls.
+            plan["seconds"] = time.perf_counter() - t0
+            plan["cost_usd"] = sum(c["cost_usd"] for c in plan["calls"])
+        rec.update(definitions=len(definitions), planned_definitions=plan["definitions"],
+                   model=model, calls=len(plan["calls"]), escalated=bool(plan.get("escalated")),
+                   chapter_cost_usd=round(plan["cost_usd"], 6))
+    return definitions
+
+
+def read_chapters(work, chapters, texts):
+    """
+    (chapter, pages, text) for each chapter, its PDF pages resolved and its
+    text joined; each PDF's page text is read once into texts, keyed by path.
+    """
+    headers = {}
+    for ch in chapters:
+        opened = ch["pdf"] not in texts
+        if opened:
+            with stage("pdf.open", path=ch["pdf"]):
+                texts[ch["pdf"]] = work.page_texts(ch["pdf"])
+        if texts[ch["pdf"]] is None:
+            raise FileNotFoundError(f"Chapter {ch['num']} needs {ch['pdf']}")
+        if opened:
+            print(f"Opened: {ch['pdf']} ({len(texts[ch['pdf']])} pages total)")
+        if "header_pages" in ch and ch["pdf"] not in headers:
+            headers[ch["pdf"]] = header_page_numbers(texts[ch["pdf"]])
+        pages = resolve_pages(ch, headers.get(ch["pdf"]))
+        print(f"Chapter {ch['num']}: {ch['title']} (PDF pages {pages[0]}-{pages[1]})")
+        yield ch, pages, extract_chapter_text(texts[ch["pdf"]], *pages)
+
+
+def print_plans(plans, budget):
+    print(f"{'chapter':>8} {'in tok':>8} {'defs':>5} {'max_tok':>8} {'worst $':>8}  model")
+    for p in plans:
+        print(f"{p['num']:>8} {p['input_tokens']:>8,} {p['definitions']:>5} "
+              f"{p['max_tokens']:>8,} {p['worst_usd']:>8.4f}  {p['model']}")
+    total = sum(p["worst_usd"] for p in plans)
+    fits, room = 0, Budget(budget.max_tokens, budget.max_usd)
+    for p in plans:
+        fits += room.reserve(p)
+    print(f"{len(plans)} chapters, worst case ${total:.4f}; "
+          f"{fits} fit the budget ({budget.describe()})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract Hobbes's definitions from the PDFs")
+    parser.add_argument("--work", default=None, help="work id in corpus.json (default leviathan)")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY,
+                        help="chapters in flight at once")
+    parser.add_argument("--redo", action="append", default=[], metavar="CHAPTER",
+                        help="ignore the checkpoint for this chapter (repeatable)")
+    parser.add_argument("--max-usd", type=float, default=None,
+                        help="stop starting chapters once this many dollars could be spent")
+    parser.add_argument("--max-tokens", type=int, default=None,
+                        help="the same as --max-usd, in input plus output tokens")
+    parser.add_argument("--priority", action="append", default=[], metavar="CHAPTER",
+                        help="extract this chapter before the others (repeatable, in order)")
+    parser.add_argument("--plan", action="store_true",
+                        help="print each chapter's token estimates and cost and exit")
+    parser.add_argument("--route", action="store_true",
+                        help=f"send sparse chapters to {routing.SMALL_MODEL}, escalating weak answers")
+    parser.add_argument("--api-url", default=None,
+                        help="Messages API base URL, e.g. a local stand-in (python -m hobbes standin serve)")
+    parser.add_argument("--record", default=None, metavar="DIR",
+                        help="save every reply here for the stand-in to replay")
+    args = parser.parse_args(argv)
+
+    api_key = os.environ.get("ANTHROPIC_API_KEY")
+    if not api_key and not args.plan and not args.api_url:
+        print("ERROR: ANTHROPIC_API_KEY environment variable not set.")
+        sys.exit(1)
+
+    work = Corpus().work(args.work)
+    instrument.start_run("extract", instrument.trace_path(work.entries_path))
+    budget = Budget(max_tokens=args.max_tokens, max_usd=args.max_usd)
+    chapters = work.chapters()
+    print(f"{work.title}: {len(chapters)} chapters (checkpoints in {work.work_dir})...\n")
+
+    # Page text is read up front on this thread; only the model calls run in the pool.
+    texts = {}
+    hashes, ranges, digests = pagediff.work_digests(work, chapters, texts)
+    pagediff.report_changes(pagediff.load_manifest(work.work_dir), hashes, chapters, ranges)
+
+    by_chapter = {}
+    stamps = {}                 # each chapter's checkpoint, as pagediff.rows_stamp
+    todo = []
+    changed = set()             # checkpointed, but extracted from text that has since changed
+    for ch in chapters:
+        num = ch["num"]
+        key = checkpoint_key(ch, routed=args.route)
+        cp = None if num in args.redo else read_checkpoint(work.work_dir, num)
+        if cp is None or cp.get("key") != key:
+            todo.append((ch, key))
+            continue
+        digest = digests.get(num)
+        if digest is not None and cp.get("text_sha1") is None:
+            # Saved before digests were kept: trusted as before, and given today's.
+            meta = {k: v for k, v in cp.items() if k not in ("chapter_num", "key", "definitions")}
+            save_checkpoint(work.work_dir, num, key, cp["definitions"], **{**meta, "text_sha1": digest})
+        elif digest is not None and cp["text_sha1"] != digest:
+            print(f"Chapter {num}: its page text has changed since it was extracted")
+            changed.add(num)
+            todo.append((ch, key))
+            continue
+        print(f"Chapter {num}: checkpointed ({len(cp['definitions'])} definitions), skipping")
+        by_chapter[num] = cp["definitions"]
+        stamps[num] = pagediff.rows_stamp(key, digest or cp.get("text_sha1"), cp["definitions"])
+
+    # Rows per chapter from the last run: the best guess at how many come back.
+    prior = Counter()
+    if todo and os.path.exists(work.entries_path):
+        prior.update(e["chapter"] for e in iter_entries(work.entries_path))
+
+    jobs = {}
+    keys = {ch["num"]: key for ch, key in todo}
+    for ch, pages, text in read_chapters(work, [ch for ch, _ in todo], texts):
+        key = keys[ch["num"]]
+        prompt = SYSTEM_PROMPT + render_prompt(ch["num"], ch["title"], ch["book"], text)
+        plan = plan_chapter(ch["num"], prompt, text, MODEL, prior[f"Chapter {ch['num']}: {ch['title']}"])
+        if args.route:
+            routing.route(plan)
+        jobs[ch["num"]] = (ch, text, pages, key, plan)
+
+    plans = schedule([job[-1] for job in jobs.values()], args.priority)
+    if args.plan:
+        print_plans(plans, budget)
+        return
+
+    def run(plan):
+        ch, text, pages, key, _ = jobs[plan["num"]]
+        return extract_one(client, ch, text, pages, key, work.work_dir, plan, budget, args.record,
+                           digests.get(ch["num"]))
+
+    client = anthropic.Anthropic(api_key=api_key or "standin", base_url=args.api_url)
+    failed, stopped = [], []
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+        finished = run_scheduled(pool, plans, run, budget, max(1, args.concurrency))
+        while True:
+            try:
+                plan, fut = next(finished)
+            except StopIteration as stop:
+                deferred = stopped + [p["num"] for p in stop.value]
+                break
+            try:
+                num = plan["num"]
+                by_chapter[num] = fut.result()
+                stamps[num] = pagediff.rows_stamp(jobs[num][3], digests.get(num), by_chapter[num])
+            except OverBudget as e:
+                print(f"  STOPPED: {e}")
+                stopped.append(plan["num"])
+            except RETRYABLE as e:
+                print(f"  FAILED: Chapter {plan['num']} ({type(e).__name__}); will retry on next run")
+                failed.append(plan["num"])
+    routing.report(plans, time.perf_counter() - t0, args.route, instrument.tracer.path)
+    pagediff.save_manifest(work.work_dir, hashes)
+    if budget.max_tokens is not None or budget.max_usd is not None:
+        print(f"Budget: {budget.describe()}")
+
+    if failed or deferred:
+        if failed:
+            print(f"\n{len(failed)} chapter(s) failed: {', '.join(failed)}")
+        if deferred:
+            print(f"\n{len(deferred)} chapter(s) deferred by the budget: {', '.join(deferred)}")
+        print("CSV not written; re-run to extract only those chapters.")
+        instrument.summary()
+        sys.exit(1)
+
+    fresh = {ch["num"]: model_rows(by_chapter[ch["num"]]) for ch in chapters}
+    validator = Validator.for_work(work, texts)
+    existing = load_entries(work.entries_path) if os.path.exists(work.entries_path) else None
+    if existing is None:
+        all_definitions = [row for ch in chapters for row in fresh[ch["num"]]]
+    else:
+        # A chapter's CSV rows stay as they are only while they were made from
+        # its current checkpoint; a chapter whose text changed is spliced.
+        sources = pagediff.load_row_sources(work.work_dir)
+        in_csv = {}
+        for e in existing:
+            in_csv.setdefault(pagediff.chapter_num(e), []).append(e)
+        kept = sum(len(rows) for num, rows in in_csv.items() if num not in fresh)
+        if kept:
+            print(f"Keeping {kept} existing rows from chapters outside the map")
+        replacements = {}
+        for ch in chapters:
+            num = ch["num"]
+            if num in changed and num in in_csv:
+                index = validator.quote_index(ch)
+                score = lambda d: 1.0 if index is None else validator.quote_score(d, index)
+                replacements[num], counts = pagediff.splice_chapter(in_csv[num], fresh[num], score)
+                print(f"Chapter {num}: spliced, {counts['kept']} rows kept, {counts['added']} added, "
+                      f"{counts['dropped']} dropped")
+            elif num not in in_csv or sources.get(num) != stamps[num]:
+                replacements[num] = fresh[num]
+        renewed = [num for num in replacements if num in in_csv and num not in changed]
+        if renewed:
+            print(f"Rows of {len(renewed)} chapter(s) taken from their checkpoints: {', '.join(renewed)}")
+        all_definitions = pagediff.splice_entries(existing, replacements, [ch["num"] for ch in chapters])
+
+    print(f"\n{'='*60}")
+    print(f"Total definitions: {len(all_definitions)}")
+
+    all_definitions = Entries(validator.filter(all_definitions))
+    validator.report()
+
+    print("Computing cross-references...")
+    with stage("crossrefs", rows=len(all_definitions)):
+        all_definitions = add_cross_refs(all_definitions, workers=None)
+
+    if existing is not None:
+        values = lambda rows: [tuple(e[f] for f in FIELDNAMES) for e in rows]
+        if values(all_definitions) == values(existing):
+            pagediff.save_row_sources(work.work_dir, stamps)
+            print(f"No row changed; {work.entries_path} and what is built from it left as they are.")
+            instrument.summary()
+            return
+        before, after = pagediff.row_ids(existing), pagediff.row_ids(all_definitions)
+        same = len(set(before) & set(after))
+        print(f"{same} rows keep their identity, {len(after) - same} new, {len(before) - same} gone")
+
+    write_entries(work.entries_path, all_definitions)
+    pagediff.save_row_sources(work.work_dir, stamps)
+    write_graph(build_graph(all_definitions), work.graph_path)
+    realign(work, all_definitions)
+
+    print(f"CSV written to: {work.entries_path}")
+    print(f"Done! {len(all_definitions)} definitions across {len(chapters)} chapters.")
+    instrument.summary()
+
+
+if __name__ == "__main__":
+    main()
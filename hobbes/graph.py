@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Cross-reference graph over dictionary terms.
+
+Built during every merge, right after cross-refs are recomputed, and written
+next to the CSV as hobbes_graph.json.  Nodes are unique terms (one per slug)
+with integer ids; edges run from a term to each term its definitions mention.
+Adjacency is stored in CSR form, an `indptr` array of n + 1 offsets into a
+flat `indices` array, so a node's neighbours are one slice:
+
+    out       "See Also": the terms a node's definitions mention, by name
+    in        "Referenced By": the terms whose definitions mention it,
+              most central first
+    two_hop   up to TWO_HOP_K terms reachable in two steps but not one,
+              ranked by number of paths, then centrality
+
+plus per-node in/out degree and PageRank.  `source_digest` fingerprints the
+terms and cross_refs the graph was built from so readers can tell when it is
+stale and rebuild.
+"""
+
+import hashlib
+import json
+
+from .instrument import stage
+from .store import normalise_terms, split_refs, term_names
+
+GRAPH_FILE = "hobbes_graph.json"
+TWO_HOP_K = 10
+DAMPING = 0.85
+
+
+def source_digest(entries):
+    h = hashlib.sha1()
+    for e in entries:
+        h.update(e["term"].encode("utf-8"))
+        h.update(b"\0")
+        h.update(e["cross_refs"].encode("utf-8"))
+        h.update(b"\n")
+    return h.hexdigest()
+
+
+def to_csr(adjacency):
+    """List of neighbour-id lists -> {"indptr": [...], "indices": [...]}."""
+    indptr = [0]
+    indices = []
+    for nbrs in adjacency:
+        indices.extend(nbrs)
+        indptr.append(len(indices))
+    return {"indptr": indptr, "indices": indices}
+
+
+def neighbours(csr, node):
+    return csr["indices"][csr["indptr"][node]:csr["indptr"][node + 1]]
+
+
+def pagerank(out_adj, iterations=100, tol=1e-10):
+    n = len(out_adj)
+    if not n:
+        return []
+    rank = [1.0 / n] * n
+    for _ in range(iterations):
+        nxt = [0.0] * n
+        dangling = 0.0
+        for u, nbrs in enumerate(out_adj):
+            if nbrs:
+                share = rank[u] / len(nbrs)
+                for v in nbrs:
+                    nxt[v] += share
+            else:
+                dangling += rank[u]
+        base = (1 - DAMPING) / n + DAMPING * dangling / n
+        nxt = [base + DAMPING * x for x in nxt]
+        delta = sum(abs(a - b) for a, b in zip(nxt, rank))
+        rank = nxt
+        if delta < tol:
+            break
+    return rank
+
+
+def build_graph(entries, keys=None):
+    """
+    Graph dict (JSON-ready) for entries whose cross_refs are already computed.
+    keys is the {name: TermKeys} table from store.load_term_keys, normalised
+    here when not given.
+    """
+    with stage("graph.build", rows=len(entries)) as rec:
+        if keys is None:
+            keys = normalise_terms(term_names(entries))
+        ids = {}
+        slugs, terms = [], []
+        for e in entries:
+            slug = keys[e["term"]].slug
+            if slug not in ids:
+                ids[slug] = len(slugs)
+                slugs.append(slug)
+                terms.append(e["term"])
+
+        out_sets = [set() for _ in slugs]
+        for e in entries:
+            u = ids[keys[e["term"]].slug]
+            for ref in split_refs(e["cross_refs"]):
+                v = ids.get(keys[ref].slug)
+                if v is not None and v != u:
+                    out_sets[u].add(v)
+
+        out_adj = [sorted(s, key=lambda v: terms[v]) for s in out_sets]
+        rank = pagerank(out_adj)
+        by_centrality = lambda v: (-rank[v], terms[v])
+
+        in_sets = [[] for _ in slugs]
+        for u, nbrs in enumerate(out_adj):
+            for v in nbrs:
+                in_sets[v].append(u)
+        in_adj = [sorted(s, key=by_centrality) for s in in_sets]
+
+        two_hop = []
+        for u, nbrs in enumerate(out_adj):
+            direct = set(nbrs)
+            paths = {}
+            for v in nbrs:
+                for w in out_adj[v]:
+                    if w != u and w not in direct:
+                        paths[w] = paths.get(w, 0) + 1
+            ranked = sorted(paths, key=lambda w: (-paths[w], -rank[w], terms[w]))
+            two_hop.append(ranked[:TWO_HOP_K])
+
+        rec["nodes"] = len(slugs)
+        rec["edges"] = sum(len(n) for n in out_adj)
+
+    return {
+        "source_digest": source_digest(entries),
+        "slugs":         slugs,
+        "terms":         terms,
+        "out":           to_csr(out_adj),
+        "in":            to_csr(in_adj),
+        "two_hop":       to_csr(two_hop),
+        "out_degree":    [len(n) for n in out_adj],
+        "in_degree":     [len(n) for n in in_adj],
+        "pagerank":      [round(r, 8) for r in rank],
+    }
+
+
+def write_graph(graph, path):
+    with stage("graph.write", path=path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(graph, f, ensure_ascii=False, separators=(",", ":"))
+
+
+def load_graph(path, entries=None):
+    """
+    Read a graph file.  With entries, return None if the file is missing or was
+    built from different terms/cross_refs, so the caller can rebuild.
+    """
+    try:
+        with stage("graph.read", path=path):
+            with open(path, encoding="utf-8") as f:
+                graph = json.load(f)
+    except FileNotFoundError:
+        return None
+    if entries is not None and graph.get("source_digest") != source_digest(entries):
+        return None
+    return graph
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Stage-level instrumentation for the Hobbes Dictionary toolchain.
+
+Wrap each unit of work in `stage(name)`; on exit the stage records wall time,
+CPU time, memory high-water marks and any counters the caller attached (tokens,
+cost, rows...).  Records are appended to a JSONL trace file as they finish and
+`summary()` prints a per-stage table at the end of a run.
+
+    import instrument
+    instrument.start_run("merge_intro", instrument.trace_path(CSV_PATH))
+    with instrument.stage("crossrefs") as rec:
+        ...
+        rec["rows"] = len(all_defs)
+    instrument.summary()
+
+Until `start_run` is called, `stage` is a cheap no-op so library code can be
+instrumented unconditionally.  Every command traces to `trace_path(csv)`,
+trace.jsonl next to the CSV it works on; HOBBES_TRACE overrides that.
+
+Per-stage memory comes from tracemalloc, which slows allocation-heavy stages
+(the cross-ref regex loop most of all), so it is opt-in: HOBBES_TRACE_MEMORY=1.
+The process RSS high-water mark is always recorded and costs nothing.
+tracemalloc itself is only imported when memory tracing is on; importing this
+module stays cheap because every command does it.
+
+Stages may be opened from worker threads: nesting is tracked per thread and
+records are appended under a lock.  Concurrent top-level stages overlap, so
+their wall-time percentages can add up to more than 100.
+"""
+
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# $ per million tokens: (input, output)
+PRICING = {
+    "claude-sonnet-4-6": (3.0, 15.0),
+    "claude-haiku-4-5": (1.0, 5.0),
+}
+DEFAULT_PRICING = (3.0, 15.0)
+
+COUNTERS = ("input_tokens", "output_tokens", "cost_usd")
+
+TRACE_FILE = "trace.jsonl"
+
+
+def trace_path(csv_path=None):
+    """trace.jsonl next to csv_path; in the current directory for a run on no CSV."""
+    return os.path.join(os.path.dirname(os.path.abspath(csv_path)) if csv_path else os.getcwd(),
+                        TRACE_FILE)
+
+
+def rss_peak():
+    """Process RSS high-water mark in bytes (ru_maxrss is KiB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def estimate_cost(model, input_tokens, output_tokens):
+    price_in, price_out = PRICING.get(model, DEFAULT_PRICING)
+    return (input_tokens * price_in + output_tokens * price_out) / 1_000_000
+
+
+class Tracer:
+    def __init__(self):
+        self.run = None
+        self.path = None
+        self.memory = False
+        self.records = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @property
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @property
+    def active(self):
+        return self.run is not None
+
+    def start(self, run, path=None, memory=None):
+        self.run = f"{run}-{os.urandom(4).hex()}"
+        self.path = os.environ.get("HOBBES_TRACE", path)
+        if memory is None:
+            memory = os.environ.get("HOBBES_TRACE_MEMORY") == "1"
+        self.memory = memory
+        self.records = []
+        self._local = threading.local()
+        if memory:
+            import tracemalloc
+
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name, **attrs):
+        rec = dict(attrs)
+        if not self.active:
+            yield rec
+            return
+
+        frame = {"peak": 0}
+        self._stack.append(frame)
+        if self.memory:
+            import tracemalloc
+
+            tracemalloc.reset_peak()
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        try:
+            yield rec
+        finally:
+            wall = time.perf_counter() - wall0
+            cpu = time.process_time() - cpu0
+            self._stack.pop()
+            peak = frame["peak"]
+            if self.memory:
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+            # A nested stage reset the tracemalloc peak, so hand ours upward.
+            if self._stack:
+                self._stack[-1]["peak"] = max(self._stack[-1]["peak"], peak)
+
+            record = {
+                "run":        self.run,
+                "stage":      name,
+                "depth":      len(self._stack),
+                "ts":         time.time(),
+                "wall_s":     round(wall, 6),
+                "cpu_s":      round(cpu, 6),
+                "mem_peak_b": peak if self.memory else None,
+                "rss_peak_b": rss_peak(),
+            }
+            record.update(rec)
+            with self._lock:
+                self.records.append(record)
+                if self.path:
+                    with open(self.path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def summary(self, file=None):
+        if not self.records:
+            return
+        file = file or sys.stdout
+        rows = {}
+        for r in self.records:
+            agg = rows.setdefault(r["stage"], {
+                "n": 0, "wall_s": 0.0, "cpu_s": 0.0, "mem_peak_b": 0, "rss_peak_b": 0,
+                "input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0,
+            })
+            agg["n"] += 1
+            agg["wall_s"] += r["wall_s"]
+            agg["cpu_s"] += r["cpu_s"]
+            agg["mem_peak_b"] = max(agg["mem_peak_b"], r["mem_peak_b"] or 0)
+            agg["rss_peak_b"] = max(agg["rss_peak_b"], r.get("rss_peak_b") or 0)
+            for key in COUNTERS:
+                agg[key] += r.get(key) or 0
+
+        # Only top-level stages add up to the run; nested ones are already inside them.
+        total_wall = sum(r["wall_s"] for r in self.records if r["depth"] == 0) or 1e-9
+
+        print(f"\n{'stage':<22} {'n':>5} {'wall s':>9} {'%':>6} {'cpu s':>9} "
+              f"{'peak MB':>8} {'rss MB':>8} {'in tok':>9} {'out tok':>9} {'cost $':>8}", file=file)
+        print("-" * 103, file=file)
+        for name, a in sorted(rows.items(), key=lambda kv: -kv[1]["wall_s"]):
+            print(f"{name:<22} {a['n']:>5} {a['wall_s']:>9.3f} {100 * a['wall_s'] / total_wall:>5.1f}% "
+                  f"{a['cpu_s']:>9.3f} {a['mem_peak_b'] / 1e6:>8.1f} {a['rss_peak_b'] / 1e6:>8.1f} "
+                  f"{a['input_tokens']:>9} {a['output_tokens']:>9} {a['cost_usd']:>8.4f}", file=file)
+        if self.path:
+            print(f"Trace: {self.path} (run {self.run})", file=file)
+
+
+tracer = Tracer()
+start_run = tracer.start
+stage = tracer.stage
+summary = tracer.summary
+
+
+def main(argv=None):
+    """Summarise an existing trace file: python -m hobbes trace trace.jsonl [RUN]"""
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("usage: hobbes trace TRACE.jsonl [RUN]")
+        sys.exit(1)
+    want = argv[1] if len(argv) > 1 else None
+    with open(argv[0], encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    if want is None and records:
+        want = records[-1]["run"]
+    t = Tracer()
+    t.run = want
+    t.records = [r for r in records if r["run"] == want]
+    t.summary()
+
+
+if __name__ == "__main__":
+    main()
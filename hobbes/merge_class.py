@@ -1,9 +1,14 @@
 #!/usr/bin/env python3
 """Add Book 1061 (Of the Class) definitions to hobbes_dictionary.csv."""
-import csv, re
+from . import instrument
+from .instrument import stage
+from .crossrefs import add_cross_refs
+from .graph import build_graph, write_graph
+from .store import load_entries, write_entries
 
 BASE = "/Users/Chester2/Documents/Documents/projects/HobbesDictionary"
 CSV_PATH = f"{BASE}/hobbes_dictionary.csv"
+GRAPH_PATH = f"{BASE}/hobbes_graph.json"
 
 CLASS_DEFS = [
     {
@@ -41,52 +46,49 @@ CLASS_DEFS = [
 ]
 
 
-def add_cross_refs(all_definitions):
-    all_terms = [(d["term"], d["term"].lower()) for d in all_definitions]
-    all_terms.sort(key=lambda x: -len(x[1]))
-    for defn in all_definitions:
-        def_text = defn.get("definition", "").lower()
-        refs = []
-        for term_original, term_lower in all_terms:
-            if term_lower == defn["term"].lower():
-                continue
-            pattern = r"\b" + re.escape(term_lower) + r"\b"
-            if re.search(pattern, def_text):
-                refs.append(term_original)
-        defn["cross_refs"] = "; ".join(sorted(refs)) if refs else ""
-    return all_definitions
+def main():
+    from .align import realign
+    from .corpus import Corpus
+    from .validate import Validator
 
+    instrument.start_run("merge_class", instrument.trace_path(CSV_PATH))
+    print("Loading existing CSV...")
+    existing = load_entries(CSV_PATH)
+    print(f"  {len(existing)} existing entries")
 
-print("Loading existing CSV...")
-existing = []
-with open(CSV_PATH, encoding="utf-8") as f:
-    for row in csv.DictReader(f):
-        existing.append(dict(row))
-print(f"  {len(existing)} existing entries")
+    new_entries = []
+    for e in CLASS_DEFS:
+        new_entries.append({
+            "term":        e["term"],
+            "definition":  e["definition"],
+            "chapter":     f"Chapter {e['chapter_num']}: {e['chapter_title']}",
+            "page_number": e["page_number"],
+            "cross_refs":  "",
+            "context":     e["context"],
+        })
 
-new_entries = []
-for e in CLASS_DEFS:
-    new_entries.append({
-        "term":        e["term"],
-        "definition":  e["definition"],
-        "chapter":     f"Chapter {e['chapter_num']}: {e['chapter_title']}",
-        "page_number": e["page_number"],
-        "cross_refs":  "",
-        "context":     e["context"],
-    })
+    # Only the rows merged in are validated; the CSV's own rows stay as they are.
+    work = Corpus().work()
+    validator = Validator.for_work(work)
+    new_entries = list(validator.filter(new_entries))
+    validator.report()
+    print(f"  Adding {len(new_entries)} Book 1061 entries")
 
-print(f"  Adding {len(new_entries)} Book 1061 entries")
+    all_defs = existing
+    all_defs.extend(new_entries)
+    print(f"Total: {len(all_defs)}")
 
-all_defs = existing + new_entries
-print(f"Total: {len(all_defs)}")
+    print("Recomputing cross-references...")
+    with stage("crossrefs", rows=len(all_defs)):
+        all_defs = add_cross_refs(all_defs, workers=None)
 
-print("Recomputing cross-references...")
-all_defs = add_cross_refs(all_defs)
+    write_entries(CSV_PATH, all_defs)
+    write_graph(build_graph(all_defs), GRAPH_PATH)
+    realign(work, all_defs)
 
-fieldnames = ["term", "definition", "chapter", "page_number", "cross_refs", "context"]
-with open(CSV_PATH, "w", newline="", encoding="utf-8") as f:
-    writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore")
-    writer.writeheader()
-    writer.writerows(all_defs)
+    print(f"Done — {len(all_defs)} total definitions.")
+    instrument.summary()
 
-print(f"Done — {len(all_defs)} total definitions.")
+
+if __name__ == "__main__":
+    main()
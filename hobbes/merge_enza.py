@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Add Enza Jones to Book 1061."""
+from . import instrument
+from .instrument import stage
+from .crossrefs import add_cross_refs
+from .graph import build_graph, write_graph
+from .store import load_entries, write_entries
+
+BASE = "/Users/Chester2/Documents/Documents/projects/HobbesDictionary"
+CSV_PATH = f"{BASE}/hobbes_dictionary.csv"
+GRAPH_PATH = f"{BASE}/hobbes_graph.json"
+
+ENTRY = {
+    "term": "Enza Jones",
+    "definition": "ENZA JONES is a Student of this present Course, distinguished above all her Fellows by a singular and remarkable Talent: namely, the ability to perform Spoken-Word Autobiographies of Thomas Hobbes. By this Art she doth give Voice and Passion to the Philosopher himself, recounting in verse and cadence the Feares, Reasonings, and Indignations of a man who lived through Civil Warre, Exile, and the perpetuall hostility of Clergymen — and who, by his own Confession, was born a Twin to Feare. That she can render such a Life in the first Person, with convincing Affect, is a thing which surpasseth the ordinary Powers of Understanding; for to inhabit the mind of Hobbes requireth not only Learning, but a Courage and an Imagination of the first Order. She is, in short, what Hobbes himself would have called a Soveraign of the Performative Arts.",
+    "page_number": "1061",
+    "context": "marginal label: A Student of Singular Performative Gifts; celebrated for spoken-word autobiographies of Hobbes",
+    "chapter": "Chapter 1061: The Persons of the Class",
+}
+
+
+def main():
+    from .align import realign
+    from .corpus import Corpus
+    from .validate import Validator
+
+    instrument.start_run("merge_enza", instrument.trace_path(CSV_PATH))
+    existing = load_entries(CSV_PATH)
+
+    # Only the row merged in is validated; the CSV's own rows stay as they are.
+    work = Corpus().work()
+    validator = Validator.for_work(work)
+    existing.extend(validator.filter([{
+        "term":        ENTRY["term"],
+        "definition":  ENTRY["definition"],
+        "chapter":     ENTRY["chapter"],
+        "page_number": ENTRY["page_number"],
+        "cross_refs":  "",
+        "context":     ENTRY["context"],
+    }]))
+    validator.report()
+
+    print(f"Total before recompute: {len(existing)}")
+
+    with stage("crossrefs", rows=len(existing)):
+        existing = add_cross_refs(existing, workers=None)
+
+    write_entries(CSV_PATH, existing)
+    write_graph(build_graph(existing), GRAPH_PATH)
+    realign(work, existing)
+
+    print("Done.")
+    instrument.summary()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,22 @@
 #!/usr/bin/env python3
-"""Merge Introduction definitions into hobbes_dictionary.csv, recompute cross-refs."""
-import json, csv, re
+"""
+Merge Introduction definitions into hobbes_dictionary.csv, recompute cross-refs.
+
+These hand-checked entries predate chapters.json.  extract.py now
+extracts the Introduction with every other chapter, so run this only against
+a CSV that has no Introduction rows.
+"""
+import json
+
+from . import instrument
+from .instrument import stage
+from .crossrefs import add_cross_refs
+from .graph import build_graph, write_graph
+from .store import Entries, load_entries, write_entries
 
 BASE = "/Users/Chester2/Documents/Documents/projects/HobbesDictionary"
 CSV_PATH = f"{BASE}/hobbes_dictionary.csv"
+GRAPH_PATH = f"{BASE}/hobbes_graph.json"
 
 INTRO_DEFS = [
   {
@@ -129,55 +142,52 @@ INTRO_DEFS = [
 ]
 
 
-def add_cross_refs(all_definitions):
-    all_terms = [(d["term"], d["term"].lower()) for d in all_definitions]
-    all_terms.sort(key=lambda x: -len(x[1]))
-    for defn in all_definitions:
-        def_text = defn.get("definition", "").lower()
-        refs = []
-        for term_original, term_lower in all_terms:
-            if term_lower == defn["term"].lower():
-                continue
-            pattern = r"\b" + re.escape(term_lower) + r"\b"
-            if re.search(pattern, def_text):
-                refs.append(term_original)
-        defn["cross_refs"] = "; ".join(sorted(refs)) if refs else ""
-    return all_definitions
+def main():
+    # Only a run needs these; importtime budgets what `merge` costs to load.
+    from .align import realign
+    from .corpus import Corpus
+    from .validate import Validator
+
+    # Load existing
+    instrument.start_run("merge_intro", instrument.trace_path(CSV_PATH))
+    print("Loading existing CSV...")
+    existing = load_entries(CSV_PATH)
+    print(f"  {len(existing)} existing entries")
 
+    # Build new intro entries
+    new_entries = []
+    for e in INTRO_DEFS:
+        new_entries.append({
+            "term":        e["term"],
+            "definition":  e["definition"],
+            "chapter":     f"Chapter {e['chapter_num']}: {e['chapter_title']}",
+            "page_number": e["page_number"],
+            "cross_refs":  "",
+            "context":     e["context"],
+        })
 
-# Load existing
-print("Loading existing CSV...")
-existing = []
-with open(CSV_PATH, encoding="utf-8") as f:
-    for row in csv.DictReader(f):
-        existing.append(dict(row))
-print(f"  {len(existing)} existing entries")
+    # Only the rows merged in are validated; the CSV's own rows stay as they are.
+    work = Corpus().work()
+    validator = Validator.for_work(work)
+    new_entries = list(validator.filter(new_entries))
+    validator.report()
+    print(f"  Adding {len(new_entries)} Introduction entries")
 
-# Build new intro entries
-new_entries = []
-for e in INTRO_DEFS:
-    new_entries.append({
-        "term":        e["term"],
-        "definition":  e["definition"],
-        "chapter":     f"Chapter {e['chapter_num']}: {e['chapter_title']}",
-        "page_number": e["page_number"],
-        "cross_refs":  "",
-        "context":     e["context"],
-    })
+    # Intro goes at the front
+    all_defs = Entries(new_entries + existing)
+    print(f"Total: {len(all_defs)}")
 
-print(f"  Adding {len(new_entries)} Introduction entries")
+    print("Recomputing cross-references...")
+    with stage("crossrefs", rows=len(all_defs)):
+        all_defs = add_cross_refs(all_defs, workers=None)
 
-# Intro goes at the front
-all_defs = new_entries + existing
-print(f"Total: {len(all_defs)}")
+    write_entries(CSV_PATH, all_defs)
+    write_graph(build_graph(all_defs), GRAPH_PATH)
+    realign(work, all_defs)
 
-print("Recomputing cross-references...")
-all_defs = add_cross_refs(all_defs)
+    print(f"Done — {len(all_defs)} total definitions.")
+    instrument.summary()
 
-fieldnames = ["term", "definition", "chapter", "page_number", "cross_refs", "context"]
-with open(CSV_PATH, "w", newline="", encoding="utf-8") as f:
-    writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore")
-    writer.writeheader()
-    writer.writerows(all_defs)
 
-print(f"Done — {len(all_defs)} total definitions.")
+if __name__ == "__main__":
+    main()
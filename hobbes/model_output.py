@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Parse the JSON array of definitions out of a model reply, and make CSV rows of it."""
+
+import json
+import re
+
+
+def extract_json_array(text):
+    """Find and parse the JSON array from agent text using bracket-depth parser."""
+    # Find start of JSON array
+    start = text.find("[")
+    if start == -1:
+        return []
+    candidate = text[start:]
+    depth = 0
+    in_str = False
+    escape = False
+    end = -1
+    for i, ch in enumerate(candidate):
+        if escape:
+            escape = False
+            continue
+        if ch == "\\" and in_str:
+            escape = True
+            continue
+        if ch == '"' and not escape:
+            in_str = not in_str
+            continue
+        if in_str:
+            continue
+        if ch == "[":
+            depth += 1
+        elif ch == "]":
+            depth -= 1
+            if depth == 0:
+                end = i
+                break
+    if end == -1:
+        return []
+    try:
+        return json.loads(candidate[: end + 1])
+    except json.JSONDecodeError as e:
+        print(f"  JSON parse error: {e}")
+        return []
+
+
+def parse_definitions(raw):
+    """
+    Definitions from a reply that should be a bare JSON array.  Code fences are
+    stripped; if the reply still is not valid JSON (prose before the array),
+    the first balanced array is used.  Raises json.JSONDecodeError when there
+    is none, e.g. a reply truncated at max_tokens, or when the JSON is not an
+    array of objects.
+    """
+    raw = raw.strip()
+    raw = re.sub(r'^```(?:json)?\s*', '', raw)
+    raw = re.sub(r'\s*```$', '', raw)
+    try:
+        definitions = json.loads(raw)
+    except json.JSONDecodeError:
+        definitions = extract_json_array(raw) if raw.find("[") != -1 else []
+        if not definitions:
+            raise
+    if not isinstance(definitions, list) or not all(isinstance(d, dict) for d in definitions):
+        raise json.JSONDecodeError("expected a JSON array of objects", raw, 0)
+    return definitions
+
+
+def model_rows(definitions):
+    """
+    CSV rows for definitions from the model.  They have no cross_refs until
+    add_cross_refs runs, after validation, and the validator's schema check
+    wants every column, so it starts empty.
+    """
+    return [{"cross_refs": "", **d} for d in definitions]
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Page-level change detection for selective re-extraction, and splicing the
+re-extracted rows into the dictionary.
+
+When a source PDF is replaced (a corrected scan, another edition), extract.py
+re-extracts only the chapters whose text changed.  Every page's text is
+normalised (NFKC, whitespace runs collapsed, so a re-flowed line break is no
+change) and hashed; a chapter's digest is the hash of its pages' hashes.
+Each checkpoint records the digest of the text it was extracted from
+(`text_sha1`), and a checkpoint whose key still matches but whose digest
+does not is stale.  Checkpoints written before digests were kept are given
+the current one the first time they are seen, the same trust a checkpoint
+always had.  The hashes of every page are also kept in the work directory
+(pages.json), so a run can say which pages changed since the last one and
+which chapters they fall in.
+
+A chapter re-extracted because its text changed is spliced, not replaced.
+Its rows in the CSV (hand edits, merged rows and all) are kept verbatim
+while their definitions are still quoted exactly (every word n-gram found,
+validate.py's quote test) in the chapter's new text; a new row is added only
+where no kept row of the same term quotes the same passage, placed among the
+kept rows by page.  Rows of every other chapter stay where they are, in CSV
+order, so an entry's identity (`row_ids`: chapter, slug and its ordinal among
+that term's rows in the chapter) survives the run, and only the definitions
+that actually moved change.  cross_refs are recomputed over the whole CSV as
+always; an unchanged row's change only if the set of terms did.
+
+Every other mapped chapter's rows are replaced outright by its checkpoint,
+unless they were made from that very checkpoint.  Which checkpoint each
+chapter's CSV rows came from (`rows_stamp`: its key, text digest and
+definitions) is kept in the work directory (rows.json) whenever the CSV is
+written, so rows from a checkpoint written by an interrupted or budget-cut
+run replace the older ones the next time, and a run with nothing new
+changes nothing.
+"""
+
+import difflib
+import hashlib
+import json
+import os
+import unicodedata
+
+from .corpus import header_page_numbers, read_json, resolve_pages, write_json
+from .store import CHAPTER_RE, make_slug
+from .validate import QUOTE_MIN, ngrams, quote_words
+
+MANIFEST = "pages.json"
+ROW_SOURCES = "rows.json"
+VERSION = 1
+KEEP_SCORE = 1.0            # an old row is kept only if its whole quote is still there
+
+
+def normalise_page(text):
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def page_hashes(pages):
+    """Hash of every page's normalised text, 16 hex digits each."""
+    return [hashlib.sha1(normalise_page(p).encode("utf-8")).hexdigest()[:16] for p in pages]
+
+
+def chapter_digest(hashes, first, last):
+    """Digest of PDF pages first..last (1-indexed, inclusive)."""
+    return hashlib.sha1("\n".join(hashes[first - 1:last]).encode()).hexdigest()
+
+
+def work_digests(work, chapters, texts):
+    """
+    ({source: page hashes}, {num: (first, last)}, {num: digest}) for the
+    chapters whose PDF has page text; texts ({pdf: pages}) is filled as read.
+    """
+    hashes, headers, ranges, digests = {}, {}, {}, {}
+    for ch in chapters:
+        pdf = ch["pdf"]
+        if pdf not in texts:
+            try:
+                texts[pdf] = work.page_texts(pdf)
+            except FileNotFoundError:
+                print(f"  {pdf} not found; checkpoints of its chapters are trusted as they are")
+                texts[pdf] = None
+        if texts[pdf] is None:
+            continue
+        if ch["source"] not in hashes:
+            hashes[ch["source"]] = page_hashes(texts[pdf])
+            headers[pdf] = header_page_numbers(texts[pdf])
+        try:
+            ranges[ch["num"]] = resolve_pages(ch, headers[pdf])
+        except ValueError:
+            continue                        # reported when the chapter is read
+        digests[ch["num"]] = chapter_digest(hashes[ch["source"]], *ranges[ch["num"]])
+    return hashes, ranges, digests
+
+
+def changed_pages(old, new):
+    """1-indexed pages of new that are not in old, by diffing the two hash lists."""
+    changed = []
+    for op, _, _, j1, j2 in difflib.SequenceMatcher(None, old, new, autojunk=False).get_opcodes():
+        if op in ("replace", "insert"):
+            changed.extend(range(j1 + 1, j2 + 1))
+        elif op == "delete" and j1 < len(new):
+            changed.append(j1 + 1)          # the page that now follows the gap
+    return sorted(set(changed))
+
+
+def load_manifest(work_dir):
+    data = read_json(os.path.join(work_dir, MANIFEST))
+    return data["sources"] if data and data.get("version") == VERSION else {}
+
+
+def save_manifest(work_dir, sources):
+    write_json(os.path.join(work_dir, MANIFEST), {"version": VERSION, "sources": sources})
+
+
+def rows_stamp(key, text_sha1, definitions):
+    """Fingerprint of a checkpoint: its key, page-text digest and definitions."""
+    h = hashlib.sha1(f"{key}\0{text_sha1 or ''}\0".encode())
+    h.update(json.dumps(definitions, ensure_ascii=False, sort_keys=True).encode("utf-8"))
+    return h.hexdigest()
+
+
+def load_row_sources(work_dir):
+    """{chapter num: rows_stamp of the checkpoint its CSV rows were last taken from}."""
+    data = read_json(os.path.join(work_dir, ROW_SOURCES))
+    return data["chapters"] if data and data.get("version") == VERSION else {}
+
+
+def save_row_sources(work_dir, stamps):
+    write_json(os.path.join(work_dir, ROW_SOURCES), {"version": VERSION, "chapters": stamps})
+
+
+def spans(pages):
+    """Compress sorted page numbers into "3-5, 9" for printing."""
+    runs = []
+    for p in pages:
+        if runs and p == runs[-1][1] + 1:
+            runs[-1][1] = p
+        else:
+            runs.append([p, p])
+    return ", ".join(f"{a}-{b}" if a != b else str(a) for a, b in runs)
+
+
+def report_changes(old, new, chapters, ranges):
+    """
+    Print each source's pages that changed since the last run and the
+    chapters (by resolved page range) they fall in.  old and new are
+    {source: hashes}; ranges is {chapter num: (first, last)}.
+    """
+    for source, hashes in new.items():
+        if source not in old or old[source] == hashes:
+            continue
+        changed = changed_pages(old[source], hashes)
+        hit = [ch["num"] for ch in chapters if ch["source"] == source and ch["num"] in ranges
+               and any(ranges[ch["num"]][0] <= p <= ranges[ch["num"]][1] for p in changed)]
+        print(f"{source}: {len(changed)} page(s) changed since the last run "
+              f"(PDF pages {spans(changed) or 'none; pages removed at the end'})"
+              + (f", in Chapter {', '.join(hit)}" if hit else ""))
+
+
+def chapter_num(row):
+    m = CHAPTER_RE.match(row["chapter"])
+    return m.group(1) if m else None
+
+
+def row_ids(rows):
+    """A stable id for each of rows: chapter, slug and its ordinal among that term's rows there."""
+    seen = {}
+    ids = []
+    for e in rows:
+        base = f"{chapter_num(e) or e['chapter']}/{make_slug(e['term'])}"
+        seen[base] = seen.get(base, -1) + 1
+        ids.append(f"{base}/{seen[base]}")
+    return ids
+
+
+def same_passage(a, b):
+    """True if two definitions quote mostly the same words."""
+    ga, gb = ngrams(quote_words(a)), ngrams(quote_words(b))
+    if not ga or not gb:
+        return quote_words(a) == quote_words(b)
+    return len(ga & gb) >= QUOTE_MIN * min(len(ga), len(gb))
+
+
+def field(row, col):
+    """row[col] if it is a string, else "": model rows are not validated until after splicing."""
+    value = row.get(col)
+    return value if isinstance(value, str) else ""
+
+
+def page_key(row):
+    page = field(row, "page_number").strip()
+    return int(page) if page.isdigit() else float("inf")
+
+
+def splice_chapter(old, new, score):
+    """
+    (rows, counts) for one re-extracted chapter: old rows whose definition
+    score(definition) still gives KEEP_SCORE, then each new row that no kept
+    row of its term already covers, inserted before the first row on a later page.
+    A malformed new row is inserted like any other and left to the validator.
+    """
+    kept = [e for e in old if score(e["definition"]) >= KEEP_SCORE]
+    rows = list(kept)
+    added = 0
+    for d in new:
+        slug = make_slug(field(d, "term"))
+        if any(make_slug(e["term"]) == slug and same_passage(e["definition"], field(d, "definition"))
+               for e in kept):
+            continue
+        at = next((i for i, e in enumerate(rows) if page_key(e) > page_key(d)), len(rows))
+        rows.insert(at, d)
+        added += 1
+    return rows, {"kept": len(kept), "added": added, "dropped": len(old) - len(kept)}
+
+
+def splice_entries(existing, replacements, order):
+    """
+    existing rows with each chapter in replacements ({num: rows}) swapped in
+    where that chapter's first row was; chapters it lacks are appended in
+    `order` (chapter nums).  Every other row keeps its place.
+    """
+    out, placed = [], set()
+    for e in existing:
+        num = chapter_num(e)
+        if num not in replacements:
+            out.append(e)
+        elif num not in placed:
+            out.extend(replacements[num])
+            placed.add(num)
+    for num in order:
+        if num in replacements and num not in placed:
+            out.extend(replacements[num])
+    return out
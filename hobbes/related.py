@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Related terms by what their definitions say, not by name.
+
+Cross-refs link a term only where another term's name appears in its text.
+This module scores terms by the vocabulary of their definitions and context
+notes instead, so "Covenant" can sit next to "Contract" and "Pact" even when
+neither names the other.  Everything is computed at build time; the page gets
+a short, ranked neighbour list per term and does no vector maths.
+
+One document per unique term (one per slug, in the same order as graph.py, so
+node ids line up): the term name, every definition and every context note.
+Tokens are lowercased words of three or more letters minus STOPWORDS; words
+in fewer than two documents or more than MAX_DF of them are dropped.  Weights
+are sublinear TF-IDF, rows L2-normalised.
+
+With NumPy (optional):
+
+    lsa    a rank-LSA_DIMS truncated SVD of the TF-IDF matrix by randomised
+           range finding, so documents that share no word but share
+           neighbours' words still score; rows are re-normalised and written
+           as a float32 matrix (vectors .npy next to the related file)
+    ann    up to EXACT_MAX terms, exact blocked cosine top-k; above that an
+           IVF index: spherical k-means into ~sqrt(n) cells, and each cell's
+           terms are scored against the members of the NPROBE cells nearest
+           its centroid (at most CAND_MAX of them), one matrix product per cell
+
+Without NumPy the same TF-IDF vectors are compared sparsely through an
+inverted index, each term's postings cut to its POSTINGS_CAP heaviest
+documents.  That is fine for the real dictionary but not for 100k synthetic
+entries; the build says which method it used.
+
+The result is stored like the graph: a CSR neighbour list with parallel
+scores and a `source_digest` of the text it came from, so builds reuse it
+until a definition changes.
+"""
+
+import hashlib
+import heapq
+import json
+import math
+import re
+from collections import Counter
+
+from .instrument import stage
+from .store import normalise_terms
+
+RELATED_FILE = "hobbes_related.json"
+RELATED_K = 10
+MIN_SCORE = 0.05
+MAX_DF = 0.3
+LSA_DIMS = 128
+OVERSAMPLE = 16
+POWER_ITERS = 1
+EXACT_MAX = 5_000
+NPROBE = 8
+CAND_MAX = 16_384
+KMEANS_ITERS = 8
+KMEANS_SAMPLE = 20_000
+POSTINGS_CAP = 200
+NNZ_BLOCK = 1 << 16     # nonzeros per sparse-product block
+SCORE_BLOCK = 1 << 24   # floats per similarity block (64 MB of float32)
+
+TOKEN_RE = re.compile(r"[^\W\d_]{3,}")
+
+STOPWORDS = frozenset("""
+    the and for that which this with from are but not they their them there these those
+    his her its him she has have had was were been being will shall would should may might
+    can could must than then when where what who whom whose why how all any each every
+    some such one two other others same own more most less also only very into unto upon
+    out over under about after before again against between both during through until
+    while yet nor our ours your yours you thou thee thy thine hath doth did does done
+    thereof therein thereby whereof wherein whereby whereas hee shee bee wee men man
+    because called call calls nothing thing things make made maketh every part way
+""".split())
+
+
+def source_digest(entries):
+    h = hashlib.sha1(f"{RELATED_K},{LSA_DIMS},{MAX_DF}".encode())
+    for e in entries:
+        for key in ("term", "definition", "context"):
+            h.update(e.get(key, "").encode("utf-8"))
+            h.update(b"\0")
+    return h.hexdigest()
+
+
+def term_documents(entries):
+    """(slugs, terms, token lists), one document per unique slug in first-seen order."""
+    keys = normalise_terms(e["term"] for e in entries)
+    ids, slugs, terms, docs = {}, [], [], []
+    for e in entries:
+        slug = keys[e["term"]].slug
+        if slug not in ids:
+            ids[slug] = len(slugs)
+            slugs.append(slug)
+            terms.append(e["term"])
+            docs.append([])
+        text = " ".join((e["term"], e.get("definition", ""), e.get("context", "")))
+        docs[ids[slug]].extend(w for w in TOKEN_RE.findall(text.lower()) if w not in STOPWORDS)
+    return slugs, terms, docs
+
+
+def tfidf_rows(docs):
+    """Sparse L2-normalised TF-IDF rows: list of {word id: weight}, and the vocabulary size."""
+    n = len(docs)
+    counts = [Counter(d) for d in docs]
+    df = Counter(w for c in counts for w in c)
+    max_df = max(2, MAX_DF * n)
+    vocab = {w: i for i, w in enumerate(sorted(w for w, k in df.items() if 2 <= k <= max_df))}
+    idf = {w: math.log((1 + n) / (1 + df[w])) + 1 for w in vocab}
+    rows = []
+    for c in counts:
+        row = {vocab[w]: (1 + math.log(tf)) * idf[w] for w, tf in c.items() if w in vocab}
+        norm = math.sqrt(sum(v * v for v in row.values())) or 1.0
+        rows.append({i: v / norm for i, v in row.items()})
+    return rows, len(vocab)
+
+
+# ── Sparse path (no NumPy) ───────────────────────────────────────────────────
+
+def sparse_neighbours(rows, k):
+    """Approximate top-k cosine neighbours over capped postings."""
+    postings = {}
+    for d, row in enumerate(rows):
+        for w, v in row.items():
+            postings.setdefault(w, []).append((v, d))
+    for w, plist in postings.items():
+        if len(plist) > POSTINGS_CAP:
+            postings[w] = heapq.nlargest(POSTINGS_CAP, plist)
+
+    out = []
+    for d, row in enumerate(rows):
+        acc = {}
+        for w, v in row.items():
+            for v2, d2 in postings[w]:
+                if d2 != d:
+                    acc[d2] = acc.get(d2, 0.0) + v * v2
+        out.append(heapq.nlargest(k, ((s, j) for j, s in acc.items()), key=lambda t: (t[0], -t[1])))
+    return out
+
+
+# ── Dense path (NumPy) ───────────────────────────────────────────────────────
+
+def _csr(np, rows, vocab_size):
+    """(X, X.T) as (data, indices, indptr) triples for sparse rows of {column: value}."""
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(r) for r in rows])
+    nnz = int(indptr[-1])
+    indices = np.fromiter((i for r in rows for i in r), dtype=np.int64, count=nnz)
+    data = np.fromiter((v for r in rows for v in r.values()), dtype=np.float32, count=nnz)
+
+    order = np.argsort(indices, kind="stable")
+    t_indptr = np.zeros(vocab_size + 1, dtype=np.int64)
+    t_indptr[1:] = np.cumsum(np.bincount(indices, minlength=vocab_size))
+    row_ids = np.repeat(np.arange(len(rows)), np.diff(indptr))
+    return (data, indices, indptr), (data[order], row_ids[order], t_indptr)
+
+
+def _csr_matmul(np, X, M):
+    """X @ M for CSR X and dense M, summing row products with reduceat in bounded blocks."""
+    data, indices, indptr = X
+    n = len(indptr) - 1
+    out = np.zeros((n, M.shape[1]), dtype=np.float32)
+    lo = 0
+    while lo < n:
+        hi = int(np.searchsorted(indptr, indptr[lo] + NNZ_BLOCK, side="right")) - 1
+        hi = min(n, max(hi, lo + 1))
+        a, b = indptr[lo], indptr[hi]
+        if b > a:
+            prod = data[a:b, None] * M[indices[a:b]]
+            nonempty = np.diff(indptr[lo:hi + 1]) > 0
+            out[lo:hi][nonempty] = np.add.reduceat(prod, indptr[lo:hi][nonempty] - a, axis=0)
+        lo = hi
+    return out
+
+
+def lsa_vectors(np, X, XT, dims, seed=0):
+    """Row-normalised rank-`dims` LSA document vectors (randomised SVD, Halko et al.)."""
+    n, vocab_size = len(X[2]) - 1, len(XT[2]) - 1
+    rank = max(1, min(dims, n - 1, vocab_size - 1))
+    rng = np.random.default_rng(seed)
+    Y = _csr_matmul(np, X, rng.standard_normal((vocab_size, rank + OVERSAMPLE), dtype=np.float32))
+    Q, _ = np.linalg.qr(Y)
+    for _ in range(POWER_ITERS):
+        Z, _ = np.linalg.qr(_csr_matmul(np, XT, Q))
+        Q, _ = np.linalg.qr(_csr_matmul(np, X, Z))
+    B = _csr_matmul(np, XT, Q).T                       # (rank + p) x V
+    Ub, S, _ = np.linalg.svd(B, full_matrices=False)
+    vecs = (Q @ Ub[:, :rank]) * S[:rank]
+    norms = np.linalg.norm(vecs, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vecs / norms).astype(np.float32)
+
+
+def _top_k(np, scores, k, exclude):
+    """Per row of `scores`, the k best (score, column) pairs, skipping column exclude[row] (-1: none)."""
+    rows = np.flatnonzero(exclude >= 0)
+    scores[rows, exclude[rows]] = -np.inf
+    k = min(k, scores.shape[1] - 1)
+    if k <= 0:
+        return [[] for _ in scores]
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    out = []
+    for r, cols in enumerate(part):
+        cols = cols[np.argsort(-scores[r, cols], kind="stable")]
+        out.append([(float(scores[r, c]), int(c)) for c in cols])
+    return out
+
+
+def exact_neighbours(np, V, k):
+    out = []
+    step = max(1, SCORE_BLOCK // len(V))
+    for lo in range(0, len(V), step):
+        hi = min(len(V), lo + step)
+        out.extend(_top_k(np, V[lo:hi] @ V.T, k, np.arange(lo, hi)))
+    return out
+
+
+def ivf_neighbours(np, V, k, seed=0):
+    """Approximate top-k: spherical k-means cells, each scored against its NPROBE nearest cells."""
+    n = len(V)
+    nlist = max(1, min(1024, int(math.sqrt(n))))
+    rng = np.random.default_rng(seed)
+    sample = V[rng.choice(n, size=min(n, KMEANS_SAMPLE), replace=False)]
+    C = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+    for _ in range(KMEANS_ITERS):
+        assign = np.argmax(sample @ C.T, axis=1)
+        for c in range(nlist):
+            members = sample[assign == c]
+            if len(members):
+                C[c] = members.sum(axis=0)
+        C /= np.maximum(np.linalg.norm(C, axis=1, keepdims=True), 1e-12)
+
+    cell = np.argmax(V @ C.T, axis=1)
+    members = [np.flatnonzero(cell == c) for c in range(nlist)]
+    probe = np.argsort(-(C @ C.T), axis=1)[:, :min(NPROBE, nlist)]
+    out = [None] * n
+    for c in range(nlist):
+        queries = members[c]
+        if not len(queries):
+            continue
+        cand = np.concatenate([members[p] for p in probe[c]])
+        if len(cand) > CAND_MAX:
+            # Only degenerate data (near-identical vectors) piles into one cell.
+            cand = rng.choice(cand, size=CAND_MAX, replace=False)
+        Vc = V[cand]
+        # Exclude each query itself: find its column among the candidates.
+        pos = {int(j): i for i, j in enumerate(cand)}
+        step = max(1, SCORE_BLOCK // len(cand))
+        for lo in range(0, len(queries), step):
+            block = queries[lo:lo + step]
+            exclude = np.array([pos.get(int(q), -1) for q in block])
+            for q, hits in zip(block, _top_k(np, V[block] @ Vc.T, k, exclude)):
+                out[q] = [(s, int(cand[j])) for s, j in hits]
+    return out
+
+
+# ── Build, store, load ───────────────────────────────────────────────────────
+
+def build_related(entries, k=RELATED_K, vectors_path=None):
+    """
+    Related-terms dict (JSON-ready) for entries.  With NumPy and a
+    vectors_path, the LSA matrix is also saved there as .npy.
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+
+    with stage("related.tfidf", rows=len(entries)) as rec:
+        slugs, terms, docs = term_documents(entries)
+        rows, vocab_size = tfidf_rows(docs)
+        rec.update(terms=len(slugs), vocab=vocab_size)
+
+    if np is None or len(slugs) < 3:
+        method, dims = "tfidf", 0
+        with stage("related.ann", method="sparse") as rec:
+            neighbours = sparse_neighbours(rows, k)
+    else:
+        with stage("related.lsa", dims=LSA_DIMS) as rec:
+            V = lsa_vectors(np, *_csr(np, rows, vocab_size), LSA_DIMS)
+            method, dims = "lsa", V.shape[1]
+            rec["dims"] = dims
+        if vectors_path:
+            np.save(vectors_path, V)
+        exact = len(V) <= EXACT_MAX
+        with stage("related.ann", method="exact" if exact else "ivf") as rec:
+            neighbours = exact_neighbours(np, V, k) if exact else ivf_neighbours(np, V, k)
+
+    indptr, indices, scores = [0], [], []
+    for hits in neighbours:
+        for s, j in hits:
+            if s >= MIN_SCORE:
+                indices.append(j)
+                scores.append(round(s, 4))
+        indptr.append(len(indices))
+
+    return {
+        "source_digest": source_digest(entries),
+        "method":        method,
+        "dims":          dims,
+        "slugs":         slugs,
+        "terms":         terms,
+        "related":       {"indptr": indptr, "indices": indices},
+        "scores":        scores,
+    }
+
+
+def write_related(related, path):
+    with stage("related.write", path=path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(related, f, ensure_ascii=False, separators=(",", ":"))
+
+
+def load_related(path, entries=None):
+    """Read a related file; with entries, None if missing or built from different text."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            related = json.load(f)
+    except FileNotFoundError:
+        return None
+    if entries is not None and related.get("source_digest") != source_digest(entries):
+        return None
+    return related
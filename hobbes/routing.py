@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Tiered model routing for extraction (`extract --route`).
+
+Every chapter already has a plan from budget.py with its expected definitions
+and prompt tokens.  `route` sends a chapter to SMALL_MODEL when it is sparse:
+fewer than SPARSE_DEFS expected definitions, or fewer than SPARSE_DENSITY
+per thousand prompt tokens.  Everything else (Chapter VI's passions, the
+laws of nature) goes straight to the large model.
+
+A small model's answer is then checked before it is kept (`assess`):
+
+    yield     it returned at least MIN_YIELD of the definitions expected
+    quotes    at least MIN_QUOTED of its definitions are quotes from the
+              chapter text (the validator's n-gram test, validate.py)
+
+A chapter that fails either check, or whose small-model calls fail outright,
+is escalated: extracted again by the large model, whose answer is kept
+as is.  A routed chapter's worst case, for the budget, is both calls.
+
+Each model call is recorded on the chapter's plan (model, tokens, cost,
+seconds), and `report` prints per-chapter latency and cost.  It also compares
+the run against the single-model baseline in two ways.  The first is this
+run repriced: every chapter charged at the large model's prices for its
+tokens and timed at the large model's observed output rate.  The second is
+the last `extract` run in the trace file without --route, when there is one.
+Routing is part of the checkpoint key, so switching between modes
+re-extracts the chapters rather than mixing the two.
+"""
+
+import json
+import math
+
+from .budget import choose_max_tokens
+from .instrument import estimate_cost, stage
+from .validate import QUOTE_MIN, ngrams, quote_words
+
+SMALL_MODEL = "claude-haiku-4-5"
+SMALL_ATTEMPTS = 2
+
+SPARSE_DEFS = 12
+SPARSE_DENSITY = 1.5
+MIN_YIELD = 0.6
+MIN_QUOTED = 0.8
+
+
+def route(plan, small=SMALL_MODEL):
+    """Move a sparse chapter's plan to the small model; record why either way."""
+    density = 1000 * plan["definitions"] / max(plan["input_tokens"], 1)
+    plan["density"] = round(density, 2)
+    plan["large_model"] = plan["model"]
+    if plan["definitions"] >= SPARSE_DEFS and density >= SPARSE_DENSITY:
+        plan["route"] = "dense"
+        return plan
+    plan["route"] = "sparse"
+    plan["model"] = small
+    # Room for the escalation too, so a budget is never overrun by one.
+    plan["worst_usd"] += estimate_cost(small, plan["input_tokens"], plan["max_tokens"])
+    plan["worst_tokens"] = 2 * (plan["input_tokens"] + plan["max_tokens"])
+    return plan
+
+
+def assess(definitions, plan, text):
+    """(ok, reason) for a small model's definitions of a chapter whose text is text."""
+    expected = plan["definitions"]
+    if len(definitions) < math.floor(MIN_YIELD * expected):
+        return False, f"{len(definitions)} of ~{expected} definitions expected"
+    if not definitions:
+        return True, "none expected"
+    grams = ngrams(quote_words(text))
+    quoted = 0
+    for d in definitions:
+        mine = ngrams(quote_words(str(d.get("definition", ""))))
+        if mine and len(mine & grams) / len(mine) >= QUOTE_MIN:
+            quoted += 1
+    if quoted < MIN_QUOTED * len(definitions):
+        return False, f"{quoted} of {len(definitions)} definitions found in the text"
+    return True, f"{len(definitions)} definitions, {quoted} found in the text"
+
+
+def escalation_tokens(plan, definitions):
+    """max_tokens for the large model after a small answer: enough for what it found, at least."""
+    return max(plan["max_tokens"], choose_max_tokens(len(definitions or ())))
+
+
+def baseline_cost(plan):
+    """What a chapter's kept answer would have cost at the large model's prices."""
+    large = [c for c in plan["calls"] if c["model"] == plan["large_model"]]
+    if large:
+        return sum(c["cost_usd"] for c in large)
+    return sum(estimate_cost(plan["large_model"], c["input_tokens"], c["output_tokens"])
+               for c in plan["calls"])
+
+
+def baseline_seconds(plan, large_rate):
+    """A chapter's latency on the large model: measured if it ran there, else estimated."""
+    large = [c for c in plan["calls"] if c["model"] == plan["large_model"]]
+    if large:
+        return sum(c["seconds"] for c in large)
+    if not large_rate:
+        return None
+    return sum(c["output_tokens"] / large_rate for c in plan["calls"])
+
+
+def previous_single_run(trace_path):
+    """The last routing.run record of an extract run without --route, or None."""
+    last = None
+    try:
+        with open(trace_path, encoding="utf-8") as f:
+            for line in f:
+                if '"routing.run"' in line:
+                    rec = json.loads(line)
+                    if rec.get("stage") == "routing.run" and rec.get("mode") == "single":
+                        last = rec
+    except (FileNotFoundError, TypeError):
+        return None
+    return last
+
+
+def report(plans, wall_s, routed, trace_path=None):
+    """Print per-chapter latency and cost, and the comparison with a single-model run."""
+    plans = [p for p in plans if p.get("calls")]
+    if not plans:
+        return
+    print(f"\n{'chapter':>8} {'route':>7} {'model':<20} {'calls':>5} {'seconds':>8} {'cost $':>8}")
+    for p in plans:
+        models = "->".join(dict.fromkeys(c["model"] for c in p["calls"]))
+        print(f"{p['num']:>8} {p.get('route', '-'):>7} {models:<20} {len(p['calls']):>5} "
+              f"{p['seconds']:>8.1f} {p['cost_usd']:>8.4f}")
+
+    cost = sum(p["cost_usd"] for p in plans)
+    escalated = sum(1 for p in plans if p.get("escalated"))
+    with stage("routing.run", mode="routed" if routed else "single") as rec:
+        rec.update(chapters=len(plans), escalated=escalated, run_wall_s=round(wall_s, 3),
+                   run_cost_usd=round(cost, 6))
+    print(f"Run: {len(plans)} chapters, {wall_s:.1f}s wall, ${cost:.4f}"
+          + (f", {escalated} escalated" if routed else ""))
+    if not routed:
+        return
+
+    large = [c for p in plans for c in p["calls"] if c["model"] == p["large_model"]]
+    rate = sum(c["output_tokens"] for c in large) / sum(c["seconds"] for c in large) if large else None
+    base_cost = sum(baseline_cost(p) for p in plans)
+    seconds = [baseline_seconds(p, rate) for p in plans]
+    line = f"Repriced at {plans[0]['large_model']}: ${base_cost:.4f} ({cost / base_cost - 1:+.0%} routed)" \
+        if base_cost else "Repriced: no tokens"
+    if None not in seconds:
+        line += f"; model time {sum(seconds):.1f}s vs {sum(p['seconds'] for p in plans):.1f}s routed"
+    print(line)
+    prev = previous_single_run(trace_path)
+    if prev is not None:
+        print(f"Last single-model run ({prev['run']}): {prev['chapters']} chapters, "
+              f"{prev['run_wall_s']:.1f}s wall, ${prev['run_cost_usd']:.4f}")
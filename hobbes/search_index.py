@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Typo-tolerant search index over dictionary term names.
+
+build_site.py embeds the index in the page so the client never has to scan or
+re-tokenise term names for fuzzy matches.  Terms are matched on their folded
+keys (store.normalise_terms: lowercase, accents and long s folded) and listed
+in sort-key order.  Keys are split into words; the
+distinct words form a vocabulary, and every vocabulary word is padded
+("$sovereignty$") and cut into trigrams.  The index stores
+
+    words       sorted vocabulary
+    word_terms  word id -> ids of the terms containing that word
+    grams       trigram -> ids of the words containing it
+
+with every id list sorted and delta-encoded to keep the page small.
+
+A query is answered in two passes, implemented by `Searcher` below and
+mirrored by `exactSearch`/`fuzzySearch` in the page script:
+
+  1. exact: key starts with the query (rank 0), then key contains it (rank 1).
+     Only the terms with a vocabulary word containing the query's longest
+     word can match, so only they are tested, in id order, stopping once
+     `limit` keys start with the query;
+  2. fuzzy, only when there are fewer than `limit` exact hits and the query is
+     long enough: for each query word, count shared trigrams per vocabulary
+     word, verify the survivors with a bounded Levenshtein (against the whole
+     word or a prefix of it, so half-typed words match), then expand matching
+     words to terms.  A term must match every query word; it ranks 2, ordered
+     by total distance.
+
+Verification runs once per distinct word rather than once per term, so the
+cost tracks the vocabulary, which grows far more slowly than the term list.
+"""
+
+import re
+
+from .store import fold_key, normalise_terms
+
+WORD_RE = re.compile(r"[^\W_]+")
+
+# Queries shorter than this get no fuzzy pass: too few grams to filter on.
+FUZZY_MIN_LEN = 4
+
+
+def max_distance(word):
+    return 1 if len(word) <= 6 else 2
+
+
+def word_grams(word):
+    padded = f"${word}$"
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+def delta_encode(ids):
+    prev = 0
+    out = []
+    for i in ids:
+        out.append(i - prev)
+        prev = i
+    return out
+
+
+def delta_decode(deltas):
+    acc = 0
+    out = []
+    for d in deltas:
+        acc += d
+        out.append(acc)
+    return out
+
+
+def build_search_index(terms, keys=None):
+    """
+    terms: list of (slug, term, chapter), one per unique slug.
+    keys: {name: TermKeys} covering those terms, normalised here when not given.
+    Returns the JSON-ready index described in the module docstring.
+    """
+    if keys is None:
+        keys = normalise_terms(t[1] for t in terms)
+    terms = sorted(terms, key=lambda t: (keys[t[1]].sort, t[1]))
+    keys = [keys[t[1]].folded for t in terms]
+
+    word_terms = {}
+    for i, key in enumerate(keys):
+        for word in set(WORD_RE.findall(key)):
+            word_terms.setdefault(word, []).append(i)
+    words = sorted(word_terms)
+
+    grams = {}
+    for w, word in enumerate(words):
+        for gram in set(word_grams(word)):
+            grams.setdefault(gram, []).append(w)
+
+    return {
+        "terms":      [list(t) for t in terms],
+        "keys":       keys,
+        "words":      words,
+        "word_terms": [delta_encode(word_terms[word]) for word in words],
+        "grams":      {g: delta_encode(ids) for g, ids in sorted(grams.items())},
+    }
+
+
+class Searcher:
+    """Decoded index plus the query logic; the page script does the same in JS."""
+
+    def __init__(self, index):
+        self.terms = index["terms"]
+        self.keys = index["keys"]
+        self.words = index["words"]
+        self.word_terms = [delta_decode(d) for d in index["word_terms"]]
+        self.grams = {g: delta_decode(d) for g, d in index["grams"].items()}
+
+    def containing_words(self, qword):
+        """Ids of the vocabulary words that contain qword."""
+        if len(qword) < 3:
+            return [w for w, word in enumerate(self.words) if qword in word]
+        grams = {qword[i:i + 3] for i in range(len(qword) - 2)}
+        counts = {}
+        for gram in grams:
+            for w in self.grams.get(gram, ()):
+                counts[w] = counts.get(w, 0) + 1
+        return [w for w, n in counts.items() if n == len(grams) and qword in self.words[w]]
+
+    def exact_terms(self, q, limit):
+        """([ids starting with q], [ids containing it]), each in id order and at most limit long."""
+        qwords = WORD_RE.findall(q)
+        if qwords:
+            words = self.containing_words(max(qwords, key=len))
+            ids = sorted({i for w in words for i in self.word_terms[w]})
+        else:
+            ids = range(len(self.keys))
+        starts, contains = [], []
+        for i in ids:
+            if len(starts) == limit:
+                break
+            key = self.keys[i]
+            if key.startswith(q):
+                starts.append(i)
+            elif len(contains) < limit and q in key:
+                contains.append(i)
+        return starts, contains
+
+    def fuzzy_words(self, qword):
+        """[(word id, distance)] for vocabulary words within the bound of qword."""
+        bound = max_distance(qword)
+        grams = set(word_grams(qword))
+        counts = {}
+        for gram in grams:
+            for w in self.grams.get(gram, ()):
+                counts[w] = counts.get(w, 0) + 1
+        # Each edit destroys at most three trigrams of the query, and a
+        # half-typed word loses its closing "x$" gram.
+        need = max(1, len(grams) - 3 * bound - 1)
+        out = []
+        for w, n in counts.items():
+            if n >= need:
+                d = word_distance(qword, self.words[w], bound)
+                if d <= bound:
+                    out.append((w, d))
+        return out
+
+    def fuzzy_terms(self, query):
+        """{term id: total distance} for terms matching every word of query."""
+        best = None
+        for qword in WORD_RE.findall(query):
+            dist = {}
+            for w, d in self.fuzzy_words(qword):
+                for i in self.word_terms[w]:
+                    if d < dist.get(i, d + 1):
+                        dist[i] = d
+            if best is None:
+                best = dist
+            else:
+                best = {i: best[i] + d for i, d in dist.items() if i in best}
+            if not best:
+                return {}
+        return best or {}
+
+    def search(self, query, limit=12):
+        """Ranked [(rank, distance, term, slug, chapter)] for query, best first."""
+        q = fold_key(query.strip())
+        if not q:
+            return []
+        starts, contains = self.exact_terms(q, limit)
+        results = [(0, 0, i) for i in starts] + [(1, 0, i) for i in contains]
+        seen = set(starts) | set(contains)
+
+        if len(results) < limit and len(q) >= FUZZY_MIN_LEN:
+            for i, d in self.fuzzy_terms(q).items():
+                if i not in seen:
+                    results.append((2, d, i))
+
+        # Term ids are in sort-key order, so they break ties alphabetically.
+        results.sort()
+        return [(rank, d, self.terms[i][1], self.terms[i][0], self.terms[i][2])
+                for rank, d, i in results[:limit]]
+
+
+def bounded_levenshtein(a, b, bound):
+    """Edit distance between a and b, or bound + 1 once it must exceed bound."""
+    if abs(len(a) - len(b)) > bound:
+        return bound + 1
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i] + [0] * len(b)
+        row_min = i
+        for j, cb in enumerate(b, 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb))
+            row_min = min(row_min, cur[j])
+        if row_min > bound:
+            return bound + 1
+        prev = cur
+    return prev[-1]
+
+
+def word_distance(qword, word, bound):
+    """Distance from qword to word, or to a prefix of word near qword's length."""
+    best = bounded_levenshtein(qword, word, bound)
+    for length in range(max(1, len(qword) - bound), min(len(word), len(qword) + bound + 1)):
+        if best == 0:
+            break
+        best = min(best, bounded_levenshtein(qword, word[:length], bound))
+    return best
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Local HTTP query API over hobbes_dictionary.csv.
+
+    python -m hobbes serve [--csv PATH] [--port 8765]
+
+Loads the dictionary once, builds in-memory indexes and answers JSON GETs:
+
+    /terms/<slug>               every definition of a term
+    /chapters                   chapter list with definition counts
+    /chapters/<roman>           definitions in one chapter ("Intro", "XIV", ...)
+    /graph/<slug>               cross-ref neighbours (refs, referenced_by,
+                                two_hop) and centrality, from graph.py
+    /search?q=<text>&limit=12   ranked search, typo-tolerant (see search_index.py)
+    /concordance/<slug>?page=1&per_page=20
+                                every occurrence of a term in the full text,
+                                one page of KWIC snippets (concordance.py);
+                                only when the concordance file is current
+
+Rendered responses are kept in an LRU cache keyed by path and query string,
+each with a strong ETag; a matching If-None-Match gets 304 Not Modified.
+Connections are HTTP/1.1 keep-alive.  Stdlib only (asyncio streams).
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from .build_site import load_or_build_graph, site_entries
+from .concordance import CONCORDANCE_FILE, MAX_PER_PAGE, PER_PAGE, load_concordance
+from .graph import neighbours
+from .search_index import Searcher, build_search_index
+from .store import CHAPTER_RE, load_entries, load_term_keys
+
+BASE = "/Users/Chester2/Documents/Documents/projects/HobbesDictionary"
+CSV_PATH = f"{BASE}/hobbes_dictionary.csv"
+
+ROMAN = {"I": 1, "V": 5, "X": 10, "L": 50, "C": 100, "D": 500, "M": 1000}
+
+STATUS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+          405: "Method Not Allowed"}
+
+
+def roman_to_int(s):
+    total = 0
+    for a, b in zip(s, s[1:] + " "):
+        v = ROMAN[a]
+        total += -v if ROMAN.get(b, 0) > v else v
+    return total
+
+
+def chapter_key(roman):
+    """Sort Intro first, then Roman chapters, then numbered extras (1061)."""
+    if roman == "Intro":
+        return (0, 0)
+    if roman.isdigit():
+        return (2, int(roman))
+    return (1, roman_to_int(roman))
+
+
+class Dictionary:
+    """The loaded entries and the indexes every endpoint reads from."""
+
+    def __init__(self, entries, graph, concordance=None):
+        self.entries = entries
+        self.concordance = concordance
+        self.by_slug = {}
+        self.by_chapter = {}
+        for e in entries:
+            self.by_slug.setdefault(e["slug"], []).append(e)
+            m = CHAPTER_RE.match(e["chapter"])
+            roman = m.group(1) if m else e["chapter"]
+            self.by_chapter.setdefault(roman, []).append(e)
+
+        self.graph = graph
+        self.node = {slug: i for i, slug in enumerate(graph["slugs"])}
+
+        first = {slug: (slug, ents[0]["term"], ents[0]["chapter"]) for slug, ents in self.by_slug.items()}
+        self.searcher = Searcher(build_search_index(list(first.values())))
+
+    def term(self, slug):
+        ents = self.by_slug.get(slug)
+        if not ents:
+            return None
+        return {"slug": slug, "term": ents[0]["term"], "definitions": ents}
+
+    def chapters(self):
+        out = []
+        for roman in sorted(self.by_chapter, key=chapter_key):
+            m = CHAPTER_RE.match(self.by_chapter[roman][0]["chapter"])
+            out.append({"chapter": roman, "title": m.group(2) if m else roman,
+                        "count": len(self.by_chapter[roman])})
+        return out
+
+    def chapter(self, roman):
+        ents = self.by_chapter.get(roman)
+        if ents is None:
+            return None
+        return {"chapter": roman, "entries": [{"slug": e["slug"], "term": e["term"]} for e in ents]}
+
+    def neighbourhood(self, slug):
+        i = self.node.get(slug)
+        if i is None:
+            return None
+        g = self.graph
+        slugs = lambda csr: [g["slugs"][j] for j in neighbours(g[csr], i)]
+        return {"slug": slug, "refs": slugs("out"), "referenced_by": slugs("in"),
+                "two_hop": slugs("two_hop"), "in_degree": g["in_degree"][i],
+                "out_degree": g["out_degree"][i], "pagerank": g["pagerank"][i]}
+
+    def search(self, q, limit):
+        return {"query": q, "results": [
+            {"term": term, "slug": slug, "chapter": chapter, "rank": rank, "distance": d}
+            for rank, d, term, slug, chapter in self.searcher.search(q, limit)
+        ]}
+
+
+class Server:
+    def __init__(self, dictionary, cache_size=1024):
+        self.dictionary = dictionary
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+
+    def route(self, path, query):
+        """(status, payload) for a GET; payload is JSON-serialisable."""
+        d = self.dictionary
+        parts = [unquote(p) for p in path.strip("/").split("/") if p]
+        if parts == ["chapters"]:
+            return 200, d.chapters()
+        if len(parts) == 2 and parts[0] in ("terms", "chapters", "graph"):
+            kind, arg = parts
+            payload = {"terms": d.term, "chapters": d.chapter, "graph": d.neighbourhood}[kind](arg)
+            if payload is None:
+                return 404, {"error": f"not found: {kind}/{arg}"}
+            return 200, payload
+        if parts == ["search"]:
+            q = query.get("q", [""])[0]
+            if not q.strip():
+                return 400, {"error": "missing q"}
+            try:
+                limit = max(1, min(100, int(query.get("limit", ["12"])[0])))
+            except ValueError:
+                return 400, {"error": "limit must be an integer"}
+            return 200, d.search(q, limit)
+        if len(parts) == 2 and parts[0] == "concordance":
+            if d.concordance is None:
+                return 404, {"error": "no concordance loaded"}
+            try:
+                page = max(1, int(query.get("page", ["1"])[0]))
+                per_page = max(1, min(MAX_PER_PAGE, int(query.get("per_page", [str(PER_PAGE)])[0])))
+            except ValueError:
+                return 400, {"error": "page and per_page must be integers"}
+            payload = d.concordance.lookup(parts[1], page, per_page)
+            if payload is None:
+                return 404, {"error": f"not found: concordance/{parts[1]}"}
+            return 200, payload
+        return 404, {"error": f"no route for {path}"}
+
+    def respond(self, target):
+        """(status, etag, body) for a request target, served from the LRU cache when possible."""
+        cached = self.cache.get(target)
+        if cached:
+            self.cache.move_to_end(target)
+            return cached
+        url = urlsplit(target)
+        status, payload = self.route(url.path, parse_qs(url.query))
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+        result = (status, etag, body)
+        if status == 200:
+            self.cache[target] = result
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return result
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    writer.write(self.format(400, None, b'{"error": "bad request line"}', False))
+                    break
+                keep_alive = (version == "HTTP/1.1" and headers.get("connection", "").lower() != "close")
+
+                if method not in ("GET", "HEAD"):
+                    status, etag, body = 405, None, b'{"error": "GET only"}'
+                else:
+                    status, etag, body = self.respond(target)
+                    if status == 200 and headers.get("if-none-match") == etag:
+                        status, body = 304, b""
+                writer.write(self.format(status, etag, b"" if method == "HEAD" else body, keep_alive,
+                                         length=len(body)))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionResetError, BrokenPipeError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def format(status, etag, body, keep_alive, length=None):
+        head = [f"HTTP/1.1 {status} {STATUS[status]}",
+                "Content-Type: application/json; charset=utf-8",
+                f"Content-Length: {len(body) if length is None else length}",
+                f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        if etag:
+            head.append(f"ETag: {etag}")
+            head.append("Cache-Control: no-cache")
+        return ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body
+
+
+async def serve(csv_path, host, port, cache_size, concordance_path=None):
+    rows = load_entries(csv_path)
+    keys = load_term_keys(csv_path, rows)
+    if concordance_path is None:
+        concordance_path = os.path.join(os.path.dirname(os.path.abspath(csv_path)), CONCORDANCE_FILE)
+    concordance = load_concordance(concordance_path, [e["term"] for e in rows])
+    if concordance is None:
+        print(f"No current concordance at {concordance_path}; /concordance is off "
+              "(python -m hobbes concordance build)")
+    dictionary = Dictionary(site_entries(rows, keys), load_or_build_graph(csv_path, rows, keys=keys),
+                            concordance)
+    server = Server(dictionary, cache_size)
+    srv = await asyncio.start_server(server.handle, host, port)
+    print(f"Loaded {len(dictionary.entries)} entries ({len(dictionary.by_slug)} terms) from {csv_path}")
+    print(f"Serving on http://{host}:{port}/")
+    async with srv:
+        await srv.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local JSON API over the Hobbes Dictionary")
+    parser.add_argument("--csv", default=CSV_PATH)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--cache-size", type=int, default=1024, help="LRU response cache entries")
+    parser.add_argument("--concordance", default=None, help=f"concordance file (default {CONCORDANCE_FILE} next to the CSV)")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.csv, args.host, args.port, args.cache_size, args.concordance))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,568 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Messages API, and a load-test driver that runs the
+extraction pipeline against it.
+
+    python -m hobbes standin serve [--port 8766] [--replay DIR ...] [--latency lognormal:2,0.6]
+                                   [--tokens-per-s 80] [--rate-limit 0.05] [--overloaded 0.02]
+                                   [--truncate 0.05] [--rpm N] [--seed 0]
+    python -m hobbes standin load  [--concurrency 1,4,8] [--chapters 48] [--work ID]
+                                   [--url URL] [serve's options]
+
+    python -m hobbes extract --api-url http://127.0.0.1:8766 [--record DIR]
+
+`serve` answers POST /v1/messages the way the API does, streamed (SSE) or
+not, so extract.py runs against it unchanged with --api-url.  Which chapter a
+request is for is read from the prompt's first line.  Its reply is, in order
+of preference:
+
+    recorded   reply-<num>.json in a --replay directory, the raw text of a
+               real reply saved by `extract --record DIR`
+    replayed   chapter-<num>.json in a --replay directory, a checkpoint
+               (checkpoint.py), its definitions re-serialised as a JSON array;
+               so an extract work directory replays the last live run
+    synthetic  a JSON array of as many definitions as budget.py expects for
+               the prompt's text, each quoting one of its sentences (so
+               routing.assess accepts them) and naming the running-header
+               page it is on
+
+Faults are drawn per request from a seeded generator: --rate-limit and
+--overloaded are the chances of a 429 (with a retry-after of --retry-after
+seconds) and a 529, and --rpm caps requests per rolling minute with further
+429s.  --truncate is the chance that a reply stops short with stop_reason
+"max_tokens"; any reply longer than the request's max_tokens stops there
+anyway.  Time to first token is drawn from --latency (see parse_latency) and
+the reply then streams at --tokens-per-s.  Usage is estimated with budget.py's
+CHARS_PER_TOKEN.  GET /stats returns the counts of requests by outcome.
+
+`load` starts a stand-in in-process (or uses --url), and for each
+--concurrency level extracts every chapter once into a scratch work
+directory through extract_one and budget.run_scheduled, the same code path
+and retries as a real run, with the SDK's own retries left on as in extract.
+Chapters are synthetic, shaped like Leviathan's, unless --work names a work
+whose page text is cached.  Per level it reports chapters per minute, output
+tokens per second, chapter and call latency (p50/p90/p99), time to first
+token, and retry amplification: requests the stand-in received per chapter,
+split into pipeline attempts (checkpoint.retry and max_tokens doubling) and
+the SDK's retries beneath them.
+
+Stdlib only (asyncio streams, as serve.py); `load` imports extract and so
+needs anthropic.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+from collections import Counter, deque
+from urllib.request import urlopen
+
+from . import instrument
+from .budget import CHARS_PER_TOKEN, SIGNAL_RE, estimate_definitions, estimate_tokens
+from .corpus import HEADER_RE, read_json, write_json
+from .instrument import stage
+
+PORT = 8766
+CHUNK_CHARS = 64            # text per streamed delta, about 18 tokens
+RETRY_AFTER_S = 1
+
+PROMPT_RE = re.compile(r"^Chapter (\S+): (.*)$", re.M)
+TEXT_RE = re.compile(r"\nTEXT:\n(.*)\n\nReturn a JSON array only\.", re.S)
+SENTENCE_RE = re.compile(r"[^.;:?!]{40,400}[.;:?!]")
+CAPS_RE = re.compile(r"\b[A-Z]{4,}\b")
+WORD_RE = re.compile(r"[A-Za-z]{5,}")
+
+STATUS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+          429: "Too Many Requests", 529: "Overloaded"}
+ERRORS = {400: "invalid_request_error", 404: "not_found_error", 405: "invalid_request_error",
+          429: "rate_limit_error", 529: "overloaded_error"}
+
+
+def parse_latency(spec):
+    """
+    A sampler rng -> seconds from a spec: "0.5" or "fixed:0.5",
+    "uniform:LO,HI", "lognormal:MEDIAN,SIGMA" or "exp:MEAN".
+    """
+    kind, _, args = spec.partition(":") if ":" in spec else ("fixed", "", spec)
+    try:
+        a = [float(x) for x in args.split(",")]
+        if kind == "fixed" and len(a) == 1:
+            return lambda rng: a[0]
+        if kind == "uniform" and len(a) == 2:
+            return lambda rng: rng.uniform(a[0], a[1])
+        if kind == "lognormal" and len(a) == 2:
+            return lambda rng: rng.lognormvariate(math.log(a[0]), a[1])
+        if kind == "exp" and len(a) == 1:
+            return lambda rng: rng.expovariate(1 / a[0])
+    except ValueError:
+        pass
+    raise argparse.ArgumentTypeError(f"bad latency spec {spec!r}")
+
+
+def recording_path(record_dir, chapter_num):
+    return os.path.join(record_dir, f"reply-{chapter_num}.json")
+
+
+def save_recording(record_dir, chapter_num, reply):
+    """Save a live reply ({"model", "max_tokens", "stop_reason", "usage", "text"}) for replay."""
+    write_json(recording_path(record_dir, chapter_num), {"chapter_num": chapter_num, **reply})
+
+
+def replay_text(replay_dirs, chapter_num):
+    """(source, text) of a recorded or checkpointed reply for a chapter, or None."""
+    for d in replay_dirs:
+        rec = read_json(recording_path(d, chapter_num))
+        if rec and rec.get("stop_reason") != "max_tokens":
+            return "recorded", rec["text"]
+        cp = read_json(os.path.join(d, f"chapter-{chapter_num}.json"))
+        if cp and "definitions" in cp:
+            # extract_one tags each definition with its chapter; the model never sends those.
+            defs = [{k: v for k, v in defn.items() if k not in ("chapter_num", "chapter_title", "chapter")}
+                    for defn in cp["definitions"]]
+            return "replayed", json.dumps(defs, ensure_ascii=False, indent=2)
+    return None
+
+
+def synth_reply(text, rng):
+    """A model-shaped JSON array of definitions quoting sentences of text."""
+    headers = [(m.start(), m.group(1)) for m in HEADER_RE.finditer(text)]
+    sentences = [m for m in SENTENCE_RE.finditer(text) if "\n[PDF page" not in m.group()]
+    defining = [m for m in sentences if SIGNAL_RE.search(m.group())]
+    n = estimate_definitions(text)
+    picks = sorted(rng.sample(defining, min(n, len(defining))), key=lambda m: m.start())
+    if len(picks) < n and sentences:
+        picks += rng.sample(sentences, min(n - len(picks), len(sentences)))
+    defs = []
+    for m in picks:
+        sentence = " ".join(m.group().split())
+        caps = CAPS_RE.findall(sentence)
+        word = caps[0] if caps else max(WORD_RE.findall(sentence) or ["Term"], key=len)
+        page = next((p for at, p in reversed(headers) if at < m.start()), headers[0][1] if headers else "1")
+        defs.append({"term": word.title(), "definition": sentence, "page_number": page,
+                     "context": "synthetic: stand-in reply"})
+    return json.dumps(defs, ensure_ascii=False, indent=2)
+
+
+class StandIn:
+    """The fault and reply policy, and the counts of what was served."""
+
+    def __init__(self, replay_dirs=(), latency="0", tokens_per_s=0.0, rate_limit=0.0,
+                 overloaded=0.0, truncate=0.0, rpm=None, retry_after=RETRY_AFTER_S, seed=0):
+        self.replay_dirs = list(replay_dirs)
+        self.latency = parse_latency(latency) if isinstance(latency, str) else latency
+        self.tokens_per_s = tokens_per_s
+        self.rate_limit = rate_limit
+        self.overloaded = overloaded
+        self.truncate = truncate
+        self.rpm = rpm
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.seed = seed
+        self.recent = deque()               # request times in the last minute, for --rpm
+        self.stats = Counter()
+        self.sources = Counter()
+        self.replies = {}                   # chapter -> (source, text)
+
+    def fault(self):
+        """(status, retry_after) for a request to fail with, or None."""
+        now = time.monotonic()
+        while self.recent and now - self.recent[0] >= 60:
+            self.recent.popleft()
+        if self.rpm is not None and len(self.recent) >= self.rpm:
+            return 429, max(1, math.ceil(60 - (now - self.recent[0])))
+        self.recent.append(now)
+        roll = self.rng.random()
+        if roll < self.rate_limit:
+            return 429, self.retry_after
+        if roll < self.rate_limit + self.overloaded:
+            return 529, None
+        return None
+
+    def reply(self, chapter, prompt):
+        """(source, text) of the full reply to a chapter's prompt, the same every time."""
+        if chapter not in self.replies:
+            found = replay_text(self.replay_dirs, chapter) if chapter else None
+            if found is None:
+                m = TEXT_RE.search(prompt)
+                found = ("synthetic", synth_reply(m.group(1) if m else prompt,
+                                                  random.Random(f"{self.seed}:{chapter}")))
+            self.replies[chapter] = found
+        return self.replies[chapter]
+
+    def answer(self, request):
+        """
+        (status, headers, message, pieces) for a Messages request body: the
+        message with its final text and usage, the text in streaming pieces.
+        """
+        self.stats["requests"] += 1
+        fault = self.fault()
+        if fault is not None:
+            status, retry_after = fault
+            self.stats[ERRORS[status]] += 1
+            headers = {"retry-after": str(retry_after)} if retry_after else {}
+            return status, headers, None, None
+
+        messages = request.get("messages") or []
+        prompt = "".join(m["content"] if isinstance(m["content"], str)
+                         else "".join(b.get("text", "") for b in m["content"]) for m in messages)
+        m = PROMPT_RE.search(prompt)
+        chapter = m.group(1) if m else None
+        source, text = self.reply(chapter, prompt)
+        self.sources[source] += 1
+
+        max_tokens = int(request.get("max_tokens", 4096))
+        output_tokens, stop_reason = estimate_tokens(text), "end_turn"
+        if output_tokens > max_tokens:
+            text, output_tokens, stop_reason = text[:int(max_tokens * CHARS_PER_TOKEN)], max_tokens, "max_tokens"
+        elif self.rng.random() < self.truncate:
+            text = text[:int(len(text) * self.rng.uniform(0.2, 0.9))]
+            output_tokens, stop_reason = max_tokens, "max_tokens"
+        self.stats["truncated" if stop_reason == "max_tokens" else "ok"] += 1
+
+        input_tokens = estimate_tokens(str(request.get("system", "")) + prompt)
+        message = {
+            "id": f"msg_standin_{self.stats['requests']:06d}", "type": "message", "role": "assistant",
+            "model": request.get("model"), "content": [{"type": "text", "text": text}],
+            "stop_reason": stop_reason, "stop_sequence": None,
+            "usage": {"input_tokens": input_tokens, "output_tokens": output_tokens},
+        }
+        pieces = [text[i:i + CHUNK_CHARS] for i in range(0, len(text), CHUNK_CHARS)]
+        return 200, {}, message, pieces
+
+    def snapshot(self):
+        return {**self.stats, "sources": dict(self.sources)}
+
+
+def sse(event, data):
+    payload = f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+    return f"{len(payload):x}\r\n".encode("latin-1") + payload + b"\r\n"
+
+
+def message_events(message, pieces):
+    """The SSE events of a streamed message, as (event, data) pairs; text between the deltas' sleeps."""
+    start = {**message, "content": [], "stop_reason": None,
+             "usage": {**message["usage"], "output_tokens": 1}}
+    yield "message_start", {"type": "message_start", "message": start}
+    yield "content_block_start", {"type": "content_block_start", "index": 0,
+                                  "content_block": {"type": "text", "text": ""}}
+    for piece in pieces:
+        yield "content_block_delta", {"type": "content_block_delta", "index": 0,
+                                      "delta": {"type": "text_delta", "text": piece}}
+    yield "content_block_stop", {"type": "content_block_stop", "index": 0}
+    yield "message_delta", {"type": "message_delta",
+                            "delta": {"stop_reason": message["stop_reason"], "stop_sequence": None},
+                            "usage": {"output_tokens": message["usage"]["output_tokens"]}}
+    yield "message_stop", {"type": "message_stop"}
+
+
+class Server:
+    def __init__(self, standin):
+        self.standin = standin
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self.error(writer, 400, "bad request line", keep_alive=False)
+                    break
+                keep_alive = (version == "HTTP/1.1" and headers.get("connection", "").lower() != "close")
+
+                path = target.split("?", 1)[0]
+                if method == "GET" and path == "/stats":
+                    await self.send(writer, 200, self.standin.snapshot(), keep_alive)
+                elif path != "/v1/messages":
+                    await self.error(writer, 404, f"no route for {path}", keep_alive)
+                elif method != "POST":
+                    await self.error(writer, 405, "POST only", keep_alive)
+                else:
+                    try:
+                        request = json.loads(body)
+                    except json.JSONDecodeError:
+                        await self.error(writer, 400, "body is not JSON", keep_alive)
+                    else:
+                        await self.messages(writer, request, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionResetError, BrokenPipeError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def messages(self, writer, request, keep_alive):
+        s = self.standin
+        status, extra, message, pieces = s.answer(request)
+        if status != 200:
+            await self.error(writer, status, f"stand-in {ERRORS[status]}", keep_alive, extra)
+            return
+        await asyncio.sleep(s.latency(s.rng))
+        per_piece = CHUNK_CHARS / CHARS_PER_TOKEN / s.tokens_per_s if s.tokens_per_s else 0
+        if not request.get("stream"):
+            await asyncio.sleep(per_piece * len(pieces))
+            await self.send(writer, 200, message, keep_alive)
+            return
+        writer.write(self.head(200, "text/event-stream; charset=utf-8", keep_alive,
+                               {"Transfer-Encoding": "chunked", "Cache-Control": "no-cache"}))
+        for event, data in message_events(message, pieces):
+            if event == "content_block_delta" and per_piece:
+                await asyncio.sleep(per_piece)
+            writer.write(sse(event, data))
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def error(self, writer, status, text, keep_alive, extra=None):
+        await self.send(writer, status, {"type": "error", "error": {"type": ERRORS[status], "message": text}},
+                        keep_alive, extra)
+
+    async def send(self, writer, status, payload, keep_alive, extra=None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        writer.write(self.head(status, "application/json; charset=utf-8", keep_alive,
+                               {"Content-Length": str(len(body)), **(extra or {})}) + body)
+        await writer.drain()
+
+    @staticmethod
+    def head(status, content_type, keep_alive, extra):
+        head = [f"HTTP/1.1 {status} {STATUS[status]}", f"Content-Type: {content_type}",
+                f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        head += [f"{k}: {v}" for k, v in extra.items()]
+        return ("\r\n".join(head) + "\r\n\r\n").encode("latin-1")
+
+
+async def serve(standin, host, port, ready=None):
+    srv = await asyncio.start_server(Server(standin).handle, host, port)
+    port = srv.sockets[0].getsockname()[1]
+    if ready is not None:
+        ready(port)
+    else:
+        print(f"Stand-in Messages API on http://{host}:{port}/ (extract --api-url http://{host}:{port})")
+    async with srv:
+        await srv.serve_forever()
+
+
+def start_in_thread(standin, host="127.0.0.1"):
+    """Serve standin from a daemon thread on a free port; returns its base URL."""
+    started = threading.Event()
+    ports = []
+
+    def ready(port):
+        ports.append(port)
+        started.set()
+
+    threading.Thread(target=lambda: asyncio.run(serve(standin, host, 0, ready)), daemon=True).start()
+    started.wait()
+    return f"http://{host}:{ports[0]}"
+
+
+def fetch_stats(url):
+    with urlopen(f"{url}/stats") as f:
+        return json.load(f)
+
+
+# ── Load test ────────────────────────────────────────────────────────────────
+
+VOCAB = """sense imagination memory reason speech understanding passion appetite aversion
+power worth honour manners religion nature covenant justice law right liberty commonwealth
+sovereign subject counsel command punishment reward church prophet kingdom darkness""".split()
+
+
+def synth_chapters(n, seed=0):
+    """n (chapter, pages, text) triples shaped like Leviathan's: ~25k characters, a header a page."""
+    from .extract import PARTS
+
+    rng = random.Random(seed)
+    chapters, page = [], 1
+    for i in range(1, n + 1):
+        part = min(len(PARTS), 1 + (i - 1) * len(PARTS) // n)
+        chars = int(min(90_000, max(4_000, rng.lognormvariate(math.log(22_000), 0.6))))
+        first, pages, size = page, [], 0
+        while size < chars:
+            lines = [f"Chap. {i}. {page}"]
+            for _ in range(rng.randint(4, 7)):
+                a, b, c = rng.sample(VOCAB, 3)
+                if rng.random() < 0.08:
+                    lines.append(f"And this {a} of the {c} is called {b.upper()} by all men.")
+                else:
+                    lines.append(f"For the {a} of the {b} proceedeth from the {c}, as hath been said before "
+                                 f"of the {rng.choice(VOCAB)} and {rng.choice(VOCAB)} of every man.")
+            text = "\n".join(lines)
+            pages.append(f"[PDF page {page}]\n{text}")
+            size += len(text)
+            page += 1
+        chapters.append(({"num": str(i), "title": f"Of Synthetic Matter {i}", "book": part,
+                          "source": "synthetic", "pdf_pages": [first, page - 1]},
+                         (first, page - 1), "\n".join(pages)))
+    return chapters
+
+
+def work_chapters(work):
+    """(chapter, pages, text) triples from a work's cached page text."""
+    from .extract import read_chapters
+
+    return list(read_chapters(work, work.chapters(), {}))
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of values (q in 0-100), None when empty."""
+    if not values:
+        return None
+    values = sorted(values)
+    return values[max(0, math.ceil(q / 100 * len(values)) - 1)]
+
+
+def load_level(url, chapters, concurrency, trace):
+    """Extract every chapter once at a concurrency; the level's figures as a dict."""
+    import anthropic
+    from concurrent.futures import ThreadPoolExecutor
+
+    from .budget import Budget, plan_chapter, run_scheduled, schedule
+    from .extract import MODEL, RETRYABLE, SYSTEM_PROMPT, checkpoint_key, extract_one, render_prompt
+
+    client = anthropic.Anthropic(api_key="standin", base_url=url)
+    budget = Budget()
+    jobs = {}
+    for ch, pages, text in chapters:
+        prompt = SYSTEM_PROMPT + render_prompt(ch["num"], ch["title"], ch["book"], text)
+        jobs[ch["num"]] = (ch, pages, text, plan_chapter(ch["num"], prompt, text, MODEL))
+
+    before = fetch_stats(url)
+    instrument.start_run(f"standin.load.c{concurrency}", trace)
+    failed = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        def run(plan):
+            ch, pages, text, _ = jobs[plan["num"]]
+            return extract_one(client, ch, text, pages, checkpoint_key(ch), work_dir, plan, budget)
+
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for plan, fut in run_scheduled(pool, schedule([j[-1] for j in jobs.values()]), run,
+                                           budget, concurrency):
+                try:
+                    fut.result()
+                except RETRYABLE as e:
+                    failed.append((plan["num"], type(e).__name__))
+        wall = time.perf_counter() - t0
+    after = fetch_stats(url)
+
+    served = {k: after.get(k, 0) - before.get(k, 0) for k in after if k != "sources"}
+    records = instrument.tracer.records
+    calls = [r for r in records if r["stage"] == "model.call"]
+    done = [r for r in records if r["stage"] == "chapter" and "definitions" in r]
+    n = len(chapters)
+    return {
+        "concurrency":     concurrency,
+        "chapters":        n,
+        "failed":          failed,
+        "wall_s":          wall,
+        "chapters_per_min": 60 * len(done) / wall,
+        "output_tok_s":    sum(r.get("output_tokens") or 0 for r in calls) / wall,
+        "chapter_s":       [r["wall_s"] for r in done],
+        "call_s":          [r["wall_s"] for r in calls if "output_tokens" in r],
+        "ttft_s":          [r["ttft_s"] for r in calls if "ttft_s" in r],
+        "requests":        served.get("requests", 0),
+        "attempts":        len(calls),
+        "pipeline_retries": sum(1 for r in records if r["stage"] == "retry.sleep"),
+        "served":          served,
+        "amplification":   served.get("requests", 0) / n,
+    }
+
+
+def print_levels(levels):
+    fmt = lambda v: "-" if v is None else f"{v:.2f}"
+    print(f"\n{'conc':>4} {'done':>5} {'fail':>4} {'wall s':>7} {'ch/min':>7} {'tok/s':>7} "
+          f"{'ch p50':>7} {'ch p90':>7} {'ch p99':>7} {'call p50':>8} {'call p99':>8} {'ttft p50':>8} "
+          f"{'req':>5} {'amp':>5} {'sdk':>5} {'429':>4} {'529':>4} {'trunc':>5}")
+    for lv in levels:
+        s = lv["served"]
+        print(f"{lv['concurrency']:>4} {lv['chapters'] - len(lv['failed']):>5} {len(lv['failed']):>4} "
+              f"{lv['wall_s']:>7.1f} {lv['chapters_per_min']:>7.1f} {lv['output_tok_s']:>7.0f} "
+              + " ".join(f"{fmt(percentile(lv['chapter_s'], q)):>7}" for q in (50, 90, 99)) + " "
+              f"{fmt(percentile(lv['call_s'], 50)):>8} {fmt(percentile(lv['call_s'], 99)):>8} "
+              f"{fmt(percentile(lv['ttft_s'], 50)):>8} {lv['requests']:>5} {lv['amplification']:>5.2f} "
+              f"{lv['requests'] - lv['attempts']:>5} {s.get('rate_limit_error', 0):>4} "
+              f"{s.get('overloaded_error', 0):>4} {s.get('truncated', 0):>5}")
+    print("\nch = chapter wall time including retries; call = one model call, SDK retries included; "
+          "amp = requests served per chapter;\nsdk = requests the SDK retried on its own, "
+          "under the pipeline's attempts")
+    for lv in levels:
+        for num, why in lv["failed"]:
+            print(f"  concurrency {lv['concurrency']}: Chapter {num} failed ({why})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local stand-in for the Messages API, and a load test")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    serve_p = sub.add_parser("serve", help="serve the stand-in")
+    load_p = sub.add_parser("load", help="load-test the extraction pipeline against a stand-in")
+    for p in (serve_p, load_p):
+        p.add_argument("--replay", action="append", default=[], metavar="DIR",
+                       help="directory of recorded replies or checkpoints (repeatable)")
+        p.add_argument("--latency", type=parse_latency, default="0.5",
+                       help="time to first token: S, uniform:LO,HI, lognormal:MEDIAN,SIGMA or exp:MEAN")
+        p.add_argument("--tokens-per-s", type=float, default=0.0, help="output rate; 0 sends at once")
+        p.add_argument("--rate-limit", type=float, default=0.0, help="chance of a 429")
+        p.add_argument("--overloaded", type=float, default=0.0, help="chance of a 529")
+        p.add_argument("--truncate", type=float, default=0.0, help="chance of a reply cut at max_tokens")
+        p.add_argument("--rpm", type=int, default=None, help="requests per minute before 429s")
+        p.add_argument("--retry-after", type=int, default=RETRY_AFTER_S, help="retry-after of a 429, seconds")
+        p.add_argument("--seed", type=int, default=0)
+    serve_p.add_argument("--host", default="127.0.0.1")
+    serve_p.add_argument("--port", type=int, default=PORT)
+    load_p.add_argument("--url", default=None, help="an already running stand-in (its options then apply)")
+    load_p.add_argument("--concurrency", default="1,4,8", help="comma-separated levels")
+    load_p.add_argument("--chapters", type=int, default=48, help="synthetic chapters")
+    load_p.add_argument("--work", default=None, help="use this work's chapters and cached page text")
+    load_p.add_argument("--out", default=None, help="write the levels' figures as JSON")
+    args = parser.parse_args(argv)
+
+    standin = StandIn(args.replay, args.latency, args.tokens_per_s, args.rate_limit, args.overloaded,
+                      args.truncate, args.rpm, args.retry_after, args.seed)
+    if args.cmd == "serve":
+        try:
+            asyncio.run(serve(standin, args.host, args.port))
+        except KeyboardInterrupt:
+            pass
+        return
+
+    url = args.url or start_in_thread(standin)
+    if args.work:
+        from .corpus import Corpus
+
+        work = Corpus().work(args.work)
+    else:
+        work = None
+    trace = instrument.trace_path(work.entries_path if work else None)
+    with stage("standin.chapters"):
+        chapters = work_chapters(work) if work else synth_chapters(args.chapters, args.seed)
+    print(f"{len(chapters)} chapters, {sum(len(t) for _, _, t in chapters):,} characters; stand-in at {url}")
+    levels = []
+    for c in [int(x) for x in args.concurrency.split(",")]:
+        print(f"\n── concurrency {c} ──")
+        levels.append(load_level(url, chapters, c, trace))
+    print_levels(levels)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(levels, f, indent=2)
+        print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+Dictionary store: load and write hobbes_dictionary.csv, and the normalised
+keys of its term names.
+
+Every term name has four derived keys:
+
+    slug     URL id, make_slug's rules (lowercase, punctuation dropped,
+             whitespace runs to "-")
+    key      the name lowercased
+    folded   key with accents dropped, long s to "s" and æ/œ to ae/oe; what
+             search matches on, so "ſoveraigne" and "soveraigne" meet
+    sort     folded with punctuation turned into spaces, the order of term lists
+
+`normalise_terms` computes them for a whole list of names at once: the names
+are joined into one newline-separated string and each substitution runs once
+over that string instead of once per name.  `load_term_keys` caches the
+result next to the CSV (hobbes_dictionary.keys.json), so a build normalises
+only names it has not seen, and build_site embeds the keys in the page so the
+client does not recompute them either.
+
+`spelling_key` levels a folded word's early-modern spelling (u/v, i/j/y,
+doubled letters, final -e, -que for -c).  Alignment, the concordance and the
+cross-ref stem matcher all cut text into words with TOKEN_RE or
+JOINED_TOKEN_RE and number the words' keys with `Keys`.
+
+The page script still has `makeSlug` and `foldKey` for what it cannot know in
+advance (typed URLs and search queries).  `python benchmarks.py normcheck`
+checks that they agree with the Python side.
+
+`load_entries` returns an `Entries` table rather than a list of row dicts.
+It keeps the rows column-wise: term names and chapters are stored once and
+referred to by integer id, page numbers are interned, and each row's
+cross_refs are name ids packed into bytes.  Indexing or iterating gives
+`Entry` views, which read and write like the row dicts they replace
+(`e["cross_refs"]` is the "; "-joined string), so csv.DictWriter writes the
+same CSV from either.  `python benchmarks.py memory` compares the two at 1M
+rows.
+"""
+
+import csv
+import json
+import os
+import re
+import unicodedata
+from array import array
+from collections import namedtuple
+from collections.abc import Mapping, Sequence
+
+from .instrument import stage
+
+FIELDNAMES = ["term", "definition", "chapter", "page_number", "cross_refs", "context"]
+# A row's chapter, "Chapter <num>: <title>": group 1 the number, 2 the title.
+CHAPTER_RE = re.compile(r"Chapter ([IVXLCDM]+|Intro|\d+): (\S.*)")
+
+# Bump when any rule below changes, so cached keys are recomputed.
+KEYS_VERSION = 1
+
+TermKeys = namedtuple("TermKeys", "slug key folded sort")
+
+# The batched forms of make_slug's patterns: whitespace other than the
+# newline separating names, and "-" at either end of a line.
+PUNCT_RE = re.compile(r"[^\w\s-]")
+SPACE_RE = re.compile(r"[^\S\n]+")
+DASH_RE = re.compile(r"-+")
+EDGE_RE = re.compile(r"^-|-$", re.M)
+# Combining marks left by NFKD; the page's foldKey uses the same ranges.
+MARKS_RE = re.compile("[\u0300-\u036f\u1ab0-\u1aff\u1dc0-\u1dff\u20d0-\u20ff\ufe20-\ufe2f]")
+LIGATURES = str.maketrans({"æ": "ae", "œ": "oe"})
+NON_WORD_RE = re.compile(r"[^\w\n]+")
+SORT_EDGE_RE = re.compile(r"^ | $", re.M)
+# spelling_key: u/v and i/j/y levelled, doubled letters single.
+LEVEL = str.maketrans({"v": "u", "j": "i", "y": "i"})
+DOUBLE_RE = re.compile(r"(.)\1+")
+
+# A word of running text, continued over a line-end hyphen ("Sove-\nraigne");
+# JOINED_TOKEN_RE also keeps a word hyphenated in the line ("Common-wealth")
+# whole.  BREAK_RE is the line-end hyphen, taken out before a word is keyed.
+TOKEN_RE = re.compile(r"[^\W_]+(?:[-\u00ad][ \t]*\n\s*[^\W_]+)*")
+JOINED_TOKEN_RE = re.compile(r"[^\W_]+(?:[-\u00ad](?:[ \t]*\n\s*)?[^\W_]+)*")
+BREAK_RE = re.compile(r"[-\u00ad][ \t]*\n\s*")
+
+
+def make_slug(term):
+    s = term.lower()
+    s = re.sub(r'[^\w\s-]', '', s)
+    s = re.sub(r'\s+', '-', s)
+    s = re.sub(r'-+', '-', s)
+    return s.strip('-')
+
+
+def normalise_terms(names):
+    """{name: TermKeys} for the distinct names, in one pass over all of them."""
+    names = list(dict.fromkeys(names))
+    if not names:
+        return {}
+    # A newline inside a name would split it; it is whitespace to every rule.
+    blob = "\n".join(n.replace("\n", " ") for n in names).lower()
+    keys = blob.split("\n")
+
+    s = PUNCT_RE.sub("", blob)
+    s = SPACE_RE.sub("-", s)
+    s = DASH_RE.sub("-", s)
+    slugs = EDGE_RE.sub("", s).split("\n")
+
+    folded = MARKS_RE.sub("", unicodedata.normalize("NFKD", blob)).translate(LIGATURES)
+    sort = SORT_EDGE_RE.sub("", NON_WORD_RE.sub(" ", folded.replace("_", " "))).split("\n")
+    folded = folded.split("\n")
+    return {n: TermKeys(*k) for n, k in zip(names, zip(slugs, keys, folded, sort))}
+
+
+def fold_key(text):
+    """Folded key of a single string, e.g. a search query."""
+    return normalise_terms([text])[text].folded
+
+
+def spelling_key(folded, keep_doubles=False):
+    """
+    Early-modern spelling variants of a folded word mapped to one key.  With
+    keep_doubles, doubled letters stay, so "good" and "god" do not meet.
+    """
+    w = folded.translate(LEVEL)
+    if not keep_doubles:
+        w = DOUBLE_RE.sub(r"\1", w)
+    if w.endswith("que"):
+        w = w[:-3] + "c"
+    elif len(w) > 3 and w.endswith("e"):
+        w = w[:-1]
+    return w
+
+
+class Keys:
+    """
+    Word keys (spelling_key, or the given key function's) as small ints,
+    normalised one batch of new words at a time.
+    """
+
+    def __init__(self, key=spelling_key):
+        self.key = key
+        self.ids = {}
+        self.raw = {}
+
+    def lookup(self, words):
+        new = [w for w in dict.fromkeys(words) if w not in self.raw]
+        if new:
+            clean = {w: BREAK_RE.sub("", w) for w in new}
+            folded = normalise_terms(clean.values())
+            for w in new:
+                key = self.key(folded[clean[w]].folded)
+                self.raw[w] = self.ids.setdefault(key, len(self.ids))
+        return [self.raw[w] for w in words]
+
+
+def term_names(entries):
+    """Every distinct name in entries: the terms, then the names in their cross_refs."""
+    names = dict.fromkeys(e["term"] for e in entries)
+    for e in entries:
+        names.update(dict.fromkeys(split_refs(e["cross_refs"])))
+    return list(names)
+
+
+def keys_path(csv_path):
+    return os.path.splitext(csv_path)[0] + ".keys.json"
+
+
+def load_term_keys(csv_path, entries):
+    """
+    {name: TermKeys} for every name in entries (see term_names), read from the
+    cache next to csv_path.  Names the cache lacks are normalised in one batch
+    and the cache is rewritten with them added.
+    """
+    path = keys_path(csv_path)
+    names = term_names(entries)
+    with stage("keys.load", path=path) as rec:
+        cached = {}
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == KEYS_VERSION:
+                cached = {n: TermKeys(*k) for n, k in zip(data["names"], zip(*(data[c] for c in TermKeys._fields)))}
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+        missing = [n for n in names if n not in cached]
+        rec["names"] = len(names)
+        rec["normalised"] = len(missing)
+        if missing:
+            cached.update(normalise_terms(missing))
+            write_term_keys(path, cached)
+    return {n: cached[n] for n in names}
+
+
+def write_term_keys(path, keys):
+    """Write {name: TermKeys} column-wise, one list per field."""
+    data = {"version": KEYS_VERSION, "names": list(keys)}
+    for i, field in enumerate(TermKeys._fields):
+        data[field] = [k[i] for k in keys.values()]
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def split_refs(cross_refs):
+    """The "; "-joined cross_refs column as a list of term names."""
+    return [r.strip() for r in cross_refs.split(';') if r.strip()]
+
+
+class Entry(Mapping):
+    """One row of an Entries table, read and written like a row dict with the CSV's columns."""
+
+    __slots__ = ("table", "index")
+
+    def __init__(self, table, index):
+        self.table = table
+        self.index = index
+
+    def __getitem__(self, field):
+        return self.table.get(self.index, field)
+
+    def __setitem__(self, field, value):
+        self.table.set(self.index, field, value)
+
+    def __iter__(self):
+        return iter(FIELDNAMES)
+
+    def __len__(self):
+        return len(FIELDNAMES)
+
+    def __repr__(self):
+        return f"Entry({dict(self)!r})"
+
+
+class Entries(Sequence):
+    """
+    Dictionary rows stored column-wise (see the module docstring).  Rows are
+    appended from anything with the CSV's columns; cross_refs may be missing
+    and is then empty.  `a + b` with a list gives a list, which the merges
+    validate and turn back into a table.
+    """
+
+    def __init__(self, rows=()):
+        self.names = []                 # term and cross-ref names; ids index this
+        self.chapters = []
+        self.term_ids = array("i")
+        self.chapter_ids = array("i")
+        self.definitions = []
+        self.page_numbers = []
+        self.contexts = []
+        self.ref_ids = []               # int32 name ids as bytes
+        self.raw_refs = {}              # row -> cross_refs cell that split_refs would not give back
+        self._name_ids = {}
+        self._chapter_ids = {}
+        self._pages = {}
+        self.extend(rows)
+
+    def name_id(self, name):
+        i = self._name_ids.get(name)
+        if i is None:
+            i = self._name_ids[name] = len(self.names)
+            self.names.append(name)
+        return i
+
+    def chapter_id(self, chapter):
+        i = self._chapter_ids.get(chapter)
+        if i is None:
+            i = self._chapter_ids[chapter] = len(self.chapters)
+            self.chapters.append(chapter)
+        return i
+
+    def pack_refs(self, names):
+        return array("i", map(self.name_id, names)).tobytes() if names else b""
+
+    def append_values(self, term, definition, chapter, page_number, cross_refs, context):
+        """Append a row given as column values in FIELDNAMES order."""
+        self.term_ids.append(self.name_id(term))
+        self.chapter_ids.append(self.chapter_id(chapter))
+        self.definitions.append(definition)
+        self.page_numbers.append(self._pages.setdefault(page_number, page_number))
+        self.ref_ids.append(b"")
+        self.contexts.append(context)
+        self.set_cross_refs(len(self.ref_ids) - 1, cross_refs)
+
+    def append(self, row):
+        self.append_values(row["term"], row["definition"], row["chapter"], row["page_number"],
+                           row.get("cross_refs", ""), row["context"])
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+
+    def refs(self, i):
+        """Row i's cross_refs as a list of names."""
+        ids = array("i")
+        ids.frombytes(self.ref_ids[i])
+        return [self.names[j] for j in ids]
+
+    def set_refs(self, i, names):
+        self.ref_ids[i] = self.pack_refs(names)
+        self.raw_refs.pop(i, None)
+
+    def set_cross_refs(self, i, cell):
+        if not cell:
+            self.set_refs(i, ())
+            return
+        names = split_refs(cell)
+        self.set_refs(i, names)
+        if "; ".join(names) != cell:
+            self.raw_refs[i] = cell
+
+    def get(self, i, field):
+        if field == "term":
+            return self.names[self.term_ids[i]]
+        if field == "definition":
+            return self.definitions[i]
+        if field == "chapter":
+            return self.chapters[self.chapter_ids[i]]
+        if field == "page_number":
+            return self.page_numbers[i]
+        if field == "cross_refs":
+            if i in self.raw_refs:
+                return self.raw_refs[i]
+            return "; ".join(self.refs(i))
+        if field == "context":
+            return self.contexts[i]
+        raise KeyError(field)
+
+    def set(self, i, field, value):
+        if field == "term":
+            self.term_ids[i] = self.name_id(value)
+        elif field == "definition":
+            self.definitions[i] = value
+        elif field == "chapter":
+            self.chapter_ids[i] = self.chapter_id(value)
+        elif field == "page_number":
+            self.page_numbers[i] = self._pages.setdefault(value, value)
+        elif field == "cross_refs":
+            self.set_cross_refs(i, value)
+        elif field == "context":
+            self.contexts[i] = value
+        else:
+            raise KeyError(f"{field} is not a dictionary column")
+
+    def __len__(self):
+        return len(self.definitions)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [Entry(self, j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("entry index out of range")
+        return Entry(self, i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield Entry(self, i)
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        return list(other) + list(self)
+
+
+def load_entries(path):
+    """Read the dictionary CSV into an Entries table."""
+    with stage("csv.read", path=path) as rec:
+        entries = Entries()
+        with open(path, encoding="utf-8") as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            columns = [header.index(c) for c in FIELDNAMES]
+            for values in reader:
+                if not values:          # blank line; DictReader skips these too
+                    continue
+                entries.append_values(*[values[c] for c in columns])
+        rec["rows"] = len(entries)
+    return entries
+
+
+def iter_entries(path):
+    """Row dicts of the dictionary CSV one at a time, for single-pass readers."""
+    with open(path, encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            yield dict(row)
+
+
+def write_entries(path, entries):
+    """Write entries back to the dictionary CSV, ignoring non-column keys."""
+    with stage("csv.write", path=path) as rec:
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDNAMES, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(entries)
+        rec["rows"] = len(entries)
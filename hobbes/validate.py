@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Row validation between extraction (or a merge) and the CSV write.
+
+    python -m hobbes validate [--work ID] [--no-quotes]
+
+`Validator.filter(rows)` is a generator: rows go in one at a time, the ones
+that pass come out, and each failure is appended to the work's rejects file
+(corpus/<id>/rejects.jsonl) as {"row": ..., "reasons": [...]} instead of
+reaching the CSV.  Nothing is kept per row, so memory is bounded by the
+chapter map and the work's page text however many rows stream through.
+
+    schema    every CSV column present and a string; term, definition and
+              chapter non-empty; chapter reads "Chapter <num>: <title>" with
+              a real number (not the "?" a missing chapter_num used to give)
+    page      page_number is a running-header page inside the chapter's
+              range, give or take PAGE_SLACK
+    quote     at least QUOTE_MIN of the definition's word QUOTE_N-grams occur
+              in the text of the chapter's pages
+
+Rows of chapters the map does not cover (the hand-written Chapter 1061
+entries) get the schema check only.  A chapter's pages are indexed the first
+time a row needs them: the text is folded (store.fold_key), words broken by a
+line-end hyphen are rejoined, and the set of word n-grams is kept, so a quote
+costs one set lookup per n-gram and survives the odd line break, running
+header or dropped word.  When a source PDF has no page text (neither the PDF
+nor its cache is present), page and quote checks on its chapters are skipped
+and counted as unchecked.
+
+The `validate` command streams the work's CSV through the checks without
+rewriting it, and exits non-zero if anything was rejected.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from collections import Counter
+
+from . import instrument
+from .corpus import Corpus, header_page_numbers, resolve_pages
+from .instrument import stage
+from .store import CHAPTER_RE, FIELDNAMES, fold_key, iter_entries
+
+WORD_RE = re.compile(r"[^\W_]+")
+HYPHEN_RE = re.compile(r"(\w)[-\u00ad]\s*\n\s*(\w)")
+
+PAGE_SLACK = 1
+QUOTE_N = 4
+QUOTE_MIN = 0.5
+
+
+def quote_words(text):
+    """Folded words of text, with words hyphenated across a line break rejoined."""
+    return WORD_RE.findall(fold_key(HYPHEN_RE.sub(r"\1\2", text)))
+
+
+def ngrams(words, n=QUOTE_N):
+    return {tuple(words[i:i + n]) for i in range(len(words) - n + 1)}
+
+
+class Validator:
+    """Checks rows against one work's chapter map and page text."""
+
+    def __init__(self, chapters, page_texts, rejects_path, quotes=True):
+        """page_texts(pdf) returns that PDF's page texts, or None if it has none."""
+        self.chapters = {ch["num"]: ch for ch in chapters}
+        self.page_texts = page_texts
+        self.rejects_path = rejects_path
+        self.quotes = quotes
+        self.counts = Counter()
+        self._headers = {}
+        self._pages = {}
+        self._index = {}
+
+    @classmethod
+    def for_work(cls, work, texts=None, quotes=True):
+        """Validator for a corpus Work; texts is an optional {pdf: pages} already read."""
+        texts = {} if texts is None else texts
+
+        def page_texts(pdf):
+            if pdf not in texts:
+                try:
+                    texts[pdf] = work.page_texts(pdf)
+                except FileNotFoundError:
+                    texts[pdf] = None
+            return texts[pdf]
+
+        return cls(work.chapters(), page_texts, work.rejects_path, quotes)
+
+    def headers(self, pdf):
+        if pdf not in self._headers:
+            pages = self.page_texts(pdf)
+            self._headers[pdf] = header_page_numbers(pages) if pages is not None else None
+        return self._headers[pdf]
+
+    def chapter_pages(self, ch):
+        """(start, end) PDF pages of a chapter, or None without page text."""
+        num = ch["num"]
+        if num not in self._pages:
+            headers = self.headers(ch["pdf"])
+            self._pages[num] = resolve_pages(ch, headers) if headers is not None else None
+        return self._pages[num]
+
+    def page_range(self, ch):
+        """(lo, hi) running-header pages of a chapter, or None if unknown."""
+        if "header_pages" in ch:
+            return tuple(ch["header_pages"])
+        pages = self.chapter_pages(ch)
+        if pages is None:
+            return None
+        numbers = [n for n in self.headers(ch["pdf"])[pages[0] - 1:pages[1]] if n is not None]
+        return (min(numbers), max(numbers)) if numbers else None
+
+    def quote_index(self, ch):
+        """(n-gram set, folded word string) of a chapter's pages plus one either side."""
+        num = ch["num"]
+        if num not in self._index:
+            pages = self.chapter_pages(ch)
+            if pages is None:
+                self._index[num] = None
+            else:
+                with stage("validate.index", chapter=num) as rec:
+                    texts = self.page_texts(ch["pdf"])
+                    words = quote_words("\n".join(texts[max(0, pages[0] - 2):pages[1] + 1]))
+                    self._index[num] = (ngrams(words), " " + " ".join(words) + " ")
+                    rec["words"] = len(words)
+        return self._index[num]
+
+    def check(self, row):
+        """Reasons row fails, empty if it passes."""
+        reasons = []
+        for col in FIELDNAMES:
+            if col not in row:
+                reasons.append(f"missing {col}")
+            elif not isinstance(row[col], str):
+                reasons.append(f"{col} is {type(row[col]).__name__}, not a string")
+        if reasons:
+            return reasons
+        for col in ("term", "definition", "chapter"):
+            if not row[col].strip():
+                reasons.append(f"empty {col}")
+        m = CHAPTER_RE.match(row["chapter"])
+        if not m:
+            return reasons + [f"chapter {row['chapter']!r} is not 'Chapter <num>: <title>'"]
+        ch = self.chapters.get(m.group(1))
+        if ch is None:
+            return reasons
+
+        page = row["page_number"].strip()
+        span = self.page_range(ch)
+        if not page.isdigit():
+            reasons.append(f"page_number {page!r} is not a page number")
+        elif span is None:
+            self.counts["page unchecked"] += 1
+        elif not span[0] - PAGE_SLACK <= int(page) <= span[1] + PAGE_SLACK:
+            reasons.append(f"page {page} outside Chapter {ch['num']} (pp. {span[0]}-{span[1]})")
+
+        if self.quotes and row["definition"].strip():
+            index = self.quote_index(ch)
+            if index is None:
+                self.counts["quote unchecked"] += 1
+            else:
+                score = self.quote_score(row["definition"], index)
+                if score < QUOTE_MIN:
+                    reasons.append(f"definition not found in Chapter {ch['num']}'s text "
+                                   f"({score:.0%} of it matched)")
+        return reasons
+
+    def quote_score(self, definition, index):
+        """Fraction of the definition's n-grams found in a chapter's index."""
+        grams, joined = index
+        words = quote_words(definition)
+        if len(words) < QUOTE_N:
+            return 1.0 if f" {' '.join(words)} " in joined else 0.0
+        mine = ngrams(words)
+        return len(mine & grams) / len(mine)
+
+    def filter(self, rows):
+        """Yield the rows that pass; write the rest to the rejects file."""
+        os.makedirs(os.path.dirname(self.rejects_path), exist_ok=True)
+        with stage("validate") as rec, open(self.rejects_path, "w", encoding="utf-8") as rejects:
+            for row in rows:
+                self.counts["rows"] += 1
+                reasons = self.check(row)
+                if reasons:
+                    self.counts["rejected"] += 1
+                    rejects.write(json.dumps({"row": dict(row), "reasons": reasons}, ensure_ascii=False,
+                                             default=str) + "\n")
+                else:
+                    yield row
+            rec.update(self.counts)
+
+    def report(self):
+        c = self.counts
+        print(f"Validated {c['rows']} rows: {c['rows'] - c['rejected']} passed, "
+              f"{c['rejected']} rejected")
+        unchecked = [f"{c[k]} {k}" for k in ("page unchecked", "quote unchecked") if c[k]]
+        if unchecked:
+            print(f"  no page text for some chapters: {', '.join(unchecked)}")
+        if c["rejected"]:
+            print(f"  rejects written to {self.rejects_path}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check a work's CSV without rewriting it")
+    parser.add_argument("--work", default=None, help="work id in corpus.json (default leviathan)")
+    parser.add_argument("--no-quotes", action="store_true",
+                        help="skip the check that definitions are quotes from the page text")
+    args = parser.parse_args(argv)
+
+    work = Corpus().work(args.work)
+    instrument.start_run("validate", instrument.trace_path(work.entries_path))
+    validator = Validator.for_work(work, quotes=not args.no_quotes)
+    for _ in validator.filter(iter_entries(work.entries_path)):
+        pass
+    validator.report()
+    instrument.summary()
+    if validator.counts["rejected"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
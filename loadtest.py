@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Load test for serve.py.
+
+    python loadtest.py [--url http://127.0.0.1:8765] [--concurrency 32] [--requests 20000]
+
+Opens `concurrency` keep-alive connections and drives a mixed workload (term
+lookups, chapter listings, graph neighbours, exact and misspelt searches)
+drawn from the server's own /chapters data, then reports p50/p90/p99 latency
+and requests per second.  --revalidate sends If-None-Match with the last ETag
+seen for each URL, exercising the 304 path.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from urllib.parse import quote, urlsplit
+
+
+class Connection:
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def get(self, target, etag=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        head = f"GET {target} HTTP/1.1\r\nHost: {self.host}\r\n"
+        if etag:
+            head += f"If-None-Match: {etag}\r\n"
+        self.writer.write((head + "\r\n").encode("latin-1"))
+        await self.writer.drain()
+
+        status = int((await self.reader.readline()).split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        body = await self.reader.readexactly(int(headers.get("content-length", 0)))
+        return status, headers.get("etag"), body
+
+    def close(self):
+        if self.writer:
+            self.writer.close()
+
+
+async def build_workload(host, port, n, seed):
+    """n request targets in a realistic mix, built from live /chapters data."""
+    conn = Connection(host, port)
+    _, _, body = await conn.get("/chapters")
+    chapters = [c["chapter"] for c in json.loads(body)]
+    slugs, terms = [], []
+    for ch in chapters:
+        _, _, body = await conn.get(f"/chapters/{quote(ch)}")
+        for e in json.loads(body)["entries"]:
+            slugs.append(e["slug"])
+            terms.append(e["term"])
+    conn.close()
+
+    rng = random.Random(seed)
+
+    def typo(term):
+        w = max(term.lower().split(), key=len)
+        if len(w) < 5:
+            return w
+        k = rng.randrange(1, len(w) - 1)
+        return w[:k] + w[k + 1:]
+
+    mix = [
+        (0.45, lambda: f"/terms/{quote(rng.choice(slugs))}"),
+        (0.20, lambda: f"/graph/{quote(rng.choice(slugs))}"),
+        (0.05, lambda: "/chapters"),
+        (0.10, lambda: f"/chapters/{quote(rng.choice(chapters))}"),
+        (0.12, lambda: f"/search?q={quote(rng.choice(terms).lower()[:rng.randint(2, 6)])}"),
+        (0.08, lambda: f"/search?q={quote(typo(rng.choice(terms)))}"),
+    ]
+    weights = [w for w, _ in mix]
+    makers = [m for _, m in mix]
+    return [rng.choices(makers, weights)[0]() for _ in range(n)]
+
+
+async def worker(conn, queue, latencies, statuses, etags, revalidate):
+    while True:
+        try:
+            target = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        t0 = time.perf_counter()
+        status, etag, _ = await conn.get(target, etags.get(target) if revalidate else None)
+        latencies.append(time.perf_counter() - t0)
+        statuses[status] = statuses.get(status, 0) + 1
+        if etag:
+            etags[target] = etag
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+async def run(args):
+    url = urlsplit(args.url)
+    host, port = url.hostname, url.port or 80
+    targets = await build_workload(host, port, args.requests, args.seed)
+
+    queue = asyncio.Queue()
+    for t in targets:
+        queue.put_nowait(t)
+    latencies, statuses, etags = [], {}, {}
+    conns = [Connection(host, port) for _ in range(args.concurrency)]
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker(c, queue, latencies, statuses, etags, args.revalidate) for c in conns))
+    elapsed = time.perf_counter() - t0
+    for c in conns:
+        c.close()
+
+    lat = sorted(latencies)
+    print(f"{len(lat)} requests, concurrency {args.concurrency}, {elapsed:.2f} s")
+    print(f"  throughput  {len(lat) / elapsed:10.1f} req/s")
+    print(f"  p50         {percentile(lat, 50) * 1000:10.2f} ms")
+    print(f"  p90         {percentile(lat, 90) * 1000:10.2f} ms")
+    print(f"  p99         {percentile(lat, 99) * 1000:10.2f} ms")
+    print(f"  mean        {statistics.fmean(lat) * 1000:10.2f} ms")
+    print(f"  statuses    {dict(sorted(statuses.items()))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for serve.py")
+    parser.add_argument("--url", default="http://127.0.0.1:8765")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--revalidate", action="store_true",
+                        help="send If-None-Match with previously seen ETags")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+import pytest
+
+from hobbes.corpus import file_sha1, file_stamp, load_page_texts, page_cache_path, write_json
+
+
+def test_page_texts_come_from_the_cache_when_the_pdf_is_gone(tmp_path):
+    pdf = tmp_path / "on_man.pdf"
+    pdf.write_bytes(b"%PDF stand-in")
+    cache_dir = str(tmp_path / "pages")
+    write_json(page_cache_path(str(pdf), cache_dir),
+               {"pdf": pdf.name, "stamp": file_stamp(str(pdf)), "sha1": file_sha1(str(pdf)),
+                "pages": ["Of Sense", "Of Imagination"]})
+    pdf.unlink()
+    assert load_page_texts(str(pdf), cache_dir) == ["Of Sense", "Of Imagination"]
+
+
+def test_no_pdf_and_no_cache_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        load_page_texts(str(tmp_path / "missing.pdf"), str(tmp_path / "pages"))
@@ -0,0 +1,54 @@
+import pytest
+
+from hobbes.crossrefs import StemMatcher, compute_cross_refs, inflection_key
+from hobbes.store import fold_key
+
+
+def key(word):
+    return inflection_key(fold_key(word))
+
+
+@pytest.mark.parametrize("a, b", [
+    ("Lawes", "law"), ("laws", "law"), ("covenanted", "covenant"), ("covenants", "covenant"),
+    ("Passions", "passion"), ("Soveraign", "sovereign"), ("honour", "honor"),
+    ("publick", "public"), ("men", "man"), ("Common-wealth", "Commonwealth"),
+    ("vaine-glory", "Vain-Glory"), ("vaine-glory", "vainglory"), ("glasses", "glass"),
+    ("Gods", "God"), ("Acts", "act"), ("Arts", "art"), ("Sons", "son"), ("Ends", "end"),
+    ("sins", "sin"), ("Sinnes", "sin"), ("Warre", "war"), ("naturall", "natural"),
+    ("Goodnesse", "goodness"),
+])
+def test_forms_meet(a, b):
+    assert key(a) == key(b)
+
+
+@pytest.mark.parametrize("word", ["glass", "class", "news", "this", "thus", "basis", "Genesis"])
+def test_no_plural_strip(word):
+    assert key(word).endswith("s")
+
+
+@pytest.mark.parametrize("a, b", [
+    ("glass", "gla"), ("class", "cla"), ("news", "new"), ("this", "thi"),
+    ("God", "Good"), ("Gods", "Good"), ("fell", "feeling"),
+])
+def test_short_and_sibilant_words_stay_apart(a, b):
+    assert key(a) != key(b)
+
+
+def test_stem_matcher_links_hyphenated_forms():
+    m = StemMatcher(["Vain-Glory", "Glass", "New"])
+    assert m.find("Pride", "Of vaine-glory, and the news of it.") == ["Vain-Glory"]
+
+
+def test_god_does_not_link_good():
+    m = StemMatcher(["Good", "God"])
+    assert m.find("Nature", "The Art whereby God hath made the world.") == ["God"]
+
+
+def test_stem_finds_every_exact_ref():
+    rows = [
+        {"term": "Law", "definition": "The Lawes of Nature, and the Law civil."},
+        {"term": "Covenant", "definition": "A Law covenanted between men."},
+        {"term": "Class", "definition": "This class of Covenants."},
+    ]
+    for exact, stem in zip(compute_cross_refs(rows), compute_cross_refs(rows, match="stem")):
+        assert set(exact.split("; ")) - {""} <= set(stem.split("; "))
@@ -0,0 +1,76 @@
+import json
+import types
+
+import pytest
+
+pytest.importorskip("anthropic")
+
+from hobbes import extract, standin
+from hobbes.checkpoint import read_checkpoint, save_checkpoint
+from hobbes.corpus import Work, file_sha1, file_stamp, page_cache_path, write_json
+from hobbes.pagediff import chapter_num
+from hobbes.store import load_entries
+
+
+@pytest.fixture
+def work(tmp_path, monkeypatch):
+    """A two-chapter synthetic work whose page text is already cached, so no PDF is parsed."""
+    monkeypatch.setenv("HOBBES_TRACE", str(tmp_path / "trace.jsonl"))
+    chapters = standin.synth_chapters(2, seed=1)
+    pages = [p.split("\n", 1)[1] for _, _, text in chapters for p in text.split("[PDF page ")[1:]]
+    pdf = tmp_path / "synthetic.pdf"
+    pdf.write_bytes(b"%PDF stand-in")
+    (tmp_path / "chapters.json").write_text(json.dumps(
+        {"sources": {"synthetic": pdf.name}, "chapters": [ch for ch, _, _ in chapters]}))
+    work = Work(str(tmp_path), "t", {"chapter_map": "chapters.json", "entries": "dictionary.csv"})
+    write_json(page_cache_path(str(pdf), work.pages_dir),
+               {"pdf": pdf.name, "stamp": file_stamp(str(pdf)), "sha1": file_sha1(str(pdf)),
+                "pages": pages})
+    monkeypatch.setattr(extract, "Corpus", lambda: types.SimpleNamespace(work=lambda _: work))
+    return work
+
+
+@pytest.fixture
+def api_url():
+    return standin.start_in_thread(standin.StandIn(seed=0))
+
+
+def run(api_url, *args):
+    extract.main(["--api-url", api_url, "--concurrency", "2", *args])
+
+
+def csv_bytes(work):
+    with open(work.entries_path, "rb") as f:
+        return f.read()
+
+
+def test_rerun_without_changes_changes_nothing(work, api_url):
+    run(api_url)
+    first = csv_bytes(work)
+    rows = len(load_entries(work.entries_path))
+    assert rows > 0
+    run(api_url)
+    assert len(load_entries(work.entries_path)) == rows
+    assert csv_bytes(work) == first
+
+
+def test_newer_checkpoint_replaces_its_rows_once(work, api_url):
+    """A checkpoint written by a run that never reached the CSV wins over the CSV's rows."""
+    run(api_url)
+    before = load_entries(work.entries_path)
+    cp = read_checkpoint(work.work_dir, "2")
+    newer = cp["definitions"][::2]
+    meta = {k: v for k, v in cp.items() if k not in ("chapter_num", "key", "definitions")}
+    save_checkpoint(work.work_dir, "2", cp["key"], newer, **meta)
+
+    run(api_url)
+    after = load_entries(work.entries_path)
+    passed = {(e["term"], e["definition"]) for e in before if chapter_num(e) == "2"}
+    expected = [d["term"] for d in newer if (d["term"], d["definition"]) in passed]
+    assert [e["term"] for e in after if chapter_num(e) == "2"] == expected
+    assert [e["term"] for e in after if chapter_num(e) == "1"] == \
+        [e["term"] for e in before if chapter_num(e) == "1"]
+
+    settled = csv_bytes(work)
+    run(api_url)
+    assert csv_bytes(work) == settled
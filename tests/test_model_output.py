@@ -0,0 +1,25 @@
+import json
+
+import pytest
+
+from hobbes.model_output import parse_definitions
+
+
+def test_parses_fenced_array():
+    assert parse_definitions('```json\n[{"term": "Sense"}]\n```') == [{"term": "Sense"}]
+
+
+def test_finds_array_after_prose():
+    assert parse_definitions('Here they are:\n[{"term": "Sense"}]') == [{"term": "Sense"}]
+
+
+@pytest.mark.parametrize("raw", [
+    '{"term": "Sense"}',
+    '["Sense", "Imagination"]',
+    'Here they are: ["Sense"]',
+    '[{"term": "Sense"}, 3]',
+    '[{"term": "Sense"',
+])
+def test_rejects_anything_but_an_array_of_objects(raw):
+    with pytest.raises(json.JSONDecodeError):
+        parse_definitions(raw)
@@ -0,0 +1,15 @@
+from hobbes.pagediff import splice_chapter
+
+
+def row(term, definition, page):
+    return {"term": term, "definition": definition, "chapter": "Chapter I: Of Sense",
+            "page_number": page, "cross_refs": "", "context": ""}
+
+
+def test_splice_keeps_malformed_model_rows_for_the_validator():
+    old = [row("Sense", "The Originall of them all, is that which we call Sense", "3")]
+    bad_page = row("Fancy", "Imagination therefore is nothing but decaying sense", 4)
+    no_term = {"definition": "for there is no conception in a mans mind", "page_number": "3"}
+    rows, counts = splice_chapter(old, [bad_page, no_term], lambda d: 1.0)
+    assert rows == [old[0], no_term, bad_page]
+    assert counts == {"kept": 1, "added": 2, "dropped": 0}
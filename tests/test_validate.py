@@ -0,0 +1,41 @@
+from hobbes.model_output import model_rows
+from hobbes.validate import Validator
+
+PAGES = [
+    "Chap. 1. 3\nOF SENSE\nThe Originall of them all, is that which we call SENSE; "
+    "for there is no conception in a mans mind, which hath not at first begotten upon the organs of Sense.",
+    "Chap. 1. 4\nThe cause of Sense, is the Externall Body, or Object, which presseth the organ proper to each Sense.",
+]
+CHAPTERS = [{"num": "I", "title": "Of Sense", "pdf": "leviathan.pdf", "pdf_pages": [1, 2], "book": 1}]
+
+
+def validator(tmp_path):
+    return Validator(CHAPTERS, lambda pdf: PAGES, str(tmp_path / "rejects.jsonl"))
+
+
+def model_definition():
+    """A definition as extract.py has it once tag_chapter has run: no cross_refs."""
+    return {"term": "Sense", "page_number": "3", "context": "first definition of the book",
+            "definition": "The Originall of them all, is that which we call SENSE",
+            "chapter_num": "I", "chapter_title": "Of Sense", "chapter": "Chapter I: Of Sense"}
+
+
+def test_fresh_model_row_passes_filter(tmp_path):
+    v = validator(tmp_path)
+    rows = list(v.filter(model_rows([model_definition()])))
+    assert [r["term"] for r in rows] == ["Sense"]
+    assert rows[0]["cross_refs"] == ""
+    assert v.counts["rejected"] == 0
+
+
+def test_row_without_cross_refs_is_rejected(tmp_path):
+    v = validator(tmp_path)
+    assert v.check(model_definition()) == ["missing cross_refs"]
+
+
+def test_misquoted_definition_is_rejected(tmp_path):
+    d = model_definition()
+    d["definition"] = "Sense is the motion of the animal spirits toward the brain"
+    v = validator(tmp_path)
+    assert list(v.filter(model_rows([d]))) == []
+    assert (tmp_path / "rejects.jsonl").read_text().count("\n") == 1